@@ -4,6 +4,7 @@ from .base.constants import DepsModifier as _DepsModifier
 from .base.constants import UpdateModifier as _UpdateModifier
 from .base.context import context
 from .common.constants import NULL
+from .core.batch_solve import BatchSolver as _BatchSolver
 from .core.package_cache_data import PackageCacheData as _PackageCacheData
 from .core.prefix_data import PrefixData as _PrefixData
 from .core.subdir_data import SubdirData as _SubdirData
@@ -186,6 +187,57 @@ class Solver:
         )
 
 
+class BatchSolver:
+    """
+    **Beta** While in beta, expect both major and minor changes across minor releases.
+
+    Solve many sets of package specs for new environments against the same channels.
+    The index is loaded, and prepared for solving, once for all of them.
+    """
+
+    def __init__(self, channels=(), subdirs=(), repodata_fn=NULL):
+        """
+        **Beta** While in beta, expect both major and minor changes across minor releases.
+
+        Args:
+            channels (Sequence[:class:`Channel`]):
+                A prioritized list of channels to use for the solutions. Defaults to
+                ``context.channels``.
+            subdirs (Sequence[str]):
+                A prioritized list of subdirs to use for the solutions. Defaults to
+                ``context.subdirs``.
+            repodata_fn (str):
+                The repodata file name to load, e.g. ``current_repodata.json``. Defaults
+                to ``repodata.json``.
+
+        """
+        kwargs = {} if repodata_fn is NULL else {"repodata_fn": repodata_fn}
+        self._internal = _BatchSolver(channels, subdirs, **kwargs)
+
+    def solve(self, specs_list, max_workers=1):
+        """
+        **Beta** While in beta, expect both major and minor changes across minor releases.
+
+        Solve each set of specs with the classic solver, for an empty environment.
+
+        Args:
+            specs_list (Iterable[Iterable[MatchSpec or str]]):
+                The sets of package specs to solve.
+            max_workers (int):
+                The number of processes to solve in. Worker processes are forked, and
+                share the prepared index with this process; where processes cannot be
+                forked, all sets are solved in this process.
+
+        Returns:
+            list[tuple[PackageRecord] or Exception]:
+                For each set of specs, in order, either the package records of its
+                solution in sorted dependency order from roots to leaves, or the
+                exception raised while solving it, e.g. :obj:`UnsatisfiableError`.
+
+        """
+        return self._internal.solve(specs_list, max_workers=max_workers)
+
+
 class SubdirData:
     """
     **Beta** While in beta, expect both major and minor changes across minor releases.
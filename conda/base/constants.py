@@ -256,6 +256,8 @@ class SatSolverChoice(ValueEnum):
     PYCOSAT = "pycosat"
     PYCRYPTOSAT = "pycryptosat"
     PYSAT = "pysat"
+    PYSAT_INCREMENTAL = "pysat-incremental"
+    PORTFOLIO = "portfolio"
 
 
 #: The name of the default solver, currently "classic"
@@ -198,6 +198,8 @@ class Context(Configuration):
     _repodata_threads = ParameterLoader(
         PrimitiveParameter(0, element_type=int), aliases=("repodata_threads",)
     )
+    # parse and index repodata of several subdirs; 0 or 1 parses in-process
+    repodata_processes = ParameterLoader(PrimitiveParameter(0, element_type=int))
     # download packages; determined experimentally
     _fetch_threads = ParameterLoader(
         PrimitiveParameter(5, element_type=int), aliases=("fetch_threads",)
@@ -270,6 +272,7 @@ class Context(Configuration):
     # number of seconds to cache repodata locally
     #   True/1: respect Cache-Control max-age header
     #   False/0: always fetch remote repodata (HTTP 304 responses respected)
+    background_repodata_refresh = ParameterLoader(PrimitiveParameter(False))
 
     # remote connection details
     ssl_verify = ParameterLoader(
@@ -399,6 +402,8 @@ class Context(Configuration):
     update_modifier = ParameterLoader(PrimitiveParameter(UpdateModifier.UPDATE_SPECS))
     sat_solver = ParameterLoader(PrimitiveParameter(SatSolverChoice.PYCOSAT))
     solver_ignore_timestamps = ParameterLoader(PrimitiveParameter(False))
+    solve_cache = ParameterLoader(PrimitiveParameter(False))
+    solve_time_budget_secs = ParameterLoader(PrimitiveParameter(0.0))
     solver = ParameterLoader(
         PrimitiveParameter(DEFAULT_SOLVER),
         aliases=("experimental_solver",),
@@ -1105,6 +1110,7 @@ class Context(Configuration):
                 "repodata_fns",
                 "use_only_tar_bz2",
                 "repodata_threads",
+                "repodata_processes",
                 "fetch_threads",
                 "experimental",
             ),
@@ -1114,6 +1120,7 @@ class Context(Configuration):
                 "default_threads",
             ),
             "Network Configuration": (
+                "background_repodata_refresh",
                 "client_ssl_cert",
                 "client_ssl_cert_key",
                 "local_repodata_ttl",
@@ -1135,6 +1142,8 @@ class Context(Configuration):
                 "pinned_packages",
                 "pip_interop_enabled",
                 "track_features",
+                "solve_cache",
+                "solve_time_budget_secs",
                 "solver",
             ),
             "Package Linking and Install-time Configuration": (
@@ -1296,6 +1305,16 @@ class Context(Configuration):
                 it for one level.
                 """
             ),
+            background_repodata_refresh=dals(
+                """
+                Solve against expired cached repodata right away and update the cache
+                in the background, instead of waiting for the server. If a solve
+                against expired repodata fails, the repodata is updated and the solve
+                is retried. Conda does not wait for the update when it exits; an
+                unfinished update is done again later. Has no effect offline, with
+                local channels or without a cache.
+                """
+            ),
             bld_path=dals(
                 """
                 The location where conda-build will put built packages. Same as 'croot', but
@@ -1602,6 +1621,14 @@ class Context(Configuration):
                 a response.
                 """
             ),
+            repodata_processes=dals(
+                """
+                Worker processes to use when parsing and indexing the repodata of
+                several subdirs that have no up-to-date index cache. Parsing is CPU
+                bound, so unlike threads, processes parse subdirs in parallel. The
+                default of 0, or 1, parses repodata in the conda process itself.
+                """
+            ),
             repodata_threads=dals(
                 """
                 Threads to use when downloading and reading repodata.  When not set,
@@ -1737,6 +1764,22 @@ class Context(Configuration):
                 longer the generation of the unsat hint will take. Defaults to 3.
                 """
             ),
+            solve_cache=dals(
+                """
+                Store the result of each solve, keyed by the requested specs, the state
+                of the prefix, solver settings and the version of the repodata of every
+                channel subdir, and reuse it instead of solving again when all of these
+                are unchanged.
+                """
+            ),
+            solve_time_budget_secs=dals(
+                """
+                Seconds a solve with the classic solver may spend optimizing its
+                solution. When they run out, each remaining optimization step keeps the
+                best solution found so far, and a warning says the result may not be
+                optimal. 0 means no limit.
+                """
+            ),
             solver=dals(
                 """
                 A string to choose between the different solver logics implemented in
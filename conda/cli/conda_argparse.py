@@ -46,6 +46,7 @@ BUILTIN_COMMANDS = {
     "compare",
     "config",
     "create",
+    "index-cache",
     "info",
     "init",
     "install",
@@ -93,6 +94,7 @@ def generate_parser():
     configure_parser_compare(sub_parsers)
     configure_parser_config(sub_parsers)
     configure_parser_create(sub_parsers)
+    configure_parser_index_cache(sub_parsers)
     configure_parser_info(sub_parsers)
     configure_parser_init(sub_parsers)
     configure_parser_install(sub_parsers)
@@ -442,6 +444,67 @@ def configure_parser_clean(sub_parsers):
     p.set_defaults(func=".main_clean.execute")
 
 
+def configure_parser_index_cache(sub_parsers):
+    descr = "Manage the cached repodata of channels."
+    p = sub_parsers.add_parser(
+        "index-cache",
+        description=descr,
+        help=descr,
+    )
+    index_cache_subparsers = p.add_subparsers(
+        metavar="action",
+        dest="index_cache_action",
+        required=True,
+    )
+
+    warm_help = "Download and index repodata ahead of other conda commands."
+    warm_descr = dals(
+        f"""
+        {warm_help}
+
+        Fetches the repodata of every configured channel and subdir, checking
+        expired caches with the server, and indexes it in the package cache, so
+        that other conda commands can use it without waiting for the network
+        or parsing repodata.json. Run once, e.g. from cron, or keep running
+        with --interval.
+        """
+    )
+    example = dals(
+        """
+        Examples::
+
+            conda index-cache warm
+
+            conda index-cache warm -c conda-forge --interval 300
+
+        """
+    )
+    warm = index_cache_subparsers.add_parser(
+        "warm",
+        description=warm_descr,
+        help=warm_help,
+        epilog=example,
+    )
+    add_parser_channels(warm)
+    warm.add_argument(
+        "--subdir",
+        "--platform",
+        action="store",
+        dest="subdir",
+        help="Warm the given subdir and noarch, e.g. 'linux-64', instead of the "
+        "configured subdirs.",
+        default=NULL,
+    )
+    warm.add_argument(
+        "--interval",
+        type=float,
+        metavar="SECONDS",
+        help="Keep running, warming the cache again every SECONDS seconds.",
+    )
+    add_parser_json(warm)
+    warm.set_defaults(func=".main_index_cache.execute")
+
+
 def configure_parser_info(sub_parsers):
     help = "Display information about current conda install."
 
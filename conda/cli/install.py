@@ -34,7 +34,7 @@ from ..gateways.disk.delete import delete_trash, path_is_clean
 from ..misc import clone_env, explicit, touch_nonadmin
 from ..models.match_spec import MatchSpec
 from ..plan import revert_actions
-from ..resolve import ResolvePackageNotFound
+from ..resolve import ResolvePackageNotFound, reuse_clauses
 from . import common
 from .common import check_non_admin
 
@@ -117,6 +117,8 @@ def get_revision(arg, json=False):
         raise CondaValueError("expected revision number, not: '%s'" % arg, json)
 
 
+# retries with other repodata, or unfrozen, share the clauses of equal indexes
+@reuse_clauses()
 def install(args, parser, command="install"):
     """Logic for `conda install`, `conda update`, and `conda create`."""
     context.validate_configuration()
@@ -0,0 +1,83 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+"""CLI implementation for `conda index-cache`.
+
+Keeps the repodata cache (`pkgs/cache`) of the configured channels fresh and
+indexed, e.g. on shared build hosts running many short-lived conda commands.
+"""
+from __future__ import annotations
+
+import time
+from argparse import ArgumentParser, Namespace
+from logging import getLogger
+
+from ..base.constants import REPODATA_FN
+from ..base.context import context
+from ..common.io import dashlist
+from ..core.index import check_allowlist
+from ..core.subdir_data import SubdirData
+from ..models.channel import Channel, all_channel_urls
+from .common import stdout_json
+
+log = getLogger(__name__)
+
+
+def warm_index_cache(repodata_fns: list[str]) -> list[dict]:
+    """
+    Fetch and index the repodata of every configured channel and subdir.
+
+    :return: one result per repodata file, with either ``updated`` (whether
+        new repodata was downloaded) or ``error``.
+    """
+    channel_urls = all_channel_urls(context.channels, subdirs=context.subdirs)
+    if context.offline:
+        ignored_urls = [url for url in channel_urls if not url.startswith("file://")]
+        if ignored_urls:
+            log.info(
+                "Ignoring the following channel urls because mode is offline.%s",
+                dashlist(ignored_urls),
+            )
+        channel_urls = [url for url in channel_urls if url.startswith("file://")]
+    check_allowlist(channel_urls)
+
+    subdir_datas = [
+        SubdirData(Channel(url), repodata_fn=repodata_fn)
+        for repodata_fn in repodata_fns
+        for url in channel_urls
+    ]
+    results = []
+    for subdir_data, updated in zip(
+        subdir_datas, SubdirData.update_caches(subdir_datas)
+    ):
+        result = {"url": subdir_data.url_w_repodata_fn}
+        if isinstance(updated, Exception):
+            result["error"] = str(updated)
+        else:
+            result["updated"] = updated
+        results.append(result)
+    return results
+
+
+def _print_results(results: list[dict]) -> None:
+    if context.json:
+        stdout_json(results)
+        return
+    for result in results:
+        if "error" in result:
+            status = f"failed: {result['error']}"
+        else:
+            status = "updated" if result["updated"] else "current"
+        print(f"{result['url']}: {status}")
+
+
+def execute(args: Namespace, parser: ArgumentParser) -> int:
+    repodata_fns = list(args.repodata_fns or context.repodata_fns)
+    if REPODATA_FN not in repodata_fns:
+        repodata_fns.append(REPODATA_FN)
+
+    while True:
+        results = warm_index_cache(repodata_fns)
+        _print_results(results)
+        if not args.interval:
+            return 1 if any("error" in result for result in results) else 0
+        time.sleep(args.interval)
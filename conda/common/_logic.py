@@ -2,8 +2,13 @@
 # SPDX-License-Identifier: BSD-3-Clause
 import sys
 from array import array
+from functools import lru_cache
+from importlib.util import find_spec
 from itertools import combinations
 from logging import DEBUG, getLogger
+from multiprocessing import get_context
+from multiprocessing.connection import wait
+from time import monotonic
 
 log = getLogger(__name__)
 
@@ -45,6 +50,10 @@ class _ClauseList:
         """Return clauses as a list of tuples of ints."""
         return self._clause_list
 
+    def as_list_since(self, saved_state):
+        """Return clauses added after the state has been saved."""
+        return self._clause_list[saved_state:]
+
     def as_array(self):
         """Return clauses as a flat int array, each clause being terminated by 0."""
         clause_array = array("i")
@@ -53,6 +62,12 @@ class _ClauseList:
             clause_array.append(0)
         return clause_array
 
+    def copy(self):
+        """Return an independent copy of the stored clauses."""
+        other = _ClauseList()
+        other.extend(self._clause_list)
+        return other
+
 
 class _ClauseArray:
     """
@@ -97,30 +112,64 @@ class _ClauseArray:
         Restore state saved via `save_state`.
         Removes clauses that were added after the state has been saved.
         """
-        len_clause_array = saved_state
-        self._clause_array[len_clause_array:] = array("i")
+        del self._clause_array[saved_state:]
+
+    #: Number of ints copied from the array at a time to split into clauses.
+    _chunk_size = 1 << 14
+
+    def _iter_clauses(self, start=0):
+        # copy the array a chunk at a time, and split each chunk with
+        # tuple.index instead of a Python-level loop per int
+        clause_array = self._clause_array
+        chunk_size = self._chunk_size
+        while start < len(clause_array):
+            values = tuple(clause_array[start : start + chunk_size])
+            index = values.index
+            end = -1
+            try:
+                while True:
+                    begin, end = end + 1, index(0, end + 1)
+                    yield values[begin:end]
+            except ValueError:
+                pass
+            if end < 0:
+                # no clause ends in this chunk
+                chunk_size *= 2
+            start += end + 1
 
     def as_list(self):
-        """Return clauses as a list of tuples of ints."""
-        clause = []
-        for v in self._clause_array:
-            if v == 0:
-                yield tuple(clause)
-                clause.clear()
-            else:
-                clause.append(v)
+        """Return clauses as an iterator of tuples of ints."""
+        return self._iter_clauses()
+
+    def as_list_since(self, saved_state):
+        """Return clauses added after the state has been saved."""
+        return list(self._iter_clauses(saved_state))
 
     def as_array(self):
         """Return clauses as a flat int array, each clause being terminated by 0."""
         return self._clause_array
 
+    def copy(self):
+        """Return an independent copy of the stored clauses."""
+        other = _ClauseArray()
+        other._array_extend(self._clause_array)
+        return other
+
 
 class _SatSolver:
     """Simple wrapper to call a SAT solver given a _ClauseList/_ClauseArray instance."""
 
+    #: Whether ``run`` accepts ``assumptions``, literals that hold for one run
+    #: only, instead of temporary unit clauses.
+    incremental = False
+
+    #: How the clauses are stored: as tuples, which pycosat and pysat read
+    #: as they are, or as a flat int array for backends that take the array.
+    clauses_class = _ClauseList
+
     def __init__(self, **run_kwargs):
         self._run_kwargs = run_kwargs or {}
-        self._clauses = _ClauseList()
+        self._clauses = self.clauses_class()
         # Bind some methods of _clauses to reduce lookups and call overhead.
         self.add_clause = self._clauses.append
         self.add_clauses = self._clauses.extend
@@ -129,7 +178,8 @@ class _SatSolver:
         return self._clauses.get_clause_count()
 
     def as_list(self):
-        return self._clauses.as_list()
+        clauses = self._clauses.as_list()
+        return clauses if isinstance(clauses, list) else list(clauses)
 
     def save_state(self):
         return self._clauses.save_state()
@@ -137,6 +187,14 @@ class _SatSolver:
     def restore_state(self, saved_state):
         return self._clauses.restore_state(saved_state)
 
+    def copy(self):
+        """Return a new solver of the same type, with a copy of the clauses."""
+        other = type(self)(**self._run_kwargs)
+        other._clauses = self._clauses.copy()
+        other.add_clause = other._clauses.append
+        other.add_clauses = other._clauses.extend
+        return other
+
     def run(self, m, **kwargs):
         run_kwargs = self._run_kwargs.copy()
         run_kwargs.update(kwargs)
@@ -162,15 +220,15 @@ class _SatSolver:
 
 
 class _PycoSatSolver(_SatSolver):
+    # pycosat only takes an iterable of clauses, so it keeps tuples: feeding it
+    # the array, even through C-level iterators, doubles the time it takes to
+    # load the clauses on every run
     def setup(self, m, limit=0, **kwargs):
         from pycosat import itersolve
 
         # NOTE: The iterative solving isn't actually used here, we just call
         #       itersolve to separate setup from the actual run.
         return itersolve(self._clauses.as_list(), vars=m, prop_limit=limit)
-        # If we add support for passing the clauses as an integer stream to the
-        # solvers, we could also use self._clauses.as_array like this:
-        # return itersolve(self._clauses.as_array(), vars=m, prop_limit=limit)
 
     def invoke(self, iter_sol):
         try:
@@ -187,11 +245,14 @@ class _PycoSatSolver(_SatSolver):
 
 
 class _PyCryptoSatSolver(_SatSolver):
+    clauses_class = _ClauseArray
+
     def setup(self, m, threads=1, **kwargs):
         from pycryptosat import Solver
 
         solver = Solver(threads=threads)
-        solver.add_clauses(self._clauses.as_list())
+        # a flat, 0-terminated int buffer is read without conversion
+        solver.add_clauses(self._clauses.as_array())
         return solver
 
     def invoke(self, solver):
@@ -232,10 +293,274 @@ class _PySatSolver(_SatSolver):
         return solution
 
 
+class _PySatIncrementalSolver(_SatSolver):
+    """
+    Keep one pysat solver, and what it has learned, across runs.
+
+    Clauses are loaded into the solver once. Clauses added since the previous
+    run may be temporary (see ``save_state``/``restore_state``), so they are
+    added guarded by a selector variable that is assumed for the run: if they
+    are still there at the next run, the selector is fixed to true, otherwise
+    to false, which disables them. The solver is rebuilt if clauses it already
+    holds unguarded are removed.
+    """
+
+    incremental = True
+
+    def __init__(self, **run_kwargs):
+        super().__init__(**run_kwargs)
+        self._solver = None
+        self._committed = self._restored = 0
+
+    def restore_state(self, saved_state):
+        self._restored = min(self._restored, saved_state)
+        return super().restore_state(saved_state)
+
+    def _rebuild(self, m):
+        from pysat.solvers import Glucose4
+
+        if self._solver is not None:
+            self._solver.delete()
+        self._solver = Glucose4(bootstrap_with=self._clauses.as_list())
+        # clauses up to this state are in the solver, unguarded
+        self._committed = self._clauses.save_state()
+        # (state after the guarded clauses, selector) of the last run
+        self._guarded = None
+        # lowest state restored since the last run
+        self._restored = self._committed
+        # selectors are numbered well past the variables in use; rebuild once
+        # the variables catch up
+        self._selector_base = self._next_selector = 2 * m + 1024
+
+    def setup(self, m, assumptions=(), **kwargs):
+        assumptions = list(assumptions)
+        if (
+            self._solver is None
+            or m >= self._selector_base
+            or self._restored < self._committed
+        ):
+            self._rebuild(m)
+            return self._solver, assumptions, m
+
+        solver = self._solver
+        if self._guarded:
+            state, selector = self._guarded
+            self._guarded = None
+            if self._restored >= state:
+                solver.add_clause([selector])
+                self._committed = state
+            else:
+                solver.add_clause([-selector])
+        state = self._clauses.save_state()
+        self._restored = state
+        if state != self._committed:
+            selector = self._next_selector
+            self._next_selector += 1
+            for clause in self._clauses.as_list_since(self._committed):
+                solver.add_clause([*clause, -selector])
+            self._guarded = (state, selector)
+            assumptions.append(selector)
+        return solver, assumptions, m
+
+    def invoke(self, setup):
+        solver, assumptions, m = setup
+        if not solver.solve(assumptions=assumptions):
+            return None
+        return [lit for lit in solver.get_model() if abs(lit) <= m]
+
+    def process_solution(self, sat_solution):
+        return sat_solution
+
+
+def _portfolio_worker(conn, sat_solver_str):
+    """
+    Solve the problems received on ``conn`` with one backend. The clauses are
+    kept between problems; each job says how many ints of them to keep, and
+    has the clauses to add after those.
+    """
+    sat_solver_cls = _sat_solver_str_to_cls[sat_solver_str]
+    clauses = _ClauseArray()
+    while True:
+        try:
+            keep, clause_bytes, m, limit = conn.recv()
+        except EOFError:
+            return
+        clauses.restore_state(keep)
+        clauses._clause_array.frombytes(clause_bytes)
+        sat_solver = sat_solver_cls()
+        if sat_solver.clauses_class is _ClauseArray:
+            sat_solver._clauses = clauses
+        else:
+            sat_solver.add_clauses(clauses.as_list())
+        # (True, solution), where None is UNSAT, or (False, error)
+        try:
+            reply = True, sat_solver.run(m, limit=limit)
+        except Exception as e:
+            reply = False, e
+        conn.send(reply)
+
+
+class _PortfolioWorker:
+    """A process running one SAT backend; restarted when cancelled."""
+
+    def __init__(self, sat_solver_str):
+        self.sat_solver_str = sat_solver_str
+        self.process = self.conn = None
+        # token of the _PortfolioSolver whose clauses the process holds
+        self.owner = None
+
+    def start(self):
+        # spawn; forking while other threads hold locks is unsafe
+        ctx = get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_portfolio_worker,
+            args=(child_conn, self.sat_solver_str),
+            name=f"conda-sat-{self.sat_solver_str}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.conn.close()
+        self.process = self.conn = None
+        self.owner = None
+
+    def cancel(self):
+        """Stop solving, and start a new process for the next problem now."""
+        self.stop()
+        self.start()
+
+    def submit(self, owner, keep, clause_array, m, limit):
+        """
+        Solve the clause array of the solver with token ``owner``; the process
+        holds its first ``keep`` ints if it last solved for that solver.
+        """
+        if self.process is None or not self.process.is_alive():
+            self.stop()
+            self.start()
+        if self.owner is not owner:
+            keep = 0
+        self.conn.send((keep, clause_array[keep:].tobytes(), m, limit))
+        self.owner = owner
+
+
+class _PortfolioSolver(_SatSolver):
+    """
+    Run each problem on all installed backends, each in its own process, and
+    take the first answer.
+
+    The workers keep the clauses of the last problem, so that only the
+    clauses changed since then are sent to them. Backends that are still
+    running when another one has answered are cancelled right away by
+    restarting their process. Small problems are solved in this process with
+    the first backend, since they take less time than passing them to the
+    workers.
+    """
+
+    # sent to the workers as the bytes of the array
+    clauses_class = _ClauseArray
+
+    #: Problems with fewer clauses are not worth a round trip to the workers.
+    min_clauses = 20000
+
+    _workers = {}  # dict[str, _PortfolioWorker], shared by all instances
+
+    def __init__(self, **run_kwargs):
+        super().__init__(**run_kwargs)
+        self._token = object()
+        # per worker, the length of the start of the clause array that it holds
+        # unchanged
+        self._synced = {}  # dict[str, int]
+
+    def restore_state(self, saved_state):
+        for sat_solver_str, synced in self._synced.items():
+            self._synced[sat_solver_str] = min(synced, saved_state)
+        return super().restore_state(saved_state)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def backends():
+        """Names of the installed backends, in order of preference."""
+        return tuple(
+            sat_solver_str
+            for sat_solver_str, module in (
+                ("pycosat", "pycosat"),
+                ("pycryptosat", "pycryptosat"),
+                ("pysat", "pysat"),
+            )
+            if find_spec(module)
+        )
+
+    def setup(self, m, limit=0, **kwargs):
+        return m, limit
+
+    def invoke(self, setup):
+        m, limit = setup
+        backends = self.backends()
+        if not backends:
+            raise ImportError("No SAT solver backend is installed.")
+        if len(backends) == 1 or self.get_clause_count() < self.min_clauses:
+            return self._run_in_process(backends[0], m, limit)
+
+        clause_array = self._clauses.as_array()
+        pending = {}
+        for sat_solver_str in backends:
+            worker = self._workers.get(sat_solver_str)
+            if worker is None:
+                worker = self._workers[sat_solver_str] = _PortfolioWorker(
+                    sat_solver_str
+                )
+            worker.submit(
+                self._token, self._synced.get(sat_solver_str, 0), clause_array, m, limit
+            )
+            self._synced[sat_solver_str] = len(clause_array)
+            pending[worker.conn] = worker
+
+        answered = False
+        solution = None
+        while pending and not answered:
+            for conn in wait(list(pending)):
+                worker = pending.pop(conn)
+                try:
+                    ok, answer = conn.recv()
+                except (EOFError, OSError) as e:
+                    ok, answer = False, e
+                    worker.stop()
+                if not ok:
+                    log.debug(
+                        "SAT backend %s failed: %r", worker.sat_solver_str, answer
+                    )
+                elif not answered:
+                    log.debug("SAT answer from %s", worker.sat_solver_str)
+                    answered = True
+                    solution = answer
+        for worker in pending.values():
+            worker.cancel()
+        if answered:
+            return solution
+        log.debug("All SAT worker processes failed, solving in-process")
+        return self._run_in_process(backends[0], m, limit)
+
+    def _run_in_process(self, sat_solver_str, m, limit):
+        sat_solver = _sat_solver_str_to_cls[sat_solver_str]()
+        sat_solver._clauses = self._clauses
+        return sat_solver.run(m, limit=limit)
+
+    def process_solution(self, sat_solution):
+        return sat_solution
+
+
 _sat_solver_str_to_cls = {
     "pycosat": _PycoSatSolver,
     "pycryptosat": _PyCryptoSatSolver,
     "pysat": _PySatSolver,
+    "pysat-incremental": _PySatIncrementalSolver,
+    "portfolio": _PortfolioSolver,
 }
 
 _sat_solver_cls_to_str = {cls: string for string, cls in _sat_solver_str_to_cls.items()}
@@ -249,6 +574,10 @@ class Clauses:
     def __init__(self, m=0, sat_solver_str=_sat_solver_cls_to_str[_PycoSatSolver]):
         self.unsat = False
         self.m = m
+        # time.monotonic() after which minimize stops improving its solution
+        self.deadline = None
+        # whether minimize returned a solution that may not be optimal
+        self.timed_out = False
 
         try:
             sat_solver_cls = _sat_solver_str_to_cls[sat_solver_str]
@@ -263,6 +592,15 @@ class Clauses:
     def get_clause_count(self):
         return self._sat_solver.get_clause_count()
 
+    def copy(self):
+        """Return an independent copy; the copy's deadline is not set."""
+        other = Clauses(self.m, _sat_solver_cls_to_str[type(self._sat_solver)])
+        other.unsat = self.unsat
+        other._sat_solver = self._sat_solver.copy()
+        other.add_clause = other._sat_solver.add_clause
+        other.add_clauses = other._sat_solver.add_clauses
+        return other
+
     def as_list(self):
         return self._sat_solver.as_list()
 
@@ -608,9 +946,11 @@ class Clauses:
             res = self.Combine((res, prune), polarity)
         return res
 
-    def _run_sat(self, m, limit=0):
+    def _run_sat(self, m, limit=0, assumptions=()):
         if log.isEnabledFor(DEBUG):
             log.debug("Invoking SAT with clause count: %s", self.get_clause_count())
+        if assumptions:
+            return self._sat_solver.run(m, limit=limit, assumptions=assumptions)
         solution = self._sat_solver.run(m, limit=limit)
         return solution
 
@@ -627,6 +967,7 @@ class Clauses:
         if not self.m:
             return []
         saved_state = self._sat_solver.save_state()
+        assumptions = ()
         if additional:
 
             def preproc(eqs):
@@ -650,8 +991,15 @@ class Clauses:
             if additional:
                 if not additional[-1]:
                     return None
-                self.add_clauses(additional)
-        solution = self._run_sat(self.m, limit=limit)
+                if self._sat_solver.incremental:
+                    # pass unit clauses, e.g. spec constraints, as assumptions
+                    assumptions = [cc[0] for cc in additional if len(cc) == 1]
+                    additional = [cc for cc in additional if len(cc) != 1]
+                if additional:
+                    self.add_clauses(additional)
+        solution = self._run_sat(self.m, limit=limit, assumptions=assumptions)
+        if solution is not None and includeIf and assumptions:
+            self.add_clauses((lit,) for lit in assumptions)
         if additional and (solution is None or not includeIf):
             self._sat_solver.restore_state(saved_state)
         return solution
@@ -662,6 +1010,9 @@ class Clauses:
         zip(coeffs, lits).
         The actual minimization is multiobjective: first, we minimize the
         largest active coefficient value, then we minimize the sum.
+
+        Once ``self.deadline`` has passed, the best solution found so far is
+        returned and ``self.timed_out`` is set.
         """
         if bestsol is None or len(bestsol) < self.m:
             log.debug("Clauses added, recomputing solution")
@@ -708,6 +1059,10 @@ class Clauses:
 
             log.trace("Initial range (%d,%d)" % (lo, hi))
             while True:
+                if self.deadline is not None and monotonic() > self.deadline:
+                    log.debug("Time budget exhausted, range=(%d,%d)" % (lo, hi))
+                    self.timed_out = True
+                    return bestsol, sum_val(bestsol, objective_dict)
                 if try0 is None:
                     mid = (lo + hi) // 2
                 else:
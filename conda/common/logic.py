@@ -43,6 +43,8 @@ FALSE = FALSE
 PycoSatSolver = "pycosat"
 PyCryptoSatSolver = "pycryptosat"
 PySatSolver = "pysat"
+PySatIncrementalSolver = "pysat-incremental"
+PortfolioSolver = "portfolio"
 
 
 class Clauses:
@@ -59,9 +61,29 @@ class Clauses:
     def unsat(self):
         return self._clauses.unsat
 
+    @property
+    def deadline(self):
+        return self._clauses.deadline
+
+    @deadline.setter
+    def deadline(self, deadline):
+        self._clauses.deadline = deadline
+
+    @property
+    def timed_out(self):
+        return self._clauses.timed_out
+
     def get_clause_count(self):
         return self._clauses.get_clause_count()
 
+    def copy(self):
+        """Return a copy with the same variables, names and clauses."""
+        other = Clauses.__new__(Clauses)
+        other.names = self.names.copy()
+        other.indices = self.indices.copy()
+        other._clauses = self._clauses.copy()
+        return other
+
     def as_list(self):
         return self._clauses.as_list()
 
@@ -268,6 +290,10 @@ class Clauses:
         return self._clauses.minimize(literals, coeffs, bestsol=bestsol, trymax=trymax)
 
 
+#: Smallest number of specs that minimal_unsatisfiable_subset() bisects.
+_MIN_BISECT_CHUNK = 8
+
+
 def minimal_unsatisfiable_subset(clauses, sat, explicit_specs):
     """
     Given a set of clauses, find a minimal unsatisfiable subset (an
@@ -283,6 +309,12 @@ def minimal_unsatisfiable_subset(clauses, sat, explicit_specs):
     the order False < True), that is, any function where (A <= B) iff (sat(B)
     <= sat(A)), where A <= B means A is a subset of B and False < True).
 
+    Specs are added to the working set a chunk at a time; a chunk that does
+    not fit is split in halves, so that k conflicting specs out of n take on
+    the order of k * log2(n / k) calls to sat instead of n. Chunks of fewer
+    than _MIN_BISECT_CHUNK specs are added one spec at a time, since bisecting
+    them can take more calls than that. The result is the same as adding the
+    specs one at a time, in order.
     """
     working_set = set()
     found_conflicts = set()
@@ -293,20 +325,32 @@ def minimal_unsatisfiable_subset(clauses, sat, explicit_specs):
         # we succeeded, so we'll add the spec to our future constraints
         working_set = set(explicit_specs)
 
-    for spec in set(clauses) - working_set:
-        if (
-            sat(
-                working_set
-                | {
-                    spec,
-                },
-                True,
-            )
-            is None
-        ):
-            found_conflicts.add(spec)
+    def add(chunk, fits=None):
+        if 1 < len(chunk) < _MIN_BISECT_CHUNK:
+            count = len(working_set)
+            for i, spec in enumerate(chunk, 1):
+                # if all the others were added, the last one is known not to fit
+                last_fits = None
+                if fits is False and i == len(chunk) == len(working_set) - count + 1:
+                    last_fits = False
+                add((spec,), last_fits)
+            return
+        if fits is None:
+            fits = sat(working_set.union(chunk), True) is not None
+        if fits:
+            # we succeeded, so we'll add the specs to our future constraints
+            working_set.update(chunk)
+        elif len(chunk) == 1:
+            found_conflicts.update(chunk)
         else:
-            # we succeeded, so we'll add the spec to our future constraints
-            working_set.add(spec)
+            half = len(chunk) // 2
+            count = len(working_set)
+            add(chunk[:half])
+            # if all of the first half was added, the second half cannot be
+            add(chunk[half:], False if len(working_set) - count == half else None)
+
+    remaining = [spec for spec in dict.fromkeys(clauses) if spec not in working_set]
+    if remaining:
+        add(remaining)
 
     return found_conflicts
@@ -0,0 +1,136 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Solve many sets of specs against one index.
+
+``BatchSolver`` loads the repodata of its channels and builds one ``Resolve``
+for all of it, so that every solve shares the parsed records, the grouping
+and sorting of ``Resolve`` and its caches. Solves can run in forked worker
+processes, which share the prepared ``Resolve`` copy-on-write.
+"""
+from __future__ import annotations
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger
+from multiprocessing import get_all_start_methods, get_context
+from typing import Iterable
+
+from .. import CondaError
+from ..base.constants import REPODATA_FN
+from ..base.context import context
+from ..common.io import time_recorder
+from ..models.channel import Channel
+from ..models.match_spec import MatchSpec
+from ..models.prefix_graph import PrefixGraph
+from ..models.records import PackageRecord
+from ..resolve import Resolve, reuse_clauses
+from .index import _supplement_index_with_system
+from .subdir_data import SubdirData, make_feature_record
+
+log = getLogger(__name__)
+
+# the Resolve that forked workers solve with, set while a pool is running
+_worker_resolve = None
+
+
+class BatchSolver:
+    """Solves sets of specs for new environments with a shared index."""
+
+    def __init__(
+        self,
+        channels: Iterable[Channel | str] = (),
+        subdirs: Iterable[str] = (),
+        repodata_fn: str = REPODATA_FN,
+    ):
+        self.channels = tuple(Channel(c) for c in channels or context.channels)
+        self.subdirs = tuple(subdirs or context.subdirs)
+        self.repodata_fn = repodata_fn
+        self._resolve = None
+
+    @property
+    def resolve(self) -> Resolve:
+        """The ``Resolve`` of all records of the channels; built on first use."""
+        if self._resolve is None:
+            self._resolve = Resolve(self._get_index(), channels=self.channels)
+        return self._resolve
+
+    @time_recorder(module_name=__name__)
+    def _get_index(self) -> dict[PackageRecord, PackageRecord]:
+        subdir_datas = SubdirData.prepare_all(
+            self.channels, self.subdirs, self.repodata_fn
+        )
+        index = {
+            prec: prec
+            for subdir_data in subdir_datas
+            for prec in subdir_data.iter_records()
+        }
+
+        # add feature records for the solver, as get_reduced_index() does
+        known_features = set(context.track_features)
+        for prec in index:
+            known_features.update((*prec.track_features, *prec.features))
+        for feature in known_features:
+            prec = make_feature_record(feature)
+            index[prec] = prec
+
+        _supplement_index_with_system(index)
+        return index
+
+    def solve(
+        self, specs_list: Iterable[Iterable[MatchSpec | str]], max_workers: int = 1
+    ) -> list[tuple[PackageRecord, ...] | Exception]:
+        """
+        Solve each set of specs in ``specs_list`` for an empty environment.
+
+        :param max_workers: number of processes to solve in; more than one
+            needs the ``fork`` start method, otherwise the sets are solved in
+            this process.
+        :return: for each set of specs, in order, the records of its solution
+            in dependency order, or the exception that solving it raised.
+        """
+        specs_list = [tuple(MatchSpec(spec) for spec in specs) for specs in specs_list]
+        resolve = self.resolve
+
+        if max_workers > 1 and len(specs_list) > 1:
+            if "fork" in get_all_start_methods():
+                return self._solve_forked(specs_list, max_workers)
+            log.debug("Cannot fork worker processes, solving in this process")
+        # sets of specs with the same reduced index share its clauses
+        with reuse_clauses():
+            return [_solve_specs(resolve, specs) for specs in specs_list]
+
+    def _solve_forked(self, specs_list, max_workers):
+        global _worker_resolve
+
+        _worker_resolve = self.resolve
+        # prepare_all() has joined its fetch threads, but background refreshes
+        # may still run; a fork must not copy their locks mid-update
+        SubdirData.wait_for_refreshes()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(max_workers, len(specs_list)),
+                mp_context=get_context("fork"),
+            ) as executor:
+                return list(executor.map(_solve_in_worker, specs_list))
+        finally:
+            _worker_resolve = None
+
+
+def _solve_specs(resolve, specs):
+    try:
+        return tuple(PrefixGraph(resolve.solve(specs)).graph)
+    except Exception as e:
+        log.debug("Solving %s failed", specs, exc_info=True)
+        return e
+
+
+def _solve_in_worker(specs):
+    result = _solve_specs(_worker_resolve, specs)
+    if isinstance(result, Exception):
+        # the result is pickled to the parent; not all errors can be rebuilt
+        try:
+            pickle.loads(pickle.dumps(result))
+        except Exception:
+            result = CondaError(str(result))
+    return result
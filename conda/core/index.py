@@ -11,7 +11,7 @@ except ImportError:  # pragma: no cover
     from .._vendor.boltons.setutils import IndexedSet
 
 from ..base.context import context
-from ..common.io import ThreadLimitedThreadPoolExecutor, time_recorder
+from ..common.io import time_recorder
 from ..deprecations import deprecated
 from ..exceptions import ChannelNotAllowed, InvalidSpec, PluginError
 from ..gateways.logging import initialize_logging
@@ -92,12 +92,13 @@ def fetch_index(
 ):
     log.debug("channel_urls=" + repr(channel_urls))
     index = {}
-    with ThreadLimitedThreadPoolExecutor() as executor:
-        subdir_instantiator = lambda url: SubdirData(
-            Channel(url), repodata_fn=repodata_fn
-        )
-        for f in executor.map(subdir_instantiator, channel_urls):
-            index.update((rec, rec) for rec in f.iter_records())
+    subdir_datas = [
+        SubdirData(Channel(url), repodata_fn=repodata_fn) for url in channel_urls
+    ]
+    SubdirData.fetch_all(subdir_datas)
+    SubdirData.index_all(subdir_datas)
+    for subdir_data in subdir_datas:
+        index.update((rec, rec) for rec in subdir_data.iter_records())
     return index
 
 
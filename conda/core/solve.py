@@ -28,6 +28,7 @@ from ..common.path import get_major_minor_version, paths_equal
 from ..deprecations import deprecated
 from ..exceptions import (
     PackagesNotFoundError,
+    ResolvePackageNotFound,
     SpecsConfigurationConflictError,
     UnsatisfiableError,
 )
@@ -41,6 +42,7 @@ from ..resolve import Resolve
 from .index import _supplement_index_with_system, get_reduced_index
 from .link import PrefixSetup, UnlinkLinkTransaction
 from .prefix_data import PrefixData
+from .solve_cache import SolveCache, fingerprint
 from .subdir_data import SubdirData
 
 log = getLogger(__name__)
@@ -211,14 +213,30 @@ class Solver:
                 dependency order from roots to leaves.
 
         """
-        final_precs = self.solve_final_state(
-            update_modifier,
-            deps_modifier,
-            prune,
-            ignore_pinned,
-            force_remove,
-            should_retry_solve,
-        )
+        try:
+            final_precs = self.solve_final_state(
+                update_modifier,
+                deps_modifier,
+                prune,
+                ignore_pinned,
+                force_remove,
+                should_retry_solve,
+            )
+        except (ResolvePackageNotFound, PackagesNotFoundError, UnsatisfiableError):
+            # with context.background_repodata_refresh, the solve may have used
+            # expired repodata; if it has changed since, solve once more
+            if not SubdirData.refresh_stale():
+                raise
+            log.info("Retrying the solve with updated repodata.")
+            self._reset_index()
+            final_precs = self.solve_final_state(
+                update_modifier,
+                deps_modifier,
+                prune,
+                ignore_pinned,
+                force_remove,
+                should_retry_solve,
+            )
         unlink_precs, link_precs = diff_for_unlink_link_precs(
             self.prefix, final_precs, self.specs_to_add, force_reinstall
         )
@@ -348,13 +366,20 @@ class Solver:
                 # Return early, with a solution that should just be PrefixData().iter_records()
                 return IndexedSet(PrefixGraph(ssc.solution_precs).graph)
 
+        cache_key = cached = None
         if not ssc.r:
             with Spinner(
                 "Collecting package metadata (%s)" % self._repodata_fn,
                 (not context.verbosity and not context.quiet and not retrying),
                 context.json,
             ):
-                ssc = self._collect_all_metadata(ssc)
+                if context.solve_cache:
+                    cache_key, cached = self._load_cached_solution(ssc)
+                if cached is None:
+                    ssc = self._collect_all_metadata(ssc)
+            if cached is not None:
+                log.debug("Using the cached solution %s", cache_key)
+                return cached
 
         if should_retry_solve and update_modifier == UpdateModifier.FREEZE_INSTALLED:
             fail_message = (
@@ -424,9 +449,98 @@ class Solver:
             self.prefix,
             "\n    ".join(prec.dist_str() for prec in ssc.solution_precs),
         )
+        if cache_key:
+            SolveCache().put(cache_key, ssc.solution_precs, self.neutered_specs)
 
         return ssc.solution_precs
 
+    def _solve_cache_key(self, ssc, subdir_datas, virtual_precs):
+        """
+        Fingerprint of everything the solve depends on; None if the repodata of
+        a channel subdir cannot be identified.
+        """
+        repodata_versions = [sd.repodata_version for sd in subdir_datas]
+        if not all(repodata_versions):
+            return None
+        return fingerprint(
+            {
+                "conda": CONDA_VERSION,
+                "solver": f"{type(self).__module__}.{type(self).__qualname__}",
+                "repodata_fn": self._repodata_fn,
+                "repodata": repodata_versions,
+                "specs_to_add": sorted(map(str, self.specs_to_add)),
+                "specs_to_remove": sorted(map(str, self.specs_to_remove)),
+                "update_modifier": ssc.update_modifier,
+                "deps_modifier": ssc.deps_modifier,
+                "prune": ssc.prune,
+                "ignore_pinned": ssc.ignore_pinned,
+                "force_remove": ssc.force_remove,
+                "prefix_records": sorted(
+                    (prec.dist_str(), prec.subdir)
+                    for prec in ssc.prefix_data.iter_records()
+                ),
+                "history": sorted(map(str, ssc.specs_from_history_map.values())),
+                "pinned": sorted(map(str, ssc.pinned_specs)),
+                "virtual_packages": sorted(prec.dist_str() for prec in virtual_precs),
+                "is_conda_prefix": paths_equal(self.prefix, context.conda_prefix),
+                "context": {
+                    "add_pip_as_python_dependency": (
+                        context.add_pip_as_python_dependency
+                    ),
+                    "aggressive_update_packages": sorted(
+                        map(str, context.aggressive_update_packages)
+                    ),
+                    "auto_update_conda": context.auto_update_conda,
+                    "channel_priority": context.channel_priority,
+                    "solver_ignore_timestamps": context.solver_ignore_timestamps,
+                    "subdir": context.subdir,
+                    "track_features": sorted(context.track_features),
+                    "use_only_tar_bz2": context.use_only_tar_bz2,
+                },
+            }
+        )
+
+    def _load_cached_solution(self, ssc):
+        """
+        Look up the solution of an identical earlier solve.
+
+        :return: the solve cache key, or None if this solve cannot be cached,
+            and the cached solution, or None.
+        """
+        channels = IndexedSet(self.channels)
+        for spec in self.specs_to_add:
+            channel = spec.get_exact_value("channel")
+            if channel:
+                channels.add(Channel(channel))
+        subdir_datas = SubdirData.prepare_all(
+            channels, self.subdirs, self._repodata_fn
+        )
+        virtual_index = {}
+        _supplement_index_with_system(virtual_index)
+
+        cache_key = self._solve_cache_key(ssc, subdir_datas, virtual_index)
+        if not cache_key:
+            return None, None
+
+        by_subdir_url = {sd.channel.subdir_url: sd for sd in subdir_datas}
+
+        def find_record(ref):
+            subdir_data = by_subdir_url.get(ref["subdir_url"])
+            if subdir_data:
+                for prec in subdir_data.query(ref["name"]):
+                    if prec.dist_str() == ref["dist"]:
+                        return prec
+            for prec in chain(ssc.prefix_data.iter_records(), virtual_index):
+                if prec.dist_str() == ref["dist"]:
+                    return prec
+            return None
+
+        cached = SolveCache().get(cache_key, find_record)
+        if cached is None:
+            return cache_key, None
+        records, self.neutered_specs = cached
+        return cache_key, IndexedSet(PrefixGraph(records).graph)
+
     def determine_constricting_specs(self, spec, solution_precs):
         highest_version = [
             VersionOrder(sp.version) for sp in solution_precs if sp.name == spec.name
@@ -1255,6 +1369,13 @@ class Solver:
                     file=sys.stderr,
                 )
 
+    def _reset_index(self):
+        """Drop the index and Resolve of _prepare(), to load them again."""
+        self._index = self._r = None
+        self._prepared = False
+        if hasattr(self, "ssc"):
+            del self.ssc
+
     def _prepare(self, prepared_specs):
         # All of this _prepare() method is hidden away down here. Someday we may want to further
         # abstract away the use of `index` or the Resolve object.
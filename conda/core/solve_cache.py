@@ -0,0 +1,104 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Cache of solved environments.
+
+A solve is determined by its inputs: the requested specs, the records and
+history of the prefix, pins, virtual packages, solver configuration, and the
+repodata of every channel subdir. ``SolveCache`` stores the final records of a
+solve under a fingerprint of those inputs, so that the same request against
+the same repodata can skip building the index and running the solver.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from logging import getLogger
+from pathlib import Path
+from typing import Callable, Iterable
+
+from ..gateways.repodata import create_cache_dir
+from ..models.match_spec import MatchSpec
+from ..models.records import PackageRecord
+
+log = getLogger(__name__)
+
+#: Directory in the repodata cache directory that holds the cached solves.
+SOLVE_CACHE_DIR = "solves"
+
+
+def fingerprint(inputs: dict) -> str:
+    """Hash solver inputs; values that are not JSON types are hashed as ``str()``."""
+    text = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def record_ref(prec: PackageRecord) -> dict:
+    """What ``SolveCache.get()`` needs to find ``prec`` again."""
+    return {
+        "subdir_url": prec.channel.subdir_url if prec.channel.subdir else None,
+        "name": prec.name,
+        "dist": prec.dist_str(),
+    }
+
+
+class SolveCache:
+    """Final records of solves, keyed by ``fingerprint()`` of their inputs."""
+
+    def __init__(self, path: str | os.PathLike | None = None):
+        self.path = Path(path or Path(create_cache_dir(), SOLVE_CACHE_DIR))
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def get(
+        self, key: str, find_record: Callable[[dict], PackageRecord | None]
+    ) -> tuple[list[PackageRecord], tuple[MatchSpec, ...]] | None:
+        """
+        Records and neutered specs of a cached solve, or None.
+
+        :param find_record: look up a record from its ``record_ref()``; None if
+            it no longer exists, which makes the entry a miss.
+        """
+        try:
+            entry = json.loads(self._entry_path(key).read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.debug("Ignoring unreadable solve cache entry %s: %r", key, e)
+            return None
+
+        records = []
+        for ref in entry.get("records", ()):
+            prec = find_record(ref)
+            if prec is None:
+                log.debug("Solve cache entry %s refers to missing %s", key, ref)
+                return None
+            records.append(prec)
+        neutered_specs = tuple(MatchSpec(spec) for spec in entry["neutered_specs"])
+        return records, neutered_specs
+
+    def put(
+        self,
+        key: str,
+        records: Iterable[PackageRecord],
+        neutered_specs: Iterable[MatchSpec] = (),
+    ) -> None:
+        """Store the result of a solve; errors are logged, not raised."""
+        entry = {
+            "records": [record_ref(prec) for prec in records],
+            "neutered_specs": [str(spec) for spec in neutered_specs],
+        }
+        path = self._entry_path(key)
+        temp_path = path.with_suffix(f".{os.urandom(2).hex()}.tmp")
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            temp_path.write_text(json.dumps(entry))
+            os.replace(temp_path, path)
+        except OSError as e:
+            log.debug("Could not write solve cache entry %s: %r", key, e)
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
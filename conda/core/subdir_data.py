@@ -2,22 +2,23 @@
 # SPDX-License-Identifier: BSD-3-Clause
 from __future__ import annotations
 
+import atexit
 import json
-import pickle
 import re
 from collections import UserList, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import closing
 from errno import ENODEV
 from functools import partial
 from itertools import chain, islice
 from logging import getLogger
 from mmap import ACCESS_READ, mmap
-from os.path import exists, join, splitext
+from multiprocessing import get_context
+from os.path import exists, getmtime, join, splitext
 from pathlib import Path
+from threading import Thread
 from time import time
 
-from genericpath import getmtime, isfile
-
 try:
     from boltons.setutils import IndexedSet
 except ImportError:  # pragma: no cover
@@ -25,6 +26,7 @@ except ImportError:  # pragma: no cover
 
 from conda.gateways.repodata import (
     CACHE_STATE_SUFFIX,
+    ON_DISK_HASH,
     CondaRepoInterface,
     RepodataCache,
     RepodataFetch,
@@ -32,10 +34,21 @@ from conda.gateways.repodata import (
     RepodataState,
     RepoInterface,
     cache_fn_url,
+    cancel_cache_writes,
     create_cache_dir,
     get_repo_interface,
 )
+from conda.gateways.repodata.prefetch import fetch_all
+from conda.gateways.repodata.index_cache import (
+    GROUP_PACKAGES_CONDA,
+    INDEX_CACHE_SUFFIX,
+    IndexCache,
+    IndexCacheError,
+    write_index_cache,
+)
+from conda.gateways.repodata.stream import write_index_cache_path
 
+from .. import CondaError
 from ..auxlib.ish import dals
 from ..base.constants import CONDA_PACKAGE_EXTENSION_V1, REPODATA_FN
 from ..base.context import context
@@ -49,12 +62,11 @@ from ..exceptions import CondaUpgradeError, UnavailableInvalidChannel
 from ..gateways.disk.delete import rm_rf
 from ..models.channel import Channel, all_channel_urls
 from ..models.match_spec import MatchSpec
-from ..models.records import PackageRecord
+from ..models.records import PackageRecord, RepodataRecord
 from ..trust.signature_verification import signature_verification
 
 log = getLogger(__name__)
 
-REPODATA_PICKLE_VERSION = 30
 MAX_REPODATA_VERSION = 1
 REPODATA_HEADER_RE = b'"(_etag|_mod|_cache_control)":[ ]?"(.*?[^\\\\])"[,}\\s]'  # NOQA
 
@@ -85,20 +97,150 @@ class SubdirDataType(type):
         return subdir_data_instance
 
 
+# metadata_signature_status by fn, for the latest version of the repodata at
+# each url, so that records are verified once per version of repodata, e.g.
+# across SubdirData.reload(); entries of earlier versions are dropped
+_signature_status: dict[str, tuple[tuple, dict[str, str | None]]] = {}
+
+
+def _verify_signature(info: dict, fn: str, signatures: dict, version: tuple | None):
+    """
+    ``signature_verification()`` of unmodified ``info``, once per ``version``
+    (channel url and etag) of the repodata it comes from, if known.
+    """
+    if version is None:
+        signature_verification(info, fn, signatures)
+        return
+    url = version[0]
+    try:
+        cached_version, statuses = _signature_status[url]
+    except KeyError:
+        cached_version = None
+    if cached_version != version:
+        statuses = {}
+        _signature_status[url] = version, statuses
+    try:
+        status = statuses[fn]
+    except KeyError:
+        signature_verification(info, fn, signatures)
+        status = statuses[fn] = info.get("metadata_signature_status")
+    else:
+        if status is not None:
+            info["metadata_signature_status"] = status
+
+
+_cancel_at_exit_registered = False
+
+
+def _cancel_cache_writes_at_exit():
+    """Cancel the cache writes of background refreshes when conda exits."""
+    global _cancel_at_exit_registered
+    if not _cancel_at_exit_registered:
+        atexit.register(cancel_cache_writes)
+        _cancel_at_exit_registered = True
+
+
 class PackageRecordList(UserList):
-    """Lazily convert dicts to PackageRecord."""
+    """
+    Lazily convert dicts to RepodataRecord.
+
+    Signed records are verified on conversion; see ``defer_verification()``.
+    """
+
+    _signatures: dict = {}
+    _version: tuple | None = None
+
+    def __init__(self, initlist=None, signatures=None, version=None):
+        super().__init__(initlist)
+        if signatures:
+            self._signatures = signatures
+            self._version = version
+            # index -> (fn, info as published)
+            self._unverified: dict[int, tuple[str, dict]] = {}
+
+    def defer_verification(self, i: int, fn: str, info: dict):
+        """
+        Verify the signature of record ``i`` when it is first converted;
+        ``info`` must be as published, before conda adds to it.
+        """
+        self._unverified[i] = (fn, info)
 
     def __getitem__(self, i):
         if isinstance(i, slice):
+            if self._signatures:
+                return PackageRecordList(
+                    [self[j] for j in range(*i.indices(len(self)))]
+                )
             return self.__class__(self.data[i])
         else:
             record = self.data[i]
             if not isinstance(record, PackageRecord):
-                record = PackageRecord(**record)
+                if self._signatures and i % len(self.data) in self._unverified:
+                    fn, info = self._unverified.pop(i % len(self.data))
+                    _verify_signature(info, fn, self._signatures, self._version)
+                    if "metadata_signature_status" in info:
+                        record["metadata_signature_status"] = info[
+                            "metadata_signature_status"
+                        ]
+                record = RepodataRecord(**record)
                 self.data[i] = record
             return record
 
 
+class IndexedPackageRecordList(PackageRecordList):
+    """Lazily decode RepodataRecord from a memory-mapped repodata index."""
+
+    def __init__(
+        self,
+        index: IndexCache,
+        meta_in_common,
+        channel_url,
+        signatures,
+        add_pip,
+        version=None,
+    ):
+        super().__init__()
+        self.data = [None] * index.record_count
+        self._index = index
+        self._meta_in_common = meta_in_common
+        self._channel_url = channel_url
+        self._signatures = signatures
+        self._version = version
+        self._add_pip = add_pip
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return PackageRecordList([self[j] for j in range(*i.indices(len(self)))])
+        record = self.data[i]
+        if record is None:
+            record = self.data[i] = RepodataRecord(**self._info(self._index.entry(i)))
+        return record
+
+    def _info(self, entry):
+        index = self._index
+        fn = index.fn(entry)
+        info = index.info(entry)
+        # same steps, in the same order, as SubdirData._process_raw_repodata()
+        if self._signatures:
+            _verify_signature(info, fn, self._signatures, self._version)
+
+        counterpart = index.counterpart(entry)
+        if index.group(entry) == GROUP_PACKAGES_CONDA and counterpart >= 0:
+            legacy_info = index.info(counterpart)
+            info["legacy_bz2_md5"] = legacy_info.get("md5")
+            info["legacy_bz2_size"] = legacy_info.get("size")
+        if (
+            self._add_pip
+            and info["name"] == "python"
+            and info["version"].startswith(("2.", "3."))
+        ):
+            info["depends"].append("pip")
+        info.update(self._meta_in_common)
+        info["fn"] = fn
+        info["url"] = join_url(self._channel_url, fn)
+        return info
+
+
 class SubdirData(metaclass=SubdirDataType):
     _cache_ = {}
 
@@ -117,6 +259,33 @@ class SubdirData(metaclass=SubdirDataType):
     def query_all(
         package_ref_or_match_spec, channels=None, subdirs=None, repodata_fn=REPODATA_FN
     ):
+        subdir_datas = SubdirData.prepare_all(channels, subdirs, repodata_fn)
+
+        def subdir_query(subdir_data):
+            return tuple(subdir_data.query(package_ref_or_match_spec))
+
+        # TODO test timing with ProcessPoolExecutor
+        Executor = (
+            DummyExecutor
+            if context.debug or context.repodata_threads == 1
+            else partial(
+                ThreadLimitedThreadPoolExecutor, max_workers=context.repodata_threads
+            )
+        )
+        with Executor() as executor:
+            result = tuple(
+                chain.from_iterable(executor.map(subdir_query, subdir_datas))
+            )
+        return result
+
+    @staticmethod
+    def prepare_all(
+        channels=None, subdirs=None, repodata_fn=REPODATA_FN
+    ) -> list[SubdirData]:
+        """
+        SubdirData of every channel url in ``channels`` and ``subdirs``, with
+        their repodata fetched and indexed ahead of loading.
+        """
         from .index import check_allowlist  # TODO: fix in-line import
 
         # ensure that this is not called by threaded code
@@ -138,26 +307,166 @@ class SubdirData(metaclass=SubdirDataType):
 
         check_allowlist(channel_urls)
 
-        def subdir_query(url):
-            return tuple(
-                SubdirData(Channel(url), repodata_fn=repodata_fn).query(
-                    package_ref_or_match_spec
+        subdir_datas = [
+            SubdirData(Channel(url), repodata_fn=repodata_fn) for url in channel_urls
+        ]
+        SubdirData.fetch_all(subdir_datas)
+        SubdirData.index_all(subdir_datas)
+        return subdir_datas
+
+    @staticmethod
+    def fetch_all(subdir_datas) -> None:
+        """
+        Fetch repodata for every unloaded SubdirData at once, ahead of
+        parsing, so the network phase takes about as long as the slowest
+        single request. ``load()`` then picks up the prefetched result.
+        """
+        if context.debug or context.repodata_threads == 1:
+            return
+        pending = [sd for sd in subdir_datas if not sd._loaded and not sd._fetched]
+        if len(pending) < 2:
+            return
+        results = fetch_all(
+            [sd.repo_fetch for sd in pending], max_workers=context.repodata_threads
+        )
+        for subdir_data, result in zip(pending, results):
+            subdir_data._fetched = result
+
+    @staticmethod
+    def index_all(subdir_datas) -> None:
+        """
+        Index the cached repodata of several unloaded SubdirData at once, in
+        ``context.repodata_processes`` worker processes. Parsing holds the GIL,
+        so threads would take turns. Each worker writes its index to disk,
+        where ``load()`` then maps it instead of parsing again.
+        """
+        if context.repodata_processes < 2:
+            return
+        pending = []
+        for subdir_data in subdir_datas:
+            if subdir_data._loaded or isinstance(subdir_data._fetched, Exception):
+                continue
+            if subdir_data._fetched:
+                _, state = subdir_data._fetched
+            else:
+                state = subdir_data.repo_fetch.fresh_cache_state()
+                if state is None:
+                    continue  # fetched during load()
+            fields = subdir_data._index_cache_fields(state)
+            if not fields or state.get("mtime_ns") != fields["mtime_ns"]:
+                continue
+            index = subdir_data._open_index_cache(state)
+            if index is not None:
+                index.close()
+                continue
+            pending.append((subdir_data, fields))
+        if len(pending) < 2:
+            return
+
+        log.debug("Indexing repodata of %d subdirs in worker processes", len(pending))
+        # spawn; forking while other threads hold locks is unsafe
+        with ProcessPoolExecutor(
+            max_workers=min(context.repodata_processes, len(pending)),
+            mp_context=get_context("spawn"),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    write_index_cache_path,
+                    subdir_data.cache_path_index,
+                    subdir_data.cache_path_json,
+                    fields,
+                    use_only_tar_bz2=context.use_only_tar_bz2,
                 )
-            )
+                for subdir_data, fields in pending
+            ]
+            for (subdir_data, _), future in zip(pending, futures):
+                try:
+                    future.result()
+                except Exception:
+                    # load() indexes it again, in this process
+                    log.debug(
+                        "Failed to index repodata for %s",
+                        subdir_data.url_w_repodata_fn,
+                        exc_info=True,
+                    )
 
-        # TODO test timing with ProcessPoolExecutor
-        Executor = (
-            DummyExecutor
-            if context.debug or context.repodata_threads == 1
-            else partial(
-                ThreadLimitedThreadPoolExecutor, max_workers=context.repodata_threads
-            )
+    @staticmethod
+    def update_caches(subdir_datas) -> list[bool | Exception]:
+        """
+        Bring the cached repodata and index of every SubdirData up to date
+        without loading any records, e.g. to warm the cache for other conda
+        processes. Expired caches are checked with the server concurrently.
+
+        :return: per SubdirData, whether new repodata was downloaded, or the
+            exception raised while updating it.
+        """
+        before = []
+        for subdir_data in subdir_datas:
+            try:
+                before.append(subdir_data.cache_path_json.stat().st_mtime_ns)
+            except OSError:
+                before.append(None)
+        results = fetch_all(
+            [sd._revalidating_fetch() for sd in subdir_datas],
+            max_workers=context.repodata_threads,
         )
-        with Executor() as executor:
-            result = tuple(
-                chain.from_iterable(executor.map(subdir_query, channel_urls))
-            )
-        return result
+        updated = []
+        for subdir_data, mtime_ns, result in zip(subdir_datas, before, results):
+            if isinstance(result, Exception):
+                updated.append(result)
+                continue
+            _, state = result
+            if not subdir_data._update_index_cache(state):
+                updated.append(
+                    CondaError(
+                        f"Could not write repodata index {subdir_data.cache_path_index}"
+                    )
+                )
+                continue
+            updated.append(state.get("mtime_ns") != mtime_ns)
+        return updated
+
+    @classmethod
+    def wait_for_refreshes(cls) -> None:
+        """
+        Wait for the background refreshes of expired caches to finish, e.g.
+        before forking, which is unsafe while other threads hold locks.
+        """
+        for subdir_data in tuple(cls._cache_.values()):
+            if subdir_data._revalidation:
+                subdir_data._revalidation.join()
+                subdir_data._revalidation = None
+
+    @classmethod
+    def refresh_stale(cls) -> bool:
+        """
+        Bring repodata that was loaded from an expired cache (see
+        ``context.background_repodata_refresh``) up to date now, waiting for
+        any background refresh, and reload it.
+
+        :return: True if any repodata changed, e.g. to retry a failed solve.
+        """
+        changed = False
+        for subdir_data in tuple(cls._cache_.values()):
+            mtime_ns, subdir_data._stale_mtime_ns = subdir_data._stale_mtime_ns, None
+            if mtime_ns is None:
+                continue
+            if subdir_data._revalidation:
+                subdir_data._revalidation.join()
+                subdir_data._revalidation = None
+            cache = subdir_data.repo_cache
+            cache.load_state()
+            if cache.stale():
+                # the background refresh failed; try once more
+                subdir_data._revalidate()
+            try:
+                current_mtime_ns = subdir_data.cache_path_json.stat().st_mtime_ns
+            except OSError:
+                continue
+            if current_mtime_ns != mtime_ns:
+                subdir_data.reload()
+                changed = True
+        return changed
 
     def query(self, package_ref_or_match_spec):
         if not self._loaded:
@@ -168,9 +477,7 @@ class SubdirData(metaclass=SubdirDataType):
         if isinstance(param, MatchSpec):
             if param.get_exact_value("name"):
                 package_name = param.get_exact_value("name")
-                for prec in self._iter_records_by_name(package_name):
-                    if param.match(prec):
-                        yield prec
+                yield from param.filter(self._iter_records_by_name(package_name))
             else:
                 for prec in self.iter_records():
                     if param.match(prec):
@@ -198,6 +505,10 @@ class SubdirData(metaclass=SubdirDataType):
         self.repodata_fn = repodata_fn
         self.RepoInterface = RepoInterface
         self._loaded = False
+        self._fetched = None
+        # background refresh of an expired cache; see refresh_stale()
+        self._revalidation = None
+        self._stale_mtime_ns = None
         self._key_mgr = None
 
     @property
@@ -257,9 +568,23 @@ class SubdirData(metaclass=SubdirDataType):
         )
 
     @property
+    @deprecated(
+        "23.9",
+        "24.3",
+        addendum="Parsed repodata is cached in `SubdirData.cache_path_index`.",
+    )
     def cache_path_pickle(self):
         return self.cache_path_base + ("1" if context.use_only_tar_bz2 else "") + ".q"
 
+    @property
+    def cache_path_index(self):
+        """Memory-mapped index of the parsed repodata; see ``IndexCache``."""
+        return Path(
+            self.cache_path_base
+            + ("1" if context.use_only_tar_bz2 else "")
+            + INDEX_CACHE_SUFFIX
+        )
+
     def load(self):
         _internal_state = self._load()
         if _internal_state.get("repodata_version", 0) > MAX_REPODATA_VERSION:
@@ -283,8 +608,78 @@ class SubdirData(metaclass=SubdirDataType):
         # Unused since early 2023:
         self._track_features_index = _internal_state["_track_features_index"]
         self._loaded = True
+        self._refresh_in_background()
         return self
 
+    def _refresh_in_background(self):
+        """
+        Update an expired cache on a daemon thread, leaving the repodata just
+        loaded from it in place; the next process loads the new repodata.
+
+        Exiting conda does not wait for the download; cache writes are cancelled
+        at exit, after any write in progress. The repodata, its state and its
+        index are written to temporary files and renamed into place, so a
+        refresh cut short leaves the expired cache, which a later process
+        refreshes again.
+        """
+        if (
+            not context.background_repodata_refresh
+            or context.offline
+            or context.use_index_cache
+            or self.url_w_subdir.startswith("file://")
+        ):
+            return
+        if self._revalidation and self._revalidation.is_alive():
+            return
+        cache = self.repo_cache
+        cache.load_state()
+        if not cache.stale():
+            return
+        try:
+            self._stale_mtime_ns = self.cache_path_json.stat().st_mtime_ns
+        except OSError:
+            return
+        _cancel_cache_writes_at_exit()
+        self._revalidation = Thread(
+            target=self._revalidate,
+            name=f"refresh {self.url_w_repodata_fn}",
+            daemon=True,
+        )
+        self._revalidation.start()
+
+    def _revalidate(self):
+        """Fetch repodata if the server has a newer version, and index it."""
+        try:
+            _, state = self._revalidating_fetch().fetch_latest_path()
+            self._update_index_cache(state)
+        except Exception:
+            log.debug(
+                "Failed to refresh repodata for %s",
+                self.url_w_repodata_fn,
+                exc_info=True,
+            )
+
+    def _revalidating_fetch(self) -> RepodataFetch:
+        """``repo_fetch`` that checks an expired cache with the server."""
+        return RepodataFetch(
+            Path(self.cache_path_base),
+            self.channel,
+            self.repodata_fn,
+            repo_interface_cls=self.RepoInterface,
+            revalidate=True,
+        )
+
+    def _update_index_cache(self, state: RepodataState) -> bool:
+        """
+        Index the cached json unless the index already describes it. False if
+        the index could not be written.
+        """
+        index = self._open_index_cache(state)
+        if index is not None:
+            index.close()
+            return True
+        return self._write_index_cache(state)
+
     def iter_records(self):
         if not self._loaded:
             self.load()
@@ -293,7 +688,7 @@ class SubdirData(metaclass=SubdirDataType):
         # after going through entire list
 
     def _iter_records_by_name(self, name):
-        for i in self._names_index[name]:
+        for i in self._names_index.get(name, ()):
             yield self._package_records[i]
 
     def _load_state(self):
@@ -316,9 +711,35 @@ class SubdirData(metaclass=SubdirDataType):
         `current_repodata.json`, fall back to `repodata.json` when the former is
         unavailable.
         """
+        # result of fetch_all(), if any
+        fetched, self._fetched = self._fetched, None
         try:
-            fetcher = self.repo_fetch
-            repodata, state = fetcher.fetch_latest_parsed()
+            if isinstance(fetched, Exception):
+                raise fetched
+            elif fetched:
+                path, state = fetched
+            else:
+                fetcher = self.repo_fetch
+                # up-to-date index: records are decoded by name, on demand,
+                # without reading or parsing the cached json
+                state = fetcher.fresh_cache_state()
+                if state is not None:
+                    _internal_state = self._read_index_cache(state)
+                    if _internal_state:
+                        return _internal_state
+
+                path, state = fetcher.fetch_latest_path()
+            _internal_state = self._read_index_cache(state)
+            if _internal_state:
+                return _internal_state
+
+            # stream the cached json into a new index, one package at a time
+            if self._write_index_cache(state):
+                _internal_state = self._read_index_cache(state)
+                if _internal_state:
+                    return _internal_state
+
+            repodata = json.loads(path.read_text()) if path.exists() else {}
             return self._process_raw_repodata(repodata, state)
         except UnavailableInvalidChannel:
             if self.repodata_fn != REPODATA_FN:
@@ -327,46 +748,82 @@ class SubdirData(metaclass=SubdirDataType):
             else:
                 raise
 
-    def _pickle_me(self):
+    def _process_repodata(self, repodata: dict, state: RepodataState):
+        """
+        Index freshly parsed repodata on disk and load records from the index;
+        process it in memory if the index cannot be written.
+        """
+        if self._write_index_cache(state, repodata):
+            _internal_state = self._read_index_cache(state)
+            if _internal_state:
+                return _internal_state
+        return self._process_raw_repodata(repodata, state)
+
+    def _read_local_repodata(self, state: RepodataState):
+        # first try reading the index cache
+        _internal_state = self._read_index_cache(state)
+        if _internal_state:
+            return _internal_state
+
+        raw_repodata_str, state = self.repo_fetch.read_cache()
+        return self._process_repodata(json.loads(raw_repodata_str or "{}"), state)
+
+    def _index_cache_fields(self, state: RepodataState):
+        """
+        Throw away the index cache if these don't all match. The index
+        describes one version of the cached json, identified by its stat();
+        etag and mod are not compared, so that an index patched along with
+        the json (see jlap) stays valid.
+        """
+        try:
+            json_stat = self.cache_path_json.stat()
+        except OSError:
+            return None
+        return {
+            "_url": self.url_w_credentials,
+            "_schannel": self.channel.canonical_name,
+            "_add_pip": context.add_pip_as_python_dependency,
+            "fn": self.repodata_fn,
+            "mtime_ns": json_stat.st_mtime_ns,
+            "size": json_stat.st_size,
+        }
+
+    def _write_index_cache(self, state: RepodataState, repodata: dict | None = None):
+        """
+        Index parsed ``repodata``; if not given, parse the cached json
+        incrementally while writing the index.
+        """
+        fields = self._index_cache_fields(state)
+        if not fields or state.get("mtime_ns") != fields["mtime_ns"]:
+            # no cached json, or it changed after repodata was read
+            return False
         try:
             log.debug(
-                "Saving pickled state for %s at %s",
+                "Saving repodata index for %s at %s",
                 self.url_w_repodata_fn,
-                self.cache_path_pickle,
+                self.cache_path_index,
             )
-            with open(self.cache_path_pickle, "wb") as fh:
-                pickle.dump(self._internal_state, fh, pickle.HIGHEST_PROTOCOL)
-        except Exception:
-            log.debug("Failed to dump pickled repodata.", exc_info=True)
-
-    def _read_local_repodata(self, state: RepodataState):
-        # first try reading pickled data
-        _pickled_state = self._read_pickled(state)
-        if _pickled_state:
-            return _pickled_state
+            if repodata is not None:
+                write_index_cache(
+                    self.cache_path_index,
+                    repodata,
+                    fields,
+                    use_only_tar_bz2=context.use_only_tar_bz2,
+                )
+                return True
 
-        raw_repodata_str, state = self.repo_fetch.read_cache()
-        _internal_state = self._process_raw_repodata_str(raw_repodata_str, state)
-        # taken care of by _process_raw_repodata():
-        assert self._internal_state is _internal_state
-        self._pickle_me()
-        return _internal_state
+            write_index_cache_path(
+                self.cache_path_index,
+                self.cache_path_json,
+                fields,
+                use_only_tar_bz2=context.use_only_tar_bz2,
+            )
+            return True
+        except Exception:
+            log.debug("Failed to write repodata index.", exc_info=True)
+            return False
 
-    def _pickle_valid_checks(self, pickled_state, mod, etag):
-        """Throw away the pickle if these don't all match."""
-        yield "_url", pickled_state.get("_url"), self.url_w_credentials
-        yield "_schannel", pickled_state.get("_schannel"), self.channel.canonical_name
-        yield "_add_pip", pickled_state.get(
-            "_add_pip"
-        ), context.add_pip_as_python_dependency
-        yield "_mod", pickled_state.get("_mod"), mod
-        yield "_etag", pickled_state.get("_etag"), etag
-        yield "_pickle_version", pickled_state.get(
-            "_pickle_version"
-        ), REPODATA_PICKLE_VERSION
-        yield "fn", pickled_state.get("fn"), self.repodata_fn
-
-    def _read_pickled(self, state: RepodataState):
+    def _read_index_cache(self, state: RepodataState):
         if not isinstance(state, RepodataState):
             state = RepodataState(
                 self.cache_path_json,
@@ -375,37 +832,108 @@ class SubdirData(metaclass=SubdirDataType):
                 dict=state,
             )
 
-        if not isfile(self.cache_path_pickle) or not isfile(self.cache_path_json):
-            # Don't trust pickled data if there is no accompanying json data
+        index = self._open_index_cache(state)
+        if index is None:
             return None
+        return self._process_index_cache(index, state)
 
-        try:
-            if isfile(self.cache_path_pickle):
-                log.debug("found pickle file %s", self.cache_path_pickle)
-            with open(self.cache_path_pickle, "rb") as fh:
-                _pickled_state = pickle.load(fh)
-        except Exception:
-            log.debug("Failed to load pickled repodata.", exc_info=True)
-            rm_rf(self.cache_path_pickle)
+    def _open_index_cache(self, state: RepodataState) -> IndexCache | None:
+        """The index cache, if it describes the cached json; else None."""
+        fields = self._index_cache_fields(state)
+        if not fields or not self.cache_path_index.is_file():
+            # Don't trust the index if there is no accompanying json data
             return None
 
-        def checks():
-            return self._pickle_valid_checks(_pickled_state, state.mod, state.etag)
-
-        def _check_pickled_valid():
-            for _, left, right in checks():
-                yield left == right
+        try:
+            index = IndexCache(self.cache_path_index)
+        except IndexCacheError:
+            log.debug("Failed to load repodata index.", exc_info=True)
+            rm_rf(self.cache_path_index)
+            return None
 
-        if not all(_check_pickled_valid()):
+        mismatched = {
+            key: (index.meta.get(key), value)
+            for key, value in fields.items()
+            if index.meta.get(key) != value
+        }
+        if mismatched:
             log.debug(
-                "Pickle load validation failed for %s at %s. %r",
+                "Index validation failed for %s at %s. %r",
                 self.url_w_repodata_fn,
-                self.cache_path_json,
-                tuple(checks()),
+                self.cache_path_index,
+                mismatched,
             )
+            index.close()
             return None
 
-        return _pickled_state
+        return index
+
+    @property
+    def repodata_version(self) -> tuple | None:
+        """
+        Identify the repodata, loading it if needed, e.g. to cache results
+        derived from it; None if its version is unknown.
+        """
+        if not self._loaded:
+            self.load()
+        return self._repodata_version(self._load_state())
+
+    def _repodata_version(self, state: RepodataState | None) -> tuple | None:
+        """Identify this version of the repodata, e.g. to cache verification."""
+        # Last-Modified has one second resolution; prefer the hash of the cache
+        version = state and (
+            state.get(ON_DISK_HASH)
+            or state.get("_etag")
+            or state.get("_mod")
+            or state.get("mtime_ns")
+        )
+        return (self.url_w_credentials, version) if version else None
+
+    def _process_index_cache(self, index: IndexCache, state: RepodataState):
+        repodata = index.repodata_header
+        subdir = repodata.get("info", {}).get("subdir") or self.channel.subdir
+        assert subdir == self.channel.subdir
+        add_pip = context.add_pip_as_python_dependency
+        schannel = self.channel.canonical_name
+        signatures = repodata.get("signatures", {})
+        verify = bool(signatures) and signature_verification.enabled
+
+        meta_in_common = {
+            "arch": repodata.get("info", {}).get("arch"),
+            "channel": self.channel,
+            "platform": repodata.get("info", {}).get("platform"),
+            "schannel": schannel,
+            "subdir": subdir,
+        }
+        self._package_records = _package_records = IndexedPackageRecordList(
+            index,
+            meta_in_common,
+            self.url_w_credentials,
+            signatures if verify else None,
+            add_pip,
+            self._repodata_version(state),
+        )
+        self._names_index = index
+        self._track_features_index = defaultdict(list)
+
+        self._internal_state = _internal_state = {
+            "channel": self.channel,
+            "url_w_subdir": self.url_w_subdir,
+            "url_w_credentials": self.url_w_credentials,
+            "cache_path_base": self.cache_path_base,
+            "fn": self.repodata_fn,
+            "_package_records": _package_records,
+            "_names_index": index,
+            "_track_features_index": self._track_features_index,
+            "_etag": state.get("_etag"),
+            "_mod": state.get("_mod"),
+            "_cache_control": state.get("_cache_control"),
+            "_url": state.get("_url"),
+            "_add_pip": add_pip,
+            "_schannel": schannel,
+            "repodata_version": state.get("repodata_version", 0),
+        }
+        return _internal_state
 
     def _process_raw_repodata_str(
         self,
@@ -430,12 +958,16 @@ class SubdirData(metaclass=SubdirDataType):
         add_pip = context.add_pip_as_python_dependency
         schannel = self.channel.canonical_name
 
-        self._package_records = _package_records = PackageRecordList()
+        signatures = repodata.get("signatures", {})
+        verify = bool(signatures) and signature_verification.enabled
+
+        self._package_records = _package_records = PackageRecordList(
+            signatures=signatures if verify else None,
+            version=self._repodata_version(state),
+        )
         self._names_index = _names_index = defaultdict(list)
         self._track_features_index = _track_features_index = defaultdict(list)
 
-        signatures = repodata.get("signatures", {})
-
         _internal_state = {
             "channel": self.channel,
             "url_w_subdir": self.url_w_subdir,
@@ -450,7 +982,6 @@ class SubdirData(metaclass=SubdirDataType):
             "_cache_control": state.get("_cache_control"),
             "_url": state.get("_url"),
             "_add_pip": add_pip,
-            "_pickle_version": REPODATA_PICKLE_VERSION,
             "_schannel": schannel,
             "repodata_version": state.get("repodata_version", 0),
         }
@@ -493,10 +1024,11 @@ class SubdirData(metaclass=SubdirDataType):
             (((k, legacy_packages[k]) for k in use_these_legacy_keys), False),
         ):
             for fn, info in group:
-                # Verify metadata signature before anything else so run-time
-                # updates to the info dictionary performed below do not
-                # invalidate the signatures provided in metadata.json.
-                signature_verification(info, fn, signatures)
+                # Verify metadata signatures when records are converted, against
+                # a copy made before anything else so run-time updates to the
+                # info dictionary performed below do not invalidate the
+                # signatures provided in metadata.json.
+                published = dict(info) if verify and fn in signatures else None
 
                 if copy_legacy_md5:
                     counterpart = fn.replace(".conda", ".tar.bz2")
@@ -510,7 +1042,7 @@ class SubdirData(metaclass=SubdirDataType):
                     and info["name"] == "python"
                     and info["version"].startswith(("2.", "3."))
                 ):
-                    info["depends"].append("pip")
+                    info["depends"] = [*info["depends"], "pip"]
                 info.update(meta_in_common)
                 if info.get("record_version", 0) > 1:
                     log.debug(
@@ -526,6 +1058,8 @@ class SubdirData(metaclass=SubdirDataType):
                 info["url"] = join_url(channel_url, fn)
                 _package_records.append(info)
                 record_index = len(_package_records) - 1
+                if published is not None:
+                    _package_records.defer_verification(record_index, fn, published)
                 _names_index[info["name"]].append(record_index)
 
         self._internal_state = _internal_state
@@ -6,11 +6,13 @@ import abc
 import datetime
 import errno
 import hashlib
+import io
 import json
 import logging
 import os
 import pathlib
 import re
+import threading
 import time
 import warnings
 from collections import UserDict
@@ -49,6 +51,11 @@ from ..connection.session import CondaSession
 from ..disk import mkdir_p_sudo_safe
 from .lock import lock
 
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
 log = logging.getLogger(__name__)
 stderrlog = logging.getLogger("conda.stderrlog")
 
@@ -63,6 +70,35 @@ CACHE_CONTROL_KEY = "cache_control"
 URL_KEY = "url"
 CACHE_STATE_SUFFIX = ".info.json"
 
+# held while cache files are replaced; see cancel_cache_writes()
+_cache_write_lock = threading.Lock()
+_cache_writes_cancelled = threading.Event()
+
+
+def cancel_cache_writes():
+    """
+    Stop writes to repodata caches, after any write in progress has finished.
+    Called at exit while caches are refreshed in the background, whose threads
+    are stopped at any point when the interpreter exits.
+    """
+    _cache_writes_cancelled.set()
+    with _cache_write_lock:
+        pass
+
+
+@contextmanager
+def _cache_write():
+    with _cache_write_lock:
+        if _cache_writes_cancelled.is_set():
+            raise CondaError("Repodata cache writes were cancelled at exit.")
+        yield
+
+
+# blake2b (256 bits) of the cached repodata.json, and of the upstream
+# repodata.json it is equivalent to
+ON_DISK_HASH = "blake2_256"
+NOMINAL_HASH = "blake2_256_nominal"
+
 
 class RepodataIsEmpty(UnavailableInvalidChannel):
     """
@@ -118,12 +154,27 @@ class CondaRepoInterface(RepoInterface):
     #: Filename of the repodata file; defaults to value of conda.base.constants.REPODATA_FN
     _repodata_fn: str
 
-    def __init__(self, url: str, repodata_fn: str | None, **kwargs) -> None:
+    def __init__(
+        self,
+        url: str,
+        repodata_fn: str | None,
+        *,
+        cache: RepodataCache | None = None,
+        **kwargs,
+    ) -> None:
         log.debug("Using CondaRepoInterface")
         self._url = url
         self._repodata_fn = repodata_fn or REPODATA_FN
+        self._cache = cache
 
     def repodata(self, state: RepodataState) -> str | None:
+        """
+        Fetch repodata if it has changed since ``state``.
+
+        With a ``cache``, streams the response into the cache, preferring
+        ``<repodata_fn>.zst`` where the channel provides it, and raises
+        ``RepodataOnDisk``. Otherwise returns repodata as a str.
+        """
         if not context.ssl_verify:
             warnings.simplefilter("ignore", InsecureRequestWarning)
 
@@ -140,26 +191,84 @@ class CondaRepoInterface(RepoInterface):
 
         url = join_url(self._url, filename)
 
+        stream = self._cache is not None
+        use_zst = (
+            stream
+            and zstandard is not None
+            and self._url.startswith(("http://", "https://"))
+            and state.should_check_format("zst")
+        )
+
         with conda_http_errors(self._url, filename):
             timeout = (
                 context.remote_connect_timeout_secs,
                 context.remote_read_timeout_secs,
             )
-            response: Response = session.get(
-                url, headers=headers, proxies=session.proxies, timeout=timeout
-            )
+            response: Response | None = None
+            if use_zst:
+                response = session.get(
+                    url + ".zst",
+                    headers=headers,
+                    proxies=session.proxies,
+                    timeout=timeout,
+                    stream=True,
+                )
+                status = response.status_code
+                if status != 304 and not 200 <= status < 300:
+                    log.debug("%s.zst is unavailable (HTTP %s)", url, status)
+                    response.close()
+                    response = None
+                    use_zst = False
+                    # anything but a 404 may be transient; check again next time
+                    if status == 404:
+                        state.set_has_format("zst", False)
+            if response is None:
+                response = session.get(
+                    url,
+                    headers=headers,
+                    proxies=session.proxies,
+                    timeout=timeout,
+                    stream=stream,
+                )
             if log.isEnabledFor(logging.DEBUG):
-                log.debug(stringify(response, content_max_len=256))
+                # don't consume a streamed body
+                log.debug(stringify(response, content_max_len=0 if stream else 256))
             response.raise_for_status()
 
+        if use_zst:
+            state.set_has_format("zst", True)
+
         if response.status_code == 304:
             # should we save cache-control to state here to put another n
             # seconds on the "make a remote request" clock and/or touch cache
             # mtime
             raise Response304ContentUnchanged()
 
-        json_str = response.text
+        if not stream:
+            json_str = response.text
+            self._update_state(response, state)
+            return json_str
+
+        temp_path = (
+            self._cache.cache_dir / f"{self._cache.name}.{os.urandom(2).hex()}.tmp"
+        )
+        try:
+            hasher = hashlib.blake2b(digest_size=32)
+            with conda_http_errors(self._url, filename):
+                write_response(response, temp_path, hasher, is_zst=use_zst)
+            self._update_state(response, state)
+            # the upstream repodata.json, byte for byte
+            state[ON_DISK_HASH] = state[NOMINAL_HASH] = hasher.hexdigest()
+            self._cache.state.update(state)
+            self._cache.replace(temp_path)
+        finally:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass  # moved into place
+        raise RepodataOnDisk()
 
+    def _update_state(self, response: Response, state: RepodataState):
         # We no longer add these tags to the large `resp.content` json
         saved_fields = {"_url": self._url}
         _add_http_value_to_dict(response, "Etag", saved_fields, "_etag")
@@ -168,10 +277,47 @@ class CondaRepoInterface(RepoInterface):
             response, "Cache-Control", saved_fields, "_cache_control"
         )
 
+        # remember which formats the channel provides
+        saved_fields.update(
+            (key, value) for key, value in state.items() if key.startswith("has_")
+        )
+
         state.clear()
         state.update(saved_fields)
 
-        return json_str
+
+class HashWriter(io.RawIOBase):
+    """Pass bytes written to ``backing`` through ``hasher.update()``."""
+
+    def __init__(self, backing, hasher):
+        self.backing = backing
+        self.hasher = hasher
+
+    def write(self, b: bytes):
+        self.hasher.update(b)
+        return self.backing.write(b)
+
+    def close(self):
+        self.backing.close()
+
+
+def write_response(
+    response: Response, path: Path, hasher, *, is_zst=False, chunk_size=1 << 14
+):
+    """
+    Stream a response body to ``path``, decompressing ``.zst`` chunk by chunk,
+    and pass the (decompressed) bytes through ``hasher.update()``.
+    """
+    if is_zst:
+        decompressor = zstandard.ZstdDecompressor()
+        writer = decompressor.stream_writer(
+            HashWriter(path.open("wb"), hasher), closefd=True  # type: ignore
+        )
+    else:
+        writer = HashWriter(path.open("wb"), hasher)
+    with writer as repodata:
+        for block in response.iter_content(chunk_size=chunk_size):
+            repodata.write(block)
 
 
 def _add_http_value_to_dict(resp, http_key, d, dict_key):
@@ -650,10 +796,10 @@ class RepodataCache:
         Relies on path's mtime not changing on move. `temp_path` should be
         adjacent to `self.cache_path_json` to be on the same filesystem.
         """
-        with self.cache_path_state.open("a+") as state_file, lock(state_file):
-            # "a+" avoids trunctating file before we have the lock and creates
-            state_file.seek(0)
-            state_file.truncate()
+        with _cache_write(), self.cache_path_state.open(
+            "a+"
+        ) as state_file, lock(state_file):
+            # "a+" creates the file to lock without trunctating it
             stat = temp_path.stat()
             # XXX make sure self.state has the correct etag, etc. for temp_path.
             # UserDict has inscrutable typing, which we ignore
@@ -665,18 +811,41 @@ class RepodataCache:
             except FileExistsError:  # Windows
                 self.cache_path_json.unlink()
                 temp_path.rename(self.cache_path_json)
-            state_file.write(json.dumps(dict(self.state), indent=2))
+            self._write_state(state_file)
 
     def refresh(self, refresh_ns=0):
         """
         Update access time in cache info file to indicate a HTTP 304 Not Modified response.
         """
-        with self.cache_path_state.open("a+") as state_file, lock(state_file):
-            # "a+" avoids trunctating file before we have the lock and creates
+        with _cache_write(), self.cache_path_state.open(
+            "a+"
+        ) as state_file, lock(state_file):
+            # "a+" creates the file to lock without trunctating it
+            self.state["refresh_ns"] = refresh_ns or time.time_ns()
+            self._write_state(state_file)
+
+    def _write_state(self, state_file):
+        """
+        Write self.state to a temporary file renamed over the locked
+        ``state_file``, so that it is never left partly written. Where an open
+        file cannot be replaced (Windows), it is rewritten in place.
+        """
+        state = json.dumps(dict(self.state), indent=2)
+        temp_path = self.cache_path_state.with_name(
+            f"{self.cache_path_state.name}.{os.urandom(2).hex()}.tmp"
+        )
+        try:
+            temp_path.write_text(state)
+            os.replace(temp_path, self.cache_path_state)
+        except PermissionError:
             state_file.seek(0)
             state_file.truncate()
-            self.state["refresh_ns"] = refresh_ns or time.time_ns()
-            state_file.write(json.dumps(dict(self.state), indent=2))
+            state_file.write(state)
+        finally:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
 
     def stale(self):
         """
@@ -729,6 +898,7 @@ class RepodataFetch:
     url_w_subdir: str
     url_w_credentials: str
     repo_interface_cls: Any
+    revalidate: bool
 
     def __init__(
         self,
@@ -737,10 +907,16 @@ class RepodataFetch:
         repodata_fn: str,
         *,
         repo_interface_cls,
+        revalidate: bool = False,
     ):
+        """
+        :param revalidate: check an expired cache with the server even when
+            ``context.background_repodata_refresh`` would serve it as-is.
+        """
         self.cache_path_base = cache_path_base
         self.channel = channel
         self.repodata_fn = repodata_fn
+        self.revalidate = revalidate
 
         self.url_w_subdir = self.channel.url(with_credentials=False) or ""
         self.url_w_credentials = self.channel.url(with_credentials=True) or ""
@@ -764,9 +940,11 @@ class RepodataFetch:
         """
         Retrieve latest or latest-cached repodata; update cache.
 
+        Unlike ``fetch_latest()``, does not read cached repodata into memory.
+
         :return: (pathlib.Path to uncompressed repodata contents, RepodataState)
         """
-        _, state = self.fetch_latest()
+        _, state = self._fetch_latest(read_cache=False)
         return self.cache_path_json, state
 
     @property
@@ -815,6 +993,13 @@ class RepodataFetch:
         remote if cache has expired; return cached data if cache has not
         expired; return stale cached data or dummy data if in offline mode.
         """
+        return self._fetch_latest(read_cache=True)
+
+    def _fetch_latest(self, read_cache: bool) -> tuple[dict | str, RepodataState]:
+        """
+        :param read_cache: if False, return "" instead of repodata that is
+            already on disk; only freshly downloaded data is returned.
+        """
         cache = self.repo_cache
         cache.load_state()
 
@@ -839,36 +1024,9 @@ class RepodataFetch:
                     cache.state,
                 )  # XXX basic properties like info, packages, packages.conda? instead of {}?
 
-        else:
-            if context.use_index_cache:
-                log.debug(
-                    "Using cached repodata for %s at %s because use_cache=True",
-                    self.url_w_repodata_fn,
-                    self.cache_path_json,
-                )
-
-                _internal_state = self.read_cache()
-                return _internal_state
-
-            stale = cache.stale()
-            if (not stale or context.offline) and not self.url_w_subdir.startswith(
-                "file://"
-            ):
-                timeout = cache.timeout()
-                log.debug(
-                    "Using cached repodata for %s at %s. Timeout in %d sec",
-                    self.url_w_repodata_fn,
-                    self.cache_path_json,
-                    timeout,
-                )
-                _internal_state = self.read_cache()
-                return _internal_state
-
-            log.debug(
-                "Local cache timed out for %s at %s",
-                self.url_w_repodata_fn,
-                self.cache_path_json,
-            )
+        elif self._cache_is_current(cache):
+            _internal_state = self._read_cache(read_cache)
+            return _internal_state
 
         try:
             try:
@@ -894,7 +1052,7 @@ class RepodataFetch:
             cache.refresh()
             # touch(self.cache_path_json) # not anymore, or the a separate file is invalid
             # self._save_state(mod_etag_headers)
-            _internal_state = self.read_cache()
+            _internal_state = self._read_cache(read_cache)
             return _internal_state
         else:
             try:
@@ -902,9 +1060,11 @@ class RepodataFetch:
                     # this is handled very similar to a 304. Can the cases be merged?
                     # we may need to read_bytes() and compare a hash to the state, instead.
                     # XXX use self._repo_cache.load() or replace after passing temp path to jlap
-                    raw_repodata = self.cache_path_json.read_text()
-                    cache.state["size"] = len(raw_repodata)  # type: ignore
+                    raw_repodata = (
+                        self.cache_path_json.read_text() if read_cache else ""
+                    )
                     stat = self.cache_path_json.stat()
+                    cache.state["size"] = stat.st_size  # type: ignore
                     mtime_ns = stat.st_mtime_ns
                     cache.state["mtime_ns"] = mtime_ns  # type: ignore
                     cache.refresh()
@@ -932,6 +1092,71 @@ class RepodataFetch:
 
             return raw_repodata, cache.state
 
+    def fresh_cache_state(self) -> RepodataState | None:
+        """
+        Return cache information if the cached repodata can be used as-is,
+        without a remote request; otherwise None. Does not read the cached
+        repodata itself.
+        """
+        cache = self.repo_cache
+        cache.load_state()
+        if cache.cache_path_json.exists() and self._cache_is_current(cache):
+            return cache.state
+        return None
+
+    def _cache_is_current(self, cache: RepodataCache) -> bool:
+        """
+        True if an existing cache should be used without a remote request.
+        """
+        if context.use_index_cache:
+            log.debug(
+                "Using cached repodata for %s at %s because use_cache=True",
+                self.url_w_repodata_fn,
+                self.cache_path_json,
+            )
+            return True
+
+        stale = cache.stale()
+        if (not stale or context.offline) and not self.url_w_subdir.startswith(
+            "file://"
+        ):
+            timeout = cache.timeout()
+            log.debug(
+                "Using cached repodata for %s at %s. Timeout in %d sec",
+                self.url_w_repodata_fn,
+                self.cache_path_json,
+                timeout,
+            )
+            return True
+
+        if (
+            context.background_repodata_refresh
+            and not self.revalidate
+            and not context.offline
+            and not self.url_w_subdir.startswith("file://")
+        ):
+            log.debug(
+                "Using expired cached repodata for %s at %s; "
+                "refreshing in the background",
+                self.url_w_repodata_fn,
+                self.cache_path_json,
+            )
+            return True
+
+        log.debug(
+            "Local cache timed out for %s at %s",
+            self.url_w_repodata_fn,
+            self.cache_path_json,
+        )
+        return False
+
+    def _read_cache(self, read_cache: bool) -> tuple[str, RepodataState]:
+        if read_cache:
+            return self.read_cache()
+        cache = self.repo_cache
+        cache.load_state()
+        return "", cache.state
+
     def read_cache(self) -> tuple[str, RepodataState]:
         """
         Read repodata from disk, without trying to fetch a fresh version.
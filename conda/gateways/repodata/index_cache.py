@@ -0,0 +1,452 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Memory-mapped, versioned index of a cached repodata.json.
+
+Opening an index is O(1): the file is mapped read-only and only a small header
+and metadata object are decoded. Package entries are stored as individual
+compact JSON blobs, exactly as published in repodata.json, and are decoded one
+at a time when a caller asks for them by name or by position. Several conda
+processes reading the same index share its pages through the OS page cache.
+
+File layout::
+
+    header      magic, format version, offset and length of the metadata
+    sections    typed arrays and byte strings, each aligned to 8 bytes
+    meta        JSON object; cache validation fields, the non-package
+                top-level keys of repodata.json and the section table
+
+Entry blobs are the first section so that they can be written while
+repodata.json is still being parsed; the metadata comes last because the
+non-package keys may follow the package entries.
+
+Sections (``n`` entries, ``k`` selected records, ``m`` package names)::
+
+    blob_offsets        Q[n + 1]    entry JSON blobs, offsets into ``blobs``
+    fn_offsets          I[n + 1]    entry filenames, offsets into ``fns``
+    groups              B[n]        0 for "packages", 1 for "packages.conda"
+    supported           B[n]        1 unless the entry's record_version is too new
+    entry_names         I[n]        package name of each entry, index into names
+    counterparts        i[n]        .tar.bz2 entry of a .conda entry, or -1
+    records             I[k]        entries selected as package records
+    name_offsets        I[m + 1]    sorted package names, offsets into ``names``
+    name_record_offsets I[m + 1]    offsets into ``name_records``
+    name_records        I[...]      positions in ``records``, grouped by name
+    blobs, fns, names   bytes
+
+``names`` holds the name of every entry, so that an index can be rewritten
+without decoding its blobs (see ``IndexPatcher``); names whose entries are all
+shadowed or unsupported have no records, and are not keys of ``IndexCache``.
+
+Integers use the byte order of the host that wrote the index; an index written
+on a host with a different byte order is rejected like any other stale cache.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping
+
+from ...base.constants import CONDA_PACKAGE_EXTENSION_V1, CONDA_PACKAGE_EXTENSION_V2
+
+log = logging.getLogger(__name__)
+
+INDEX_CACHE_SUFFIX = ".idx"
+INDEX_CACHE_VERSION = 3
+INDEX_CACHE_MAGIC = b"CONDAIDX"
+
+GROUP_PACKAGES = 0
+GROUP_PACKAGES_CONDA = 1
+PACKAGE_GROUPS = ("packages", "packages.conda")
+
+_HEADER = struct.Struct("=8sIIQQ")
+_ALIGN = 8
+
+# section name -> array typecode, or None for raw bytes
+_SECTIONS = {
+    "blob_offsets": "Q",
+    "fn_offsets": "I",
+    "groups": "B",
+    "supported": "B",
+    "entry_names": "I",
+    "counterparts": "i",
+    "records": "I",
+    "name_offsets": "I",
+    "name_record_offsets": "I",
+    "name_records": "I",
+    "fns": None,
+    "names": None,
+    "blobs": None,
+}
+
+
+class IndexCacheError(ValueError):
+    """The index cache file is missing, truncated or of an unknown version."""
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _pad(length: int) -> bytes:
+    return b"\0" * (-length % _ALIGN)
+
+
+def select_records(
+    entries: list[tuple[int, str, str, bool]], *, use_only_tar_bz2: bool = False
+) -> tuple[list[int], list[int]]:
+    """
+    Choose which repodata entries become package records.
+
+    Mirrors ``SubdirData._process_raw_repodata``: every ``.conda`` entry comes
+    first, followed by the ``.tar.bz2`` entries without a ``.conda``
+    counterpart. Entries with an unsupported ``record_version`` are skipped.
+
+    :param entries: ``(group, fn, name, supported)`` for every repodata entry.
+    :return: ``(records, counterparts)``; entry indices of the selected
+        records, and for each entry the index of its ``.tar.bz2`` counterpart
+        or -1.
+    """
+    legacy = {
+        fn: i
+        for i, (group, fn, _, _) in enumerate(entries)
+        if group == GROUP_PACKAGES
+    }
+    counterparts = [-1] * len(entries)
+    shadowed = set()
+    conda_records = []
+    for i, (group, fn, _, _) in enumerate(entries):
+        if group != GROUP_PACKAGES_CONDA:
+            continue
+        counterpart = legacy.get(
+            fn[: -len(CONDA_PACKAGE_EXTENSION_V2)] + CONDA_PACKAGE_EXTENSION_V1
+        )
+        if counterpart is not None:
+            counterparts[i] = counterpart
+        if not use_only_tar_bz2:
+            conda_records.append(i)
+            if counterpart is not None:
+                shadowed.add(counterpart)
+    legacy_records = [i for i in legacy.values() if i not in shadowed]
+
+    records = [i for i in (*conda_records, *legacy_records) if entries[i][3]]
+    return records, counterparts
+
+
+def write_index_cache(
+    path: Path | str,
+    repodata: dict,
+    meta: dict,
+    *,
+    use_only_tar_bz2: bool = False,
+) -> None:
+    """
+    Write an index of parsed, unmodified ``repodata`` to ``path``.
+
+    :param meta: JSON-serializable cache validation fields, returned as
+        ``IndexCache.meta`` when the index is opened.
+    """
+    with IndexCacheWriter(path, use_only_tar_bz2=use_only_tar_bz2) as writer:
+        for group, key in enumerate(PACKAGE_GROUPS):
+            for fn, info in repodata.get(key, {}).items():
+                writer.add(group, fn, info)
+        writer.finish(
+            {key: value for key, value in repodata.items() if key not in PACKAGE_GROUPS},
+            meta,
+            keys=repodata,
+        )
+
+
+def _offsets(typecode: str, items) -> array:
+    offsets = array(typecode, [0])
+    total = 0
+    for item in items:
+        total += len(item)
+        offsets.append(total)
+    return offsets
+
+
+class IndexCacheWriter:
+    """
+    Write an index cache one repodata entry at a time.
+
+    Entry blobs go straight to disk; only filenames, package names and offsets
+    are kept in memory until ``finish()``. The file is written next to
+    ``path`` and renamed over it, so readers never observe a partially
+    written index. Use as a context manager to discard unfinished output.
+    """
+
+    def __init__(self, path: Path | str, *, use_only_tar_bz2: bool = False):
+        self.path = Path(path)
+        self.use_only_tar_bz2 = use_only_tar_bz2
+        self._temp_path = self.path.with_name(
+            f"{self.path.name}.{os.urandom(2).hex()}.tmp"
+        )
+        self._file = self._temp_path.open("xb")
+        self._file.write(bytes(_HEADER.size))  # header placeholder
+        self._entries: list[tuple[int, str, str, bool]] = []
+        self._blob_offsets = array("Q", [0])
+
+    def add(self, group: int, fn: str, info: dict, blob: bytes | None = None):
+        """
+        Append one entry of ``packages`` (``GROUP_PACKAGES``) or
+        ``packages.conda`` (``GROUP_PACKAGES_CONDA``).
+
+        :param blob: ``info`` already serialized as JSON, if available.
+        """
+        if blob is None:
+            blob = _dumps(info)
+        self.add_blob(
+            group, fn, info["name"], info.get("record_version", 0) <= 1, blob
+        )
+
+    def add_blob(self, group: int, fn: str, name: str, supported: bool, blob: bytes):
+        """Append one serialized entry, e.g. copied from another index."""
+        self._file.write(blob)
+        self._blob_offsets.append(self._blob_offsets[-1] + len(blob))
+        self._entries.append((group, fn, name, supported))
+
+    def finish(
+        self, repodata_header: dict, meta: dict, keys: Iterable[str] | None = None
+    ):
+        """
+        Write tables and metadata, then move the index into place.
+
+        :param repodata_header: top-level repodata.json keys other than the
+            package groups.
+        :param keys: all top-level repodata.json keys, in document order.
+        """
+        entries = self._entries
+        records, counterparts = select_records(
+            entries, use_only_tar_bz2=self.use_only_tar_bz2
+        )
+
+        # str and UTF-8 sort alike
+        by_name: dict[str, list[int]] = {
+            name: [] for name in sorted({entry[2] for entry in entries})
+        }
+        for position, i in enumerate(records):
+            by_name[entries[i][2]].append(position)
+        name_ids = {name: i for i, name in enumerate(by_name)}
+        names = [name.encode("utf-8") for name in by_name]
+        fns = [fn.encode("utf-8") for _, fn, _, _ in entries]
+
+        fh = self._file
+        table = {"blobs": [_HEADER.size, self._blob_offsets[-1]]}
+        fh.write(_pad(self._blob_offsets[-1]))
+        for key, value in (
+            ("blob_offsets", self._blob_offsets),
+            ("fn_offsets", _offsets("I", fns)),
+            ("groups", array("B", (group for group, _, _, _ in entries))),
+            ("supported", array("B", (supported for _, _, _, supported in entries))),
+            ("entry_names", array("I", (name_ids[name] for _, _, name, _ in entries))),
+            ("counterparts", array("i", counterparts)),
+            ("records", array("I", records)),
+            ("name_offsets", _offsets("I", names)),
+            ("name_record_offsets", _offsets("I", by_name.values())),
+            ("name_records", array("I", (p for ps in by_name.values() for p in ps))),
+            ("fns", b"".join(fns)),
+            ("names", b"".join(names)),
+        ):
+            data = value.tobytes() if isinstance(value, array) else value
+            table[key] = [fh.tell(), len(value)]
+            fh.write(data)
+            fh.write(_pad(len(data)))
+
+        meta_offset = fh.tell()
+        meta_bytes = _dumps(
+            {
+                **meta,
+                "byteorder": sys.byteorder,
+                "keys": list(keys or (*repodata_header, *PACKAGE_GROUPS)),
+                "name_count": sum(1 for positions in by_name.values() if positions),
+                "use_only_tar_bz2": self.use_only_tar_bz2,
+                "repodata": repodata_header,
+                "sections": table,
+            }
+        )
+        fh.write(meta_bytes)
+        fh.seek(0)
+        fh.write(
+            _HEADER.pack(
+                INDEX_CACHE_MAGIC, INDEX_CACHE_VERSION, 0, meta_offset, len(meta_bytes)
+            )
+        )
+        fh.close()
+        os.replace(self._temp_path, self.path)
+
+    def close(self):
+        """Discard unfinished output."""
+        self._file.close()
+        try:
+            self._temp_path.unlink()
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class IndexCache(Mapping):
+    """
+    Read-only view of an index cache file.
+
+    As a mapping, ``index[name]`` returns the positions of that package name's
+    records; ``index.info(position)`` decodes a single record.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        try:
+            with self.path.open("rb") as fh:
+                self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            # ValueError: cannot mmap an empty file
+            raise IndexCacheError(f"Could not open index cache {self.path}: {e}")
+
+        try:
+            self._open()
+        except Exception as e:
+            self.close()
+            if isinstance(e, IndexCacheError):
+                raise
+            raise IndexCacheError(f"Corrupt index cache {self.path}: {e!r}")
+
+    def _open(self):
+        buffer = self._view = memoryview(self._mmap)
+        if len(buffer) < _HEADER.size:
+            raise IndexCacheError(f"Truncated index cache {self.path}")
+        magic, version, _, meta_offset, meta_len = _HEADER.unpack_from(buffer)
+        if magic != INDEX_CACHE_MAGIC or version != INDEX_CACHE_VERSION:
+            raise IndexCacheError(
+                f"Unsupported index cache {self.path} (version {version})"
+            )
+        if meta_offset + meta_len > len(buffer):
+            raise IndexCacheError(f"Truncated index cache {self.path}")
+        self.meta = json.loads(bytes(buffer[meta_offset : meta_offset + meta_len]))
+        if self.meta.get("byteorder") != sys.byteorder:
+            raise IndexCacheError(f"Index cache {self.path} has foreign byte order")
+
+        for key, (offset, length) in self.meta["sections"].items():
+            typecode = _SECTIONS[key]
+            size = length * (struct.calcsize(typecode) if typecode else 1)
+            if offset + size > meta_offset:
+                raise IndexCacheError(f"Truncated index cache {self.path}")
+            section = buffer[offset : offset + size]
+            setattr(self, f"_{key}", section.cast(typecode) if typecode else section)
+
+    def close(self):
+        for key in _SECTIONS:
+            section = self.__dict__.pop(f"_{key}", None)
+            if section is not None:
+                section.release()
+        view = self.__dict__.pop("_view", None)
+        if view is not None:
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:  # pragma: no cover
+            # a caller still holds a view; the mapping goes away with it
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def repodata_header(self) -> dict:
+        """Top-level repodata.json keys other than the package groups."""
+        return self.meta["repodata"]
+
+    @property
+    def repodata_keys(self) -> list[str]:
+        """All top-level repodata.json keys, in document order."""
+        return self.meta["keys"]
+
+    def __len__(self):
+        """Number of package names with records."""
+        return self.meta["name_count"]
+
+    def _name(self, i: int) -> bytes:
+        return bytes(self._names[self._name_offsets[i] : self._name_offsets[i + 1]])
+
+    def _has_records(self, i: int) -> bool:
+        return self._name_record_offsets[i] < self._name_record_offsets[i + 1]
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self._name_offsets) - 1):
+            if self._has_records(i):
+                yield self._name(i).decode("utf-8")
+
+    def _find(self, name: str) -> int:
+        key = name.encode("utf-8")
+        count = len(self._name_offsets) - 1
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < count and self._name(low) == key and self._has_records(low):
+            return low
+        return -1
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and self._find(name) >= 0
+
+    def __getitem__(self, name: str) -> list[int]:
+        i = self._find(name)
+        if i < 0:
+            raise KeyError(name)
+        begin, end = self._name_record_offsets[i], self._name_record_offsets[i + 1]
+        return self._name_records[begin:end].tolist()
+
+    @property
+    def record_count(self) -> int:
+        """Number of package records."""
+        return len(self._records)
+
+    def entry(self, position: int) -> int:
+        """Entry index of the record at ``position``."""
+        return self._records[position]
+
+    @property
+    def entry_count(self) -> int:
+        return len(self._groups)
+
+    def fn(self, entry: int) -> str:
+        begin, end = self._fn_offsets[entry], self._fn_offsets[entry + 1]
+        return str(self._fns[begin:end], "utf-8")
+
+    def group(self, entry: int) -> int:
+        return self._groups[entry]
+
+    def name(self, entry: int) -> str:
+        return self._name(self._entry_names[entry]).decode("utf-8")
+
+    def supported(self, entry: int) -> bool:
+        """False if the entry's ``record_version`` is newer than supported."""
+        return bool(self._supported[entry])
+
+    def counterpart(self, entry: int) -> int:
+        return self._counterparts[entry]
+
+    def blob(self, entry: int) -> bytes:
+        begin, end = self._blob_offsets[entry], self._blob_offsets[entry + 1]
+        return bytes(self._blobs[begin:end])
+
+    def info(self, entry: int) -> dict:
+        """Decode one repodata entry, as published."""
+        return json.loads(self.blob(entry))
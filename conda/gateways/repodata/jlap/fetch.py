@@ -3,7 +3,6 @@
 # Lappin' up the jlap
 from __future__ import annotations
 
-import io
 import json
 import logging
 import pathlib
@@ -15,19 +14,29 @@ from hashlib import blake2b
 from typing import Iterator
 
 import jsonpatch
-import zstandard
 from requests import HTTPError
 
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
 from conda.base.context import context
 from conda.gateways.connection import Response, Session
 from conda.gateways.repodata import (
     ETAG_KEY,
     LAST_MODIFIED_KEY,
+    NOMINAL_HASH,
+    ON_DISK_HASH,
+    HashWriter,
     RepodataCache,
     RepodataState,
+    write_response,
 )
 
+from ..index_cache import INDEX_CACHE_SUFFIX, IndexCache, IndexCacheError
 from .core import JLAP
+from .indexed import IndexPatcher, UnsupportedPatch, index_meta
 
 log = logging.getLogger(__name__)
 
@@ -36,8 +45,6 @@ DIGEST_SIZE = 32  # 256 bits
 
 JLAP_KEY = "jlap"
 HEADERS = "headers"
-NOMINAL_HASH = "blake2_256_nominal"
-ON_DISK_HASH = "blake2_256"
 LATEST = "latest"
 JLAP_UNAVAILABLE = "jlap_unavailable"
 ZSTD_UNAVAILABLE = "zstd_unavailable"
@@ -182,6 +189,56 @@ def apply_patches(data, apply):
         data = jsonpatch.JsonPatch(patch["patch"]).apply(data, in_place=True)
 
 
+def apply_patches_to_index(
+    cache: RepodataCache, have: str, apply: list, temp_path: pathlib.Path
+) -> str | None:
+    """
+    Apply patches to the repodata index of ``cache``, if it matches the
+    cached repodata.json, without parsing that json. Write patched
+    repodata.json to ``temp_path`` and a new index.
+
+    :return: hash of the file written to ``temp_path``, or None if patches
+        must be applied to parsed repodata instead.
+    """
+    try:
+        index = IndexCache(cache.cache_path_json.with_suffix(INDEX_CACHE_SUFFIX))
+    except IndexCacheError:
+        return None
+
+    with index:
+        state = cache.load_state()
+        if have != state.get(NOMINAL_HASH) or (
+            index.meta.get("mtime_ns"),
+            index.meta.get("size"),
+        ) != (state.get("mtime_ns"), state.get("size")):
+            log.debug("Repodata index does not match %s", cache.cache_path_json)
+            return None
+
+        patcher = IndexPatcher(index)
+        try:
+            for patch in reversed(apply):
+                patcher.apply(patch["patch"])
+        except (
+            UnsupportedPatch,
+            jsonpatch.JsonPatchException,
+            jsonpatch.JsonPointerException,
+        ) as e:
+            log.debug("Could not patch repodata index: %s", e)
+            return None
+
+        hasher = hash()
+        with temp_path.open("wb") as repodata:
+            writer, keys = patcher.write(HashWriter(repodata, hasher))
+
+    with writer:
+        try:
+            writer.finish(patcher.header, index_meta(index, temp_path), keys=keys)
+        except OSError:  # e.g. the index is still mapped, on Windows
+            log.debug("Could not replace repodata index", exc_info=True)
+            return None
+    return hasher.hexdigest()
+
+
 def withext(url, ext):
     return re.sub(r"(\.\w+)$", ext, url)
 
@@ -205,19 +262,6 @@ def build_headers(json_path: pathlib.Path, state: RepodataState):
     return headers
 
 
-class HashWriter(io.RawIOBase):
-    def __init__(self, backing, hasher):
-        self.backing = backing
-        self.hasher = hasher
-
-    def write(self, b: bytes):
-        self.hasher.update(b)
-        return self.backing.write(b)
-
-    def close(self):
-        self.backing.close()
-
-
 def download_and_hash(
     hasher,
     url,
@@ -243,16 +287,7 @@ def download_and_hash(
     length = 0
     # is there a status code for which we must clear the file?
     if response.status_code == 200:
-        if is_zst:
-            decompressor = zstandard.ZstdDecompressor()
-            writer = decompressor.stream_writer(
-                HashWriter(dest_path.open("wb"), hasher), closefd=True  # type: ignore
-            )
-        else:
-            writer = HashWriter(dest_path.open("wb"), hasher)
-        with writer as repodata:
-            for block in response.iter_content(chunk_size=1 << 14):
-                repodata.write(block)
+        write_response(response, dest_path, hasher, is_zst=is_zst)
     if response.request:
         log.info("Download %d bytes %r", length, response.request.headers)
     return response  # can be 304 not modified
@@ -287,7 +322,7 @@ def request_url_jlap_state(
                 state.pop(LAST_MODIFIED_KEY, None)
 
             try:
-                if state.should_check_format("zst"):
+                if zstandard is not None and state.should_check_format("zst"):
                     response = download_and_hash(
                         hasher,
                         withext(url, ".json.zst"),
@@ -404,6 +439,14 @@ def request_url_jlap_state(
             )
 
             if apply:
+                with timeme("Patch index "):
+                    on_disk_hash = apply_patches_to_index(cache, have, apply, temp_path)
+                if on_disk_hash:
+                    # only the touched entries were decoded; repodata is on disk
+                    state[ON_DISK_HASH] = on_disk_hash
+                    state[NOMINAL_HASH] = want
+                    return None
+
                 with timeme("Load "):
                     # we haven't loaded repodata yet; it could fail to parse, or
                     # have the wrong hash.
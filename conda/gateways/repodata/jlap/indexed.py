@@ -0,0 +1,216 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Apply jlap patches to the repodata index instead of parsed repodata.json.
+
+A jlap patch is a list of JSON patch (RFC 6902) operations, almost all of
+which add, remove or replace single package entries. Applied to an
+``IndexCache``, only the entries named by an operation are decoded; every other
+entry is copied to the new repodata.json and index as stored.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import logging
+from json.encoder import encode_basestring_ascii
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+import jsonpatch
+import jsonpointer
+
+from ..index_cache import PACKAGE_GROUPS, IndexCache, IndexCacheWriter
+
+log = logging.getLogger(__name__)
+
+# package entries per write() call
+_WRITE_BATCH = 1024
+
+# IndexCache.meta keys that describe the index itself, not the cache it is for
+_INDEX_META_KEYS = {
+    "byteorder",
+    "keys",
+    "name_count",
+    "repodata",
+    "sections",
+    "use_only_tar_bz2",
+}
+
+
+class UnsupportedPatch(ValueError):
+    """An operation spans several entries; apply it to parsed repodata instead."""
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _split(pointer: str) -> tuple[str, str, str] | None:
+    """
+    Split ``/packages/<fn>/rest`` into ``(group, fn, "/rest")``; None if the
+    pointer is not within a package group.
+    """
+    if not pointer:
+        raise UnsupportedPatch("Operation on the whole document")
+    parts = pointer.split("/", 3)
+    if _unescape(parts[1]) not in PACKAGE_GROUPS:
+        return None
+    if len(parts) < 3:
+        raise UnsupportedPatch(f"Operation on a whole package group: {pointer}")
+    rest = "/" + parts[3] if len(parts) == 4 else ""
+    return _unescape(parts[1]), _unescape(parts[2]), rest
+
+
+class IndexPatcher:
+    """
+    Repodata from an ``IndexCache``, with JSON patches applied.
+
+    Entries stay encoded until an operation touches them.
+    """
+
+    def __init__(self, index: IndexCache):
+        self.index = index
+        self.header = copy.deepcopy(index.repodata_header)
+        # group -> {fn: entry in index, or patched info}
+        self.groups: dict[str, dict[str, int | dict]] = {
+            group: {} for group in PACKAGE_GROUPS
+        }
+        for entry in range(index.entry_count):
+            self.groups[PACKAGE_GROUPS[index.group(entry)]][index.fn(entry)] = entry
+
+    def _decode(self, group: str, fn: str) -> dict:
+        try:
+            info = self.groups[group][fn]
+        except KeyError:
+            raise jsonpointer.JsonPointerException(f"Member {fn!r} not found")
+        if isinstance(info, int):
+            info = self.groups[group][fn] = self.index.info(info)
+        return info
+
+    def _apply_entry(self, operation: dict, group: str, fn: str, path: str):
+        entries = self.groups[group]
+        op = operation["op"]
+        if path:
+            # within one entry
+            info = self._decode(group, fn)
+            jsonpatch.apply_patch(info, [{**operation, "path": path}], in_place=True)
+        elif op == "remove":
+            self._decode(group, fn)
+            del entries[fn]
+        elif op == "replace":
+            self._decode(group, fn)
+            entries[fn] = copy.deepcopy(operation["value"])
+        elif op == "add":
+            entries[fn] = copy.deepcopy(operation["value"])
+        elif op == "test":
+            if self._decode(group, fn) != operation["value"]:
+                raise jsonpatch.JsonPatchTestFailed(f"{operation!r} failed")
+        else:
+            raise UnsupportedPatch(f"Unsupported operation on an entry: {op}")
+
+    def apply(self, patch: Iterable[dict]):
+        """Apply one list of JSON patch operations."""
+        for operation in patch:
+            target = _split(operation["path"])
+            if "from" not in operation:
+                if target is None:
+                    jsonpatch.apply_patch(self.header, [operation], in_place=True)
+                else:
+                    self._apply_entry(operation, *target)
+                continue
+
+            source = _split(operation["from"])
+            if target is None and source is None:
+                jsonpatch.apply_patch(self.header, [operation], in_place=True)
+            elif target and source and target[:2] == source[:2]:
+                # move or copy within one entry
+                group, fn, path = target
+                info = self._decode(group, fn)
+                jsonpatch.apply_patch(
+                    info,
+                    [{**operation, "path": path, "from": source[2]}],
+                    in_place=True,
+                )
+            else:
+                raise UnsupportedPatch(
+                    f"Operation across entries: {operation['op']} "
+                    f"{operation.get('from')} {operation['path']}"
+                )
+
+    def write(self, json_file: BinaryIO) -> tuple[IndexCacheWriter, list[str]]:
+        """
+        Write patched repodata.json to ``json_file``, and the same entries to
+        a new index next to the current one.
+
+        :return: the unfinished ``IndexCacheWriter`` and the top-level keys
+            written; call ``finish()`` once the repodata.json it describes is
+            complete.
+        """
+        index = self.index
+        writer = IndexCacheWriter(index.path, use_only_tar_bz2=self.use_only_tar_bz2)
+        # original key order, then keys added by patches
+        keys = [
+            key
+            for key in index.repodata_keys
+            if key in self.header or key in PACKAGE_GROUPS
+        ]
+        keys.extend(key for key in self.header if key not in keys)
+        keys.extend(
+            key for key in PACKAGE_GROUPS if key not in keys and self.groups[key]
+        )
+        try:
+            json_file.write(b"{")
+            for i, key in enumerate(keys):
+                json_file.write((b"," if i else b"") + _encode(key) + b":")
+                if key in PACKAGE_GROUPS:
+                    self._write_group(json_file, writer, key)
+                else:
+                    json_file.write(_encode(self.header[key]))
+            json_file.write(b"}")
+        except BaseException:
+            writer.close()
+            raise
+        return writer, keys
+
+    def _write_group(self, json_file: BinaryIO, writer: IndexCacheWriter, group: str):
+        index = self.index
+        group_id = PACKAGE_GROUPS.index(group)
+        json_file.write(b"{")
+        members = []
+        separator = b""
+        for fn, info in self.groups[group].items():
+            if isinstance(info, int):
+                blob = index.blob(info)
+                name = index.name(info)
+                supported = index.supported(info)
+            else:
+                blob = _encode(info)
+                name = info["name"]
+                supported = info.get("record_version", 0) <= 1
+            writer.add_blob(group_id, fn, name, supported, blob)
+            members.append(encode_basestring_ascii(fn).encode() + b":" + blob)
+            if len(members) >= _WRITE_BATCH:
+                json_file.write(separator + b",".join(members))
+                members.clear()
+                separator = b","
+        if members:
+            json_file.write(separator + b",".join(members))
+        json_file.write(b"}")
+
+    @property
+    def use_only_tar_bz2(self) -> bool:
+        return bool(self.index.meta.get("use_only_tar_bz2"))
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def index_meta(index: IndexCache, json_path: Path) -> dict:
+    """Validation fields of ``index``, updated for a new ``json_path``."""
+    meta = {k: v for k, v in index.meta.items() if k not in _INDEX_META_KEYS}
+    stat = json_path.stat()
+    meta["mtime_ns"] = stat.st_mtime_ns
+    meta["size"] = stat.st_size
+    return meta
@@ -0,0 +1,48 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Fetch the repodata of many channel subdirs at once, ahead of parsing.
+
+Issues the conditional requests (ETag/Last-Modified, ``.jlap``, ``.zst``
+probes) of every subdir from a thread pool, so that fetching N subdirs takes
+roughly as long as the slowest single request. Parsing is left to the caller,
+once every response is on disk.
+
+``requests`` is blocking; each fetch runs on a worker thread, which keeps its
+own pooled ``CondaSession``.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Sequence
+
+from ...common.io import ThreadLimitedThreadPoolExecutor
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from . import RepodataFetch, RepodataState
+
+
+def fetch_all(
+    fetchers: Sequence[RepodataFetch], max_workers: int | None = None
+) -> list[tuple[Path, RepodataState] | Exception]:
+    """
+    Call ``fetch_latest_path()`` on every fetcher concurrently.
+
+    :param max_workers: limit on simultaneous requests; all at once if None.
+    :return: ``(path, state)`` or the raised exception, in the order of
+        ``fetchers``.
+    """
+    if not fetchers:
+        return []
+    with ThreadLimitedThreadPoolExecutor(
+        max_workers=max_workers or len(fetchers)
+    ) as executor:
+        futures = [executor.submit(fetcher.fetch_latest_path) for fetcher in fetchers]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
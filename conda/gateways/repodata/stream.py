@@ -0,0 +1,179 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+"""
+Incremental repodata.json parser.
+
+``json.loads`` on a large repodata.json builds every package dictionary at
+once. This parser reads the file in chunks and decodes one package entry at a
+time, so peak memory stays proportional to the chunk size and the largest
+single entry instead of the size of the whole document.
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+from .index_cache import PACKAGE_GROUPS, IndexCacheWriter
+
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class _Scanner:
+    """Decode consecutive JSON tokens from a text stream."""
+
+    def __init__(self, stream: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.start = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Read another chunk, dropping consumed input. False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.start = self.pos = 0
+        return True
+
+    def _error(self, message: str):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        if self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if char not in " \t\n\r":
+                return char
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise self._error("Unexpected end of document")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise self._error(f"Expecting {char!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # a value ending exactly at the end of the buffer may continue in
+            # the next chunk, e.g. a number
+            if end < len(self.buffer) or not self._fill():
+                self.start, self.pos = self.pos, end
+                return value
+
+    def text(self) -> str:
+        """JSON text of the value most recently returned by ``value()``."""
+        return self.buffer[self.start : self.pos]
+
+    def key(self) -> str:
+        key = self.value()
+        if not isinstance(key, str):
+            raise self._error("Expecting property name enclosed in double quotes")
+        self.expect(":")
+        return key
+
+    def members(self) -> Iterator[str]:
+        """
+        Iterate over the keys of an object; the caller must consume each value
+        before advancing.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            yield self.key()
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                self.pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+
+def iter_repodata(
+    stream: TextIO, chunk_size: int = CHUNK_SIZE, *, text: bool = False
+) -> Iterator[tuple]:
+    """
+    Parse repodata.json incrementally.
+
+    Yields ``(group, fn, info)`` for each entry of the ``packages`` and
+    ``packages.conda`` objects, in document order, and ``(None, key, value)``
+    for every other top-level key.
+
+    :param text: also yield the JSON text of each value as a fourth element,
+        e.g. to store package entries without serializing them again.
+    :raises json.JSONDecodeError: if the document is not valid JSON.
+    """
+    scanner = _Scanner(stream, chunk_size)
+    for key in scanner.members():
+        if key in PACKAGE_GROUPS and scanner.peek() == "{":
+            for fn in scanner.members():
+                value = scanner.value()
+                yield (key, fn, value, scanner.text()) if text else (key, fn, value)
+        else:
+            value = scanner.value()
+            yield (None, key, value, scanner.text()) if text else (None, key, value)
+    try:
+        scanner.peek()
+    except json.JSONDecodeError:
+        return  # end of document
+    raise scanner._error("Extra data")
+
+
+def iter_repodata_path(
+    path: Path | str, chunk_size: int = CHUNK_SIZE, *, text: bool = False
+) -> Iterator[tuple]:
+    """``iter_repodata`` over a file on disk."""
+    with Path(path).open(encoding="utf-8") as stream:
+        yield from iter_repodata(stream, chunk_size, text=text)
+
+
+def write_index_cache_path(
+    path: Path | str,
+    json_path: Path | str,
+    meta: dict,
+    *,
+    use_only_tar_bz2: bool = False,
+) -> None:
+    """
+    Write an index of the repodata.json at ``json_path`` to ``path``, parsing
+    it incrementally. Takes only picklable arguments, so that several subdirs
+    can be indexed in worker processes.
+
+    :param meta: see ``write_index_cache()``.
+    """
+    with IndexCacheWriter(path, use_only_tar_bz2=use_only_tar_bz2) as writer:
+        header = {}
+        keys = {}  # top-level keys in document order
+        for group, key, value, text in iter_repodata_path(json_path, text=True):
+            if group is None:
+                header[key] = value
+                keys.setdefault(key)
+            else:
+                keys.setdefault(group)
+                writer.add(PACKAGE_GROUPS.index(group), key, value, text.encode())
+        writer.finish(header, meta, keys=keys)
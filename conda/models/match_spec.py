@@ -4,7 +4,7 @@ import re
 import warnings
 from abc import ABCMeta, abstractmethod, abstractproperty
 from collections.abc import Mapping
-from functools import reduce
+from functools import lru_cache, reduce
 from itertools import chain
 from logging import getLogger
 from operator import attrgetter
@@ -20,9 +20,9 @@ from ..common.compat import isiterable
 from ..common.io import dashlist
 from ..common.path import expand, is_package_file, strip_pkg_extension, url_to_path
 from ..common.url import is_url, path_to_url, unquote
-from ..exceptions import CondaValueError, InvalidMatchSpec
+from ..exceptions import CondaValueError, InvalidMatchSpec, InvalidVersionSpec
 from .channel import Channel
-from .version import BuildNumberMatch, VersionSpec
+from .version import BuildNumberMatch, VersionOrder, VersionSpec
 
 log = getLogger(__name__)
 
@@ -40,13 +40,13 @@ class MatchSpecType(type):
                 new_kwargs.update(**kwargs)
                 return super().__call__(**new_kwargs)
             elif isinstance(spec_arg, str):
-                parsed = _parse_spec_str(spec_arg)
-                if kwargs:
-                    parsed = dict(parsed, **kwargs)
-                    if set(kwargs) - {"optional", "target"}:
-                        # if kwargs has anything but optional and target,
-                        # strip out _original_spec_str from parsed
-                        parsed.pop("_original_spec_str", None)
+                if not kwargs:
+                    return _match_spec_from_str(cls, spec_arg)
+                parsed = dict(_parse_spec_str(spec_arg), **kwargs)
+                if set(kwargs) - {"optional", "target"}:
+                    # if kwargs has anything but optional and target,
+                    # strip out _original_spec_str from parsed
+                    parsed.pop("_original_spec_str", None)
                 return super().__call__(**parsed)
             elif isinstance(spec_arg, Mapping):
                 parsed = dict(spec_arg, **kwargs)
@@ -254,11 +254,56 @@ class MatchSpec(metaclass=MatchSpecType):
         return True
 
     def _match_individual(self, record, field_name, match_component):
-        val = getattr(record, field_name)
-        try:
-            return match_component.match(val)
-        except AttributeError:
-            return match_component == val
+        return _match_value(match_component, getattr(record, field_name))
+
+    def filter(self, records):
+        """
+        The records in ``records`` that this spec matches, in order.
+
+        Equivalent to ``[rec for rec in records if self.match(rec)]``, but each
+        field is matched once per distinct value in the records' column of it
+        rather than once per record, and version specs made of intervals match
+        the sorted versions by bisection. Pass a ``RecordColumns`` to reuse the
+        columns for other specs.
+        """
+        if not isinstance(records, RecordColumns):
+            records = RecordColumns(records)
+        matching = range(len(records.records))
+        for field_name, match_component in self._match_components.items():
+            try:
+                codes, values = records.column(field_name)
+            except AttributeError:
+                # not a field of every record; leave it to the ones still matching
+                matching = [
+                    i
+                    for i in matching
+                    if self._match_individual(
+                        records.records[i], field_name, match_component
+                    )
+                ]
+                continue
+
+            matches = None
+            intervals = getattr(match_component, "intervals", None)
+            if field_name == "version" and intervals is not None:
+                matches = records.version_matches(intervals)
+            if matches is None:
+                matches = [None] * len(values)
+
+            still_matching = []
+            for i in matching:
+                code = codes[i]
+                match = matches[code]
+                if match is None:
+                    match = matches[code] = bool(
+                        _match_value(match_component, values[code])
+                    )
+                if match:
+                    still_matching.append(i)
+            matching = still_matching
+            if not matching:
+                break
+        return [records.records[i] for i in matching]
 
     def _is_simple(self):
         return (
@@ -524,6 +569,82 @@ class MatchSpec(metaclass=MatchSpecType):
         )
 
 
+def _match_value(match_component, value):
+    try:
+        return match_component.match(value)
+    except AttributeError:
+        return match_component == value
+
+
+class RecordColumns:
+    """
+    The records to filter with ``MatchSpec.filter()``, with a column of values
+    for each of their fields that specs have matched on.
+    """
+
+    def __init__(self, records):
+        from .records import PackageRecord
+
+        # TODO: consider AttrDict instead of PackageRecord, as in MatchSpec.match
+        self.records = tuple(
+            PackageRecord.from_objects(rec) if isinstance(rec, dict) else rec
+            for rec in records
+        )
+        self._columns = {}
+        self._sorted_versions = None
+
+    def column(self, field_name):
+        """
+        The distinct values of a field, and the index into them of the value of
+        each record, as a ``(codes, values)`` tuple.
+        """
+        try:
+            return self._columns[field_name]
+        except KeyError:
+            pass
+        codes = []
+        values = []
+        value_codes = {}
+        try:
+            for rec in self.records:
+                value = getattr(rec, field_name)
+                code = value_codes.get(value)
+                if code is None:
+                    code = value_codes[value] = len(values)
+                    values.append(value)
+                codes.append(code)
+        except TypeError:
+            # unhashable values; one per record
+            values = [getattr(rec, field_name) for rec in self.records]
+            codes = range(len(values))
+        column = self._columns[field_name] = codes, values
+        return column
+
+    def version_matches(self, intervals):
+        """
+        Whether each distinct version of the ``version`` column is in
+        ``intervals``; None if not all of the versions are valid.
+        """
+        if self._sorted_versions is None:
+            _, values = self.column("version")
+            try:
+                version_orders = [VersionOrder(value) for value in values]
+            except InvalidVersionSpec:
+                self._sorted_versions = False
+            else:
+                order = sorted(range(len(values)), key=version_orders.__getitem__)
+                self._sorted_versions = order, [version_orders[i] for i in order]
+        if not self._sorted_versions:
+            return None
+
+        order, sorted_versions = self._sorted_versions
+        matches = [False] * len(order)
+        for start, stop in intervals.index_ranges(sorted_versions):
+            for position in range(start, stop):
+                matches[order[position]] = True
+        return matches
+
+
 def _parse_version_plus_build(v_plus_b):
     """This should reliably pull the build string out of a version + build string combo.
     Examples:
@@ -576,7 +697,21 @@ def _parse_channel(channel_val):
     return channel_name, chn.subdir
 
 
-_PARSE_CACHE = {}
+#: Number of MatchSpec objects kept by ``_match_spec_from_str``, and of parsed
+#: spec strings kept by ``_parse_spec_str``.
+MATCH_SPEC_CACHE_SIZE = 1 << 16
+
+_PARSE_CACHE = {}  # the oldest entries are dropped past MATCH_SPEC_CACHE_SIZE
+
+
+@lru_cache(maxsize=MATCH_SPEC_CACHE_SIZE)
+def _match_spec_from_str(cls, spec_str):
+    """
+    ``cls(spec_str)``, shared by all callers since MatchSpec objects are not
+    changed after they are made. See ``_match_spec_from_str.cache_info()``
+    for hits and misses.
+    """
+    return type.__call__(cls, **_parse_spec_str(spec_str))
 
 
 def _parse_spec_str(spec_str):
@@ -779,6 +914,8 @@ def _parse_spec_str(spec_str):
         del brackets["name"]
     components.update(brackets)
     components["_original_spec_str"] = original_spec_str
+    if len(_PARSE_CACHE) >= MATCH_SPEC_CACHE_SIZE:
+        del _PARSE_CACHE[next(iter(_PARSE_CACHE))]
     _PARSE_CACHE[original_spec_str] = components
     return components
 
@@ -11,24 +11,29 @@
 
 """
 
+from enum import Enum
 from os.path import basename, join
+from types import SimpleNamespace
 
 try:
     from boltons.timeutils import dt_to_timestamp, isoparse
 except ImportError:  # pragma: no cover
     from .._vendor.boltons.timeutils import dt_to_timestamp, isoparse
 
+from ..auxlib import NULL
 from ..auxlib.entity import (
     BooleanField,
     ComposableField,
     DictSafeMixin,
     Entity,
     EnumField,
+    Field,
     IntegerField,
     ListField,
     NumberField,
     StringField,
 )
+from ..auxlib.exceptions import ValidationError
 from ..base.context import context
 from ..common.compat import isiterable
 from ..exceptions import PathNotFoundError
@@ -417,6 +422,115 @@ class PackageRecord(DictSafeMixin, Entity):
         )
 
 
+class RepodataRecord(PackageRecord):
+    """
+    A read-only PackageRecord of a channel's repodata, as made for the index.
+
+    Fields are boxed once, when the record is made, and kept in slots rather than an
+    instance dict; reading them skips the Field descriptors. Records are still
+    PackageRecords for matching, solving and hashing, and PrefixRecord.from_objects()
+    copies them into full records when they are written to conda-meta.
+    """
+
+    __slots__ = (*PackageRecord.__fields__, "__initd", "_PackageRecord__pkey", "_hash")
+
+    def __init__(self, **kwargs):
+        field_keys, defaults, derived, required, nullable = self._init_fields()
+        values = defaults.copy()
+        for key, val in kwargs.items():
+            try:
+                name, field, is_alias = field_keys[key]
+            except KeyError:
+                continue
+            if is_alias and name in kwargs:
+                continue
+            try:
+                val = field.box(self, RepodataRecord, val)
+                values[name] = field.validate(self, val)
+            except ValidationError:
+                if kwargs[key] is not None or field.required:
+                    raise
+
+        # derived fields read the others, through their descriptors
+        fields = SimpleNamespace(**values)
+        for name, field in derived:
+            try:
+                values[name] = field.__get__(fields, RepodataRecord)
+            except AttributeError:
+                values.pop(name, None)
+
+        for name in required:
+            if values.get(name) is None:
+                raise ValidationError(
+                    name,
+                    msg="{} requires a {} field. Instantiated with "
+                    "{}".format(self.__class__.__name__, name, kwargs),
+                )
+
+        setattr_ = object.__setattr__
+        for name, val in values.items():
+            if val is not None or name in nullable:
+                setattr_(self, name, val)
+
+    @classmethod
+    def _init_fields(cls):
+        try:
+            return RepodataRecord.__init_fields
+        except AttributeError:
+            pass
+        field_keys, defaults, derived, required, nullable = {}, {}, [], [], set()
+        for name, field in PackageRecord.__fields__.items():
+            field_keys[name] = name, field, False
+            field_keys.update((alias, (name, field, True)) for alias in field._aliases)
+            if field.default is not NULL and not callable(field.default):
+                defaults[name] = field.default
+            if type(field).__get__ is not Field.__get__:
+                derived.append((name, field))
+            if field.required and field.default is NULL:
+                required.append(name)
+            if field.nullable:
+                nullable.add(name)
+        RepodataRecord.__init_fields = field_keys, defaults, derived, required, nullable
+        return RepodataRecord.__init_fields
+
+    def __setattr__(self, name, value):
+        if name in PackageRecord.__fields__ and self._initd:
+            raise AttributeError(
+                f"Assignment not allowed. {self.__class__.__name__} is read-only."
+            )
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        if name in PackageRecord.__fields__ and self._initd:
+            raise AttributeError(
+                f"Deletion not allowed. {self.__class__.__name__} is read-only."
+            )
+        object.__delattr__(self, name)
+
+    def __getstate__(self):
+        return {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if hasattr(self, name)
+        }
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_RepodataRecord__initd", True)
+
+    def __repr__(self):
+        kwarg_str = ", ".join(
+            f"{name}={val.value!r}" if isinstance(val, Enum) else f"{name}={val!r}"
+            for name, field, val in (
+                (name, field, getattr(self, name, NULL))
+                for name, field in PackageRecord.__fields__.items()
+            )
+            if val is not NULL and val is not field.default
+        )
+        return f"{self.__class__.__name__}({kwarg_str})"
+
+
 class Md5Field(StringField):
     def __init__(self):
         super().__init__(required=False, nullable=True)
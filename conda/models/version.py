@@ -4,8 +4,11 @@ from __future__ import annotations
 
 import operator as op
 import re
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
 from itertools import zip_longest
 from logging import getLogger
+from threading import Lock
 
 from ..exceptions import InvalidVersionSpec
 
@@ -26,16 +29,87 @@ version_split_re = re.compile("([0-9]+|[*]+|[^0-9*]+)")
 version_cache = {}
 
 
+CacheInfo = namedtuple(
+    "CacheInfo", ("hits", "misses", "evictions", "maxsize", "currsize")
+)
+
+
+class StrArgCache:
+    """
+    Thread-safe cache of the objects made by ``SingleStrArgCachingType`` for
+    each string, holding at most ``maxsize`` of them. When full, the least
+    recently used object is evicted, so frequently used versions and specs
+    stay cached. ``maxsize`` may be changed at any time to set the memory
+    budget of a class; ``None`` makes the cache unbounded.
+    """
+
+    def __init__(self, maxsize: int | None):
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def maxsize(self) -> int | None:
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize: int | None):
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def add(self, key, value):
+        """Cache ``value`` unless ``key`` already is; returns the cached value."""
+        with self._lock:
+            value = self._data.setdefault(key, value)
+            self._evict()
+            return value
+
+    def _evict(self):
+        if self._maxsize is not None:
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions, self._maxsize, len(self._data)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
 class SingleStrArgCachingType(type):
     def __call__(cls, arg):
         if isinstance(arg, cls):
             return arg
         elif isinstance(arg, str):
-            try:
-                return cls._cache_[arg]
-            except KeyError:
-                val = cls._cache_[arg] = super().__call__(arg)
-                return val
+            val = cls._cache_.get(arg)
+            if val is None:
+                val = cls._cache_.add(arg, super().__call__(arg))
+            return val
         else:
             return super().__call__(arg)
 
@@ -145,7 +219,7 @@ class VersionOrder(metaclass=SingleStrArgCachingType):
       1.0.1_ < 1.0.1a =>  True   # ensure correct ordering for openssl
     """
 
-    _cache_ = {}
+    _cache_ = StrArgCache(maxsize=1 << 16)
 
     def __init__(self, vstr):
         # version comparison is case-insensitive
@@ -439,6 +513,175 @@ OPERATOR_MAP = {
 OPERATOR_START = frozenset(("=", "<", ">", "!", "~"))
 
 
+class VersionIntervals:
+    """
+    A union of disjoint intervals of versions, sorted in ascending order.
+
+    Each interval is a ``(lower, lower_closed, upper, upper_closed)`` tuple of
+    ``VersionOrder`` bounds, where a ``None`` bound is unbounded. Relational
+    version specs compile to these, so that they can be matched by bisection
+    and intersected (``,``) and united (``|``) exactly.
+    """
+
+    __slots__ = ("intervals",)
+
+    def __init__(self, intervals=()):
+        self.intervals = tuple(intervals)
+
+    @classmethod
+    def from_operator(cls, operator_str, vo):
+        """The versions ``op(version, vo)`` is true for; None for non-relational ops."""
+        if operator_str == "==":
+            return cls(((vo, True, vo, True),))
+        elif operator_str == "!=":
+            return cls(((None, False, vo, False), (vo, False, None, False)))
+        elif operator_str in ("<", "<="):
+            return cls(((None, False, vo, operator_str == "<="),))
+        elif operator_str in (">", ">="):
+            return cls(((vo, operator_str == ">=", None, False),))
+        return None
+
+    def is_empty(self):
+        return not self.intervals
+
+    def is_everything(self):
+        return (
+            len(self.intervals) == 1
+            and self.intervals[0][0] is None
+            and self.intervals[0][2] is None
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.intervals!r})"
+
+    def __contains__(self, vo):
+        # bisect for the first interval that vo is below the upper bound of
+        intervals = self.intervals
+        lo, hi = 0, len(intervals)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            _, _, upper, upper_closed = intervals[mid]
+            if upper is None or (not upper < vo if upper_closed else vo < upper):
+                hi = mid
+            else:
+                lo = mid + 1
+        if lo == len(intervals):
+            return False
+        lower, lower_closed = intervals[lo][:2]
+        return lower is None or (not vo < lower if lower_closed else lower < vo)
+
+    def index_ranges(self, versions):
+        """
+        ``(start, stop)`` index ranges of the versions in the sorted sequence of
+        ``VersionOrder`` objects ``versions`` that are in these intervals.
+        """
+        ranges = []
+        for lower, lower_closed, upper, upper_closed in self.intervals:
+            if lower is None:
+                start = 0
+            elif lower_closed:
+                start = bisect_left(versions, lower)
+            else:
+                start = bisect_right(versions, lower)
+            if upper is None:
+                stop = len(versions)
+            elif upper_closed:
+                stop = bisect_right(versions, upper)
+            else:
+                stop = bisect_left(versions, upper)
+            if start < stop:
+                ranges.append((start, stop))
+        return ranges
+
+    def intersection(self, other):
+        intervals = []
+        i = j = 0
+        while i < len(self.intervals) and j < len(other.intervals):
+            a, b = self.intervals[i], other.intervals[j]
+            lower = max(_LowerBound(*a[:2]), _LowerBound(*b[:2]))
+            a_upper, b_upper = _UpperBound(*a[2:]), _UpperBound(*b[2:])
+            upper = min(a_upper, b_upper)
+            if not _is_empty(lower.vo, lower.closed, upper.vo, upper.closed):
+                intervals.append((lower.vo, lower.closed, upper.vo, upper.closed))
+            # move past the interval that ends first
+            if b_upper < a_upper:
+                j += 1
+            else:
+                i += 1
+        return VersionIntervals(intervals)
+
+    def union(self, other):
+        intervals = sorted(
+            self.intervals + other.intervals, key=lambda i: _LowerBound(*i[:2])
+        )
+        merged = []
+        for interval in intervals:
+            if merged and _touches(merged[-1], interval):
+                last = merged[-1]
+                upper = max(_UpperBound(*last[2:]), _UpperBound(*interval[2:]))
+                merged[-1] = (last[0], last[1], upper.vo, upper.closed)
+            else:
+                merged.append(interval)
+        return VersionIntervals(merged)
+
+
+VersionIntervals.everything = VersionIntervals(((None, False, None, False),))
+
+
+class _LowerBound:
+    # orders lower bounds: unbounded first, then closed before open
+    __slots__ = ("vo", "closed")
+
+    def __init__(self, vo, closed):
+        self.vo = vo
+        self.closed = closed
+
+    def __lt__(self, other):
+        if other.vo is None:
+            return False
+        if self.vo is None:
+            return True
+        if self.vo == other.vo:
+            return self.closed and not other.closed
+        return self.vo < other.vo
+
+    def __gt__(self, other):
+        return other < self
+
+
+class _UpperBound(_LowerBound):
+    # orders upper bounds: open before closed, then unbounded last
+    __slots__ = ()
+
+    def __lt__(self, other):
+        if self.vo is None:
+            return False
+        if other.vo is None:
+            return True
+        if self.vo == other.vo:
+            return other.closed and not self.closed
+        return self.vo < other.vo
+
+
+def _is_empty(lower, lower_closed, upper, upper_closed):
+    if lower is None or upper is None:
+        return False
+    if lower == upper:
+        return not (lower_closed and upper_closed)
+    return upper < lower
+
+
+def _touches(a, b):
+    # whether b, which does not start before a, overlaps or adjoins a
+    upper, upper_closed = a[2], a[3]
+    lower, lower_closed = b[0], b[1]
+    if upper is None or lower is None:
+        return True
+    if lower == upper:
+        return upper_closed or lower_closed
+    return lower < upper
+
+
 class BaseSpec:
     def __init__(self, spec_str, matcher, is_exact):
         self.spec_str = spec_str
@@ -502,7 +745,7 @@ class BaseSpec:
 
 
 class VersionSpec(BaseSpec, metaclass=SingleStrArgCachingType):
-    _cache_ = {}
+    _cache_ = StrArgCache(maxsize=1 << 14)
 
     def __init__(self, vspec):
         vspec_str, matcher, is_exact = self.get_matcher(vspec)
@@ -512,13 +755,15 @@ class VersionSpec(BaseSpec, metaclass=SingleStrArgCachingType):
         if isinstance(vspec, str) and regex_split_re.match(vspec):
             vspec = treeify(vspec)
 
+        # the versions this spec matches, if it only relates versions to others
+        self.intervals = None
+
         if isinstance(vspec, tuple):
             vspec_tree = vspec
-            _matcher = self.any_match if vspec_tree[0] == "|" else self.all_match
             tup = tuple(VersionSpec(s) for s in vspec_tree[1:])
             vspec_str = untreeify((vspec_tree[0],) + tuple(t.spec for t in tup))
             self.tup = tup
-            matcher = _matcher
+            matcher = self._compile_tree(vspec_tree[0] == "|")
             is_exact = False
             return vspec_str, matcher, is_exact
 
@@ -560,9 +805,13 @@ class VersionSpec(BaseSpec, metaclass=SingleStrArgCachingType):
                     vspec_str, "invalid operator: %s" % operator_str
                 )
             self.matcher_vo = VersionOrder(vo_str)
+            self.intervals = VersionIntervals.from_operator(
+                operator_str, self.matcher_vo
+            )
             matcher = self.operator_match
             is_exact = operator_str == "=="
         elif vspec_str == "*":
+            self.intervals = VersionIntervals.everything
             matcher = self.always_true_match
             is_exact = False
         elif "*" in vspec_str.rstrip("*"):
@@ -594,6 +843,7 @@ class VersionSpec(BaseSpec, metaclass=SingleStrArgCachingType):
         elif "@" not in vspec_str:
             self.operator_func = OPERATOR_MAP["=="]
             self.matcher_vo = VersionOrder(vspec_str)
+            self.intervals = VersionIntervals.from_operator("==", self.matcher_vo)
             matcher = self.operator_match
             is_exact = True
         else:
@@ -601,6 +851,54 @@ class VersionSpec(BaseSpec, metaclass=SingleStrArgCachingType):
             is_exact = True
         return vspec_str, matcher, is_exact
 
+    def _compile_tree(self, is_union):
+        # Fold the children that are intervals into one VersionIntervals, so
+        # that they are matched by one bisection; the others are matched as is.
+        intervals = None
+        self._others = []
+        for spec in self.tup:
+            if spec.intervals is None:
+                self._others.append(spec)
+            elif intervals is None:
+                intervals = spec.intervals
+            elif is_union:
+                intervals = intervals.union(spec.intervals)
+            else:
+                intervals = intervals.intersection(spec.intervals)
+
+        if intervals is not None and (
+            intervals.is_everything() if is_union else intervals.is_empty()
+        ):
+            # decides the match regardless of the other children
+            self._others = []
+        if not self._others:
+            self.intervals = intervals
+            if intervals.is_everything():
+                return self.always_true_match
+            return self.interval_match
+        if intervals is not None and not (
+            intervals.is_empty() if is_union else intervals.is_everything()
+        ):
+            self._interval_spec = intervals
+        else:
+            self._interval_spec = None
+        return self.any_match if is_union else self.all_match
+
+    def interval_match(self, spec_str):
+        return VersionOrder(str(spec_str)) in self.intervals
+
+    def any_match(self, spec_str):
+        intervals = self._interval_spec
+        if intervals is not None and VersionOrder(str(spec_str)) in intervals:
+            return True
+        return any(s.match(spec_str) for s in self._others)
+
+    def all_match(self, spec_str):
+        intervals = self._interval_spec
+        if intervals is not None and VersionOrder(str(spec_str)) not in intervals:
+            return False
+        return all(s.match(spec_str) for s in self._others)
+
     def merge(self, other):
         assert isinstance(other, self.__class__)
         return self.__class__(",".join(sorted((self.raw_value, other.raw_value))))
@@ -618,7 +916,7 @@ VersionMatch = VersionSpec
 
 
 class BuildNumberMatch(BaseSpec, metaclass=SingleStrArgCachingType):
-    _cache_ = {}
+    _cache_ = StrArgCache(maxsize=1 << 10)
 
     def __init__(self, vspec):
         vspec_str, matcher, is_exact = self.get_matcher(vspec)
@@ -4,9 +4,12 @@ from __future__ import annotations
 
 import copy
 import itertools
+from bisect import bisect_left
 from collections import defaultdict, deque
+from contextlib import contextmanager
 from functools import lru_cache
 from logging import DEBUG, getLogger
+from time import monotonic
 
 from tqdm import tqdm
 
@@ -21,12 +24,15 @@ from .common.io import dashlist, time_recorder
 from .common.logic import (
     TRUE,
     Clauses,
+    PortfolioSolver,
     PycoSatSolver,
     PyCryptoSatSolver,
+    PySatIncrementalSolver,
     PySatSolver,
     minimal_unsatisfiable_subset,
 )
 from .common.toposort import toposort
+from .deprecations import deprecated
 from .exceptions import (
     CondaDependencyError,
     InvalidSpec,
@@ -35,7 +41,7 @@ from .exceptions import (
 )
 from .models.channel import Channel, MultiChannel
 from .models.enums import NoarchType, PackageType
-from .models.match_spec import MatchSpec
+from .models.match_spec import MatchSpec, RecordColumns
 from .models.records import PackageRecord
 from .models.version import VersionOrder
 
@@ -50,9 +56,36 @@ _sat_solvers = {
     SatSolverChoice.PYCOSAT: PycoSatSolver,
     SatSolverChoice.PYCRYPTOSAT: PyCryptoSatSolver,
     SatSolverChoice.PYSAT: PySatSolver,
+    SatSolverChoice.PYSAT_INCREMENTAL: PySatIncrementalSolver,
+    SatSolverChoice.PORTFOLIO: PortfolioSolver,
 }
 
 
+# gen_clauses() results of recent indexes, inside reuse_clauses() only; see
+# Resolve._gen_clauses_key()
+_gen_clauses_cache = None  # dict[tuple, tuple[Clauses, dict[PackageRecord, int]]]
+_GEN_CLAUSES_CACHE_SIZE = 4
+
+
+@contextmanager
+def reuse_clauses():
+    """
+    Let Resolve.gen_clauses() reuse the clauses of equal indexes, e.g. across
+    the retries of one install, until the outermost block exits. Also usable
+    as a function decorator.
+    """
+    global _gen_clauses_cache
+
+    if _gen_clauses_cache is not None:
+        yield
+        return
+    _gen_clauses_cache = {}
+    try:
+        yield
+    finally:
+        _gen_clauses_cache = None
+
+
 @lru_cache(maxsize=None)
 def _get_sat_solver_cls(sat_solver_choice=SatSolverChoice.PYCOSAT):
     def try_out_solver(sat_solver):
@@ -121,6 +154,12 @@ class Resolve:
 
         groups = groupby(lambda x: x.name, index.values())
         trackers = defaultdict(list)
+        # dict[package_name, dict[version, int]], see version_key()
+        self._version_ranks = {
+            name: self._rank_versions(group) for name, group in groups.items()
+        }
+        # dict[package_name, list[VersionOrder]], built as version_key() needs it
+        self._version_orders = {}
 
         for name in groups:
             unmanageable_precs = [prec for prec in groups[name] if prec.is_unmanageable]
@@ -135,10 +174,15 @@ class Resolve:
         self.groups = groups  # dict[package_name, list[PackageRecord]]
         self.trackers = trackers  # dict[track_feature, set[PackageRecord]]
         self._cached_find_matches = {}  # dict[MatchSpec, set[PackageRecord]]
+        self._group_columns = {}  # dict[package_name, RecordColumns]
         self.ms_depends_ = {}  # dict[PackageRecord, list[MatchSpec]]
         self._reduced_index_cache = {}
         self._pool_cache = {}
         self._strict_channel_cache = {}
+        self._valid_specs = {}  # dict[tuple[PackageRecord, MatchSpec], bool]
+        # SAT variables of the records, numbered by gen_clauses()
+        self._sat_ids = {}  # dict[PackageRecord, int]
+        self._sat_precs = [None]  # list[PackageRecord | None], by SAT variable
 
         self._system_precs = {
             _
@@ -154,8 +198,13 @@ class Resolve:
         # reduction based on the latest packages, which may reduce the space
         # more, because more modern packages utilize constraints in more sane
         # ways (for example, using run_exports in conda-build 3)
+        version_keys = self._version_keys = {}  # dict[PackageRecord, tuple]
         for name, group in self.groups.items():
-            self.groups[name] = sorted(group, key=self.version_key, reverse=True)
+            for prec in group:
+                version_keys[prec] = self.version_key(prec)
+            self.groups[name] = sorted(
+                group, key=version_keys.__getitem__, reverse=True
+            )
 
     def __hash__(self):
         return (
@@ -230,17 +279,24 @@ class Resolve:
     def valid2(self, spec_or_prec, filter_out, optional=True):
         def is_valid(_spec_or_prec):
             if isinstance(_spec_or_prec, MatchSpec):
-                return is_valid_spec(_spec_or_prec)
+                return is_valid_spec(None, _spec_or_prec)
             else:
                 return is_valid_prec(_spec_or_prec)
 
-        @memoizemethod
-        def is_valid_spec(_spec):
-            return (
-                optional
-                and _spec.optional
-                or any(is_valid_prec(_prec) for _prec in self.find_matches(_spec))
-            )
+        # results are remembered per dependency of each record on the Resolve,
+        # not on the MatchSpec objects, which are shared between records
+        valid_specs = self._valid_specs
+
+        def is_valid_spec(_prec, _spec):
+            key = _prec, _spec
+            val = valid_specs.get(key)
+            if val is None:
+                val = valid_specs[key] = (
+                    optional
+                    and _spec.optional
+                    or any(is_valid_prec(_dep) for _dep in self.find_matches(_spec))
+                )
+            return val
 
         def is_valid_prec(prec):
             val = filter_out.get(prec)
@@ -248,7 +304,7 @@ class Resolve:
                 filter_out[prec] = False
                 try:
                     has_valid_deps = all(
-                        is_valid_spec(ms) for ms in self.ms_depends(prec)
+                        is_valid_spec(prec, ms) for ms in self.ms_depends(prec)
                     )
                 except InvalidSpec:
                     val = filter_out[prec] = "invalid dep specs"
@@ -906,7 +962,12 @@ class Resolve:
 
         spec_name = spec.get_exact_value("name")
         if spec_name:
-            candidate_precs = self.groups.get(spec_name, ())
+            # the columns of a group are shared by all specs of its name
+            candidate_precs = self._group_columns.get(spec_name)
+            if candidate_precs is None:
+                candidate_precs = self._group_columns[spec_name] = RecordColumns(
+                    self.groups.get(spec_name, ())
+                )
         elif spec.get_exact_value("track_features"):
             feature_names = spec.get_exact_value("track_features")
             candidate_precs = itertools.chain.from_iterable(
@@ -915,7 +976,7 @@ class Resolve:
         else:
             candidate_precs = self.index.values()
 
-        res = tuple(p for p in candidate_precs if spec.match(p))
+        res = tuple(spec.filter(candidate_precs))
         self._cached_find_matches[spec] = res
         return res
 
@@ -927,25 +988,76 @@ class Resolve:
             self.ms_depends_[prec] = deps
         return deps
 
+    @staticmethod
+    def _rank_versions(precs):
+        """
+        Dense ranks of the versions of ``precs``: 0 for the lowest, and equal
+        ranks for versions that compare equal, like 1.0 and 1.0.0.
+        """
+        ranks = {}
+        rank = -1
+        previous = None
+        for version in sorted({prec.version for prec in precs}, key=VersionOrder):
+            version_order = VersionOrder(version)
+            if previous is None or version_order != previous:
+                rank += 1
+                previous = version_order
+            ranks[version] = rank
+        return ranks
+
+    @staticmethod
+    def _ranked_version_orders(ranks):
+        """The VersionOrder of each rank of _rank_versions(), lowest first."""
+        version_orders = [None] * (max(ranks.values(), default=-1) + 1)
+        for version, rank in ranks.items():
+            if version_orders[rank] is None:
+                version_orders[rank] = VersionOrder(version)
+        return version_orders
+
+    @staticmethod
+    def _rank_new_version(version_orders, version):
+        """
+        Rank of ``version`` among the ``version_orders`` of each rank: the rank
+        of an equal version, else halfway between the ranks around it.
+        """
+        version_order = VersionOrder(version)
+        rank = bisect_left(version_orders, version_order)
+        if rank < len(version_orders) and version_orders[rank] == version_order:
+            return rank
+        return rank - 0.5
+
     def version_key(self, prec, vtype=None):
+        """
+        Sorting key of the records of one package name, newest last. Versions
+        are compared by their rank among the versions of the name in the index;
+        a version not in the index ranks between its neighbours there, and the
+        versions of a name not in the index are compared as VersionOrder.
+        """
         channel = prec.channel
         channel_priority = self._channel_priorities_map.get(
             channel.name, 1
         )  # TODO: ask @mcg1969 why the default value is 1 here  # NOQA
         valid = 1 if channel_priority < MAX_CHANNEL_PRIORITY else 0
-        version_comparator = VersionOrder(prec.get("version", ""))
+        ranks = self._version_ranks.get(prec.name)
+        if ranks is None:
+            version_rank = VersionOrder(prec.version)
+        else:
+            version_rank = ranks.get(prec.version)
+            if version_rank is None:
+                if prec.name not in self._version_orders:
+                    self._version_orders[prec.name] = self._ranked_version_orders(ranks)
+                version_orders = self._version_orders[prec.name]
+                version_rank = self._rank_new_version(version_orders, prec.version)
         build_number = prec.get("build_number", 0)
         build_string = prec.get("build")
         noarch = -int(prec.subdir == "noarch")
         if self._channel_priority != ChannelPriority.DISABLED:
-            vkey = [valid, -channel_priority, version_comparator, build_number, noarch]
+            vkey = (valid, -channel_priority, version_rank, build_number, noarch)
         else:
-            vkey = [valid, version_comparator, -channel_priority, build_number, noarch]
+            vkey = (valid, version_rank, -channel_priority, build_number, noarch)
         if self._solver_ignore_timestamps:
-            vkey.append(build_string)
-        else:
-            vkey.extend((prec.get("timestamp", 0), build_string))
-        return vkey
+            return (*vkey, build_string)
+        return (*vkey, prec.get("timestamp", 0), build_string)
 
     @staticmethod
     def _make_channel_priorities(channels):
@@ -985,6 +1097,7 @@ class Resolve:
             raise NotImplementedError()
 
     @staticmethod
+    @deprecated("23.9", "24.3", addendum="Unused.")
     def to_feature_metric_id(prec_dist_str, feat):
         return f"@fm@{prec_dist_str}@{feat}"
 
@@ -994,7 +1107,7 @@ class Resolve:
         m = C.from_name(sat_name)
         if m is not None:
             # the spec has already been pushed onto the clauses stack
-            return sat_name
+            return m
 
         simple = spec._is_single()
         nm = spec.get_exact_value("name")
@@ -1020,34 +1133,85 @@ class Resolve:
                 m = TRUE
             elif not simple:
                 ms2 = MatchSpec(track_features=tf) if tf else MatchSpec(nm)
-                m = C.from_name(self.push_MatchSpec(C, ms2))
+                m = self.push_MatchSpec(C, ms2)
         if m is None:
-            sat_names = [self.to_sat_name(prec) for prec in libs]
+            sat_ids = self._sat_ids
+            lits = [sat_ids[prec] for prec in libs]
             if spec.optional:
                 ms2 = MatchSpec(track_features=tf) if tf else MatchSpec(nm)
-                sat_names.append("!" + self.to_sat_name(ms2))
-            m = C.Any(sat_names)
+                lits.append(C.Not(self.to_sat_name(ms2)))
+            m = C.Any(lits)
         C.name_var(m, sat_name)
-        return sat_name
+        return m
+
+    def _solution_precs(self, solution):
+        """Records installed in a SAT solution to the clauses of gen_clauses()."""
+        sat_precs = self._sat_precs
+        count = len(sat_precs)
+        return [
+            sat_precs[lit] for lit in solution if 0 < lit < count and sat_precs[lit]
+        ]
+
+    def _gen_clauses_key(self, sat_solver):
+        """
+        Everything the clauses of gen_clauses() depend on: the order of the
+        records, which sets the SAT variable numbers and the order of clauses,
+        and what every record depends on, including the features it tracks.
+        Records are compared by their channel, subdir, name, version and build,
+        so equal records of another index, e.g. a retry with the full
+        repodata.json, share clauses.
+        """
+        return (
+            sat_solver,
+            tuple(self.index),
+            tuple(
+                (
+                    prec,
+                    tuple(prec.depends),
+                    tuple(prec.constrains),
+                    prec.features,
+                    prec.track_features,
+                )
+                for group in self.groups.values()
+                for prec in group
+            ),
+        )
 
     @time_recorder(module_name=__name__)
     def gen_clauses(self):
-        C = Clauses(sat_solver=_get_sat_solver_cls(context.sat_solver))
+        sat_solver = _get_sat_solver_cls(context.sat_solver)
+        cache = _gen_clauses_cache
+        if cache is not None:
+            key = self._gen_clauses_key(sat_solver)
+            cached = cache.get(key)
+        else:
+            cached = None
+        if cached is not None:
+            log.debug("gen_clauses reusing clauses of an equal index")
+            C, sat_ids = cached
+            self._set_sat_ids({prec: sat_ids[prec] for prec in self.index}, C.m)
+            return C.copy()
+
+        C = Clauses(sat_solver=sat_solver)
+        # packages are only known to the clauses by number; see _solution_precs()
+        sat_ids = {}
         for name, group in self.groups.items():
-            group = [self.to_sat_name(prec) for prec in group]
             # Create one variable for each package
-            for sat_name in group:
-                C.new_var(sat_name)
+            lits = []
+            for prec in group:
+                sat_ids[prec] = m = C.new_var()
+                lits.append(m)
             # Create one variable for the group
             m = C.new_var(self.to_sat_name(MatchSpec(name)))
 
             # Exactly one of the package variables, OR
             # the negation of the group variable, is true
-            C.Require(C.ExactlyOne, group + [C.Not(m)])
+            C.Require(C.ExactlyOne, lits + [-m])
+        self._set_sat_ids(sat_ids, C.m)
 
         # If a package is installed, its dependencies must be as well
         for prec in self.index.values():
-            nkey = C.Not(self.to_sat_name(prec))
+            nkey = -sat_ids[prec]
             for ms in self.ms_depends(prec):
                 # Virtual packages can't be installed, we ignore them
                 if not ms.name.startswith("__"):
@@ -1057,8 +1221,20 @@ class Resolve:
             log.debug(
                 "gen_clauses returning with clause count: %d", C.get_clause_count()
             )
+        if cache is not None:
+            while len(cache) >= _GEN_CLAUSES_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[key] = C.copy(), sat_ids
         return C
 
+    def _set_sat_ids(self, sat_ids, m):
+        self._sat_ids = sat_ids
+        sat_precs = self._sat_precs = [None] * (m + 1)
+        for prec, lit in sat_ids.items():
+            # virtual packages, from the "@" channel, are left out of solutions
+            if prec.channel.canonical_name != "@":
+                sat_precs[lit] = prec
+
     def generate_spec_constraints(self, C, specs):
         result = [(self.push_MatchSpec(C, ms),) for ms in specs]
         if log.isEnabledFor(DEBUG):
@@ -1069,10 +1245,11 @@ class Resolve:
         return result
 
     def generate_feature_count(self, C):
-        result = {
-            self.push_MatchSpec(C, MatchSpec(track_features=name)): 1
-            for name in self.trackers.keys()
-        }
+        result = {}
+        for name in self.trackers.keys():
+            # features with the same trackers share a literal; add up their counts
+            lit = self.push_MatchSpec(C, MatchSpec(track_features=name))
+            result[lit] = result.get(lit, 0) + 1
         if log.isEnabledFor(DEBUG):
             log.debug(
                 "generate_feature_count returning with clause count: %d",
@@ -1081,9 +1258,14 @@ class Resolve:
         return result
 
     def generate_update_count(self, C, specs):
-        return {
-            "!" + ms.target: 1 for ms in specs if ms.target and C.from_name(ms.target)
-        }
+        eq = {}
+        for ms in specs:
+            if ms.target:
+                for prec in self.groups.get(ms.name, ()):
+                    if prec.dist_str() == ms.target:
+                        eq[-self._sat_ids[prec]] = 1
+                        break
+        return eq
 
     def generate_feature_metric(self, C):
         eq = {}  # a C.minimize() objective: dict[varname, coeff]
@@ -1093,26 +1275,21 @@ class Resolve:
         # - At least one package in the group DOES require the feature
         # - A package that tracks the feature is installed
         for name, group in self.groups.items():
-            prec_feats = {self.to_sat_name(prec): set(prec.features) for prec in group}
+            prec_feats = {self._sat_ids[prec]: set(prec.features) for prec in group}
             active_feats = set.union(*prec_feats.values()).intersection(self.trackers)
             for feat in active_feats:
                 clause_id_for_feature = self.push_MatchSpec(
                     C, MatchSpec(track_features=feat)
                 )
-                for prec_sat_name, features in prec_feats.items():
+                for prec_id, features in prec_feats.items():
                     if feat not in features:
-                        feature_metric_id = self.to_feature_metric_id(
-                            prec_sat_name, feat
-                        )
-                        C.name_var(
-                            C.And(prec_sat_name, clause_id_for_feature),
-                            feature_metric_id,
-                        )
-                        eq[feature_metric_id] = 1
+                        # different pairs may share a literal; add up their scores
+                        lit = C.And(prec_id, clause_id_for_feature)
+                        eq[lit] = eq.get(lit, 0) + 1
         return eq
 
     def generate_removal_count(self, C, specs):
-        return {"!" + self.push_MatchSpec(C, ms.name): 1 for ms in specs}
+        return {-self.push_MatchSpec(C, ms.name): 1 for ms in specs}
 
     def generate_install_count(self, C, specs):
         return {self.push_MatchSpec(C, ms.name): 1 for ms in specs if ms.optional}
@@ -1143,7 +1320,8 @@ class Resolve:
             #             rec.append(dist)
 
         for name, targets in sdict.items():
-            pkgs = [(self.version_key(p), p) for p in self.groups.get(name, [])]
+            version_keys = self._version_keys
+            pkgs = [(version_keys[p], p) for p in self.groups.get(name, [])]
             pkey = None
             # keep in mind that pkgs is already sorted according to version_key (a tuple,
             #    so composite sort key).  Later entries in the list are, by definition,
@@ -1172,17 +1350,17 @@ class Resolve:
                 elif not self._solver_ignore_timestamps and pkey[5] != version_key[5]:
                     it += 1
 
-                prec_sat_name = self.to_sat_name(prec)
+                prec_id = self._sat_ids[prec]
                 if ic or include0:
-                    eqc[prec_sat_name] = ic
+                    eqc[prec_id] = ic
                 if iv or include0:
-                    eqv[prec_sat_name] = iv
+                    eqv[prec_id] = iv
                 if ib or include0:
-                    eqb[prec_sat_name] = ib
+                    eqb[prec_id] = ib
                 if ia or include0:
-                    eqa[prec_sat_name] = ia
+                    eqa[prec_id] = ia
                 if it or include0:
-                    eqt[prec_sat_name] = it
+                    eqt[prec_id] = it
                 pkey = version_key
 
         return eqc, eqv, eqb, eqa, eqt
@@ -1311,11 +1489,7 @@ class Resolve:
             snames = set()
             eq_optional_c = r2.generate_removal_count(C, specs)
             solution, _ = C.minimize(eq_optional_c, C.sat())
-            snames.update(
-                sat_name_map[sat_name]["name"]
-                for sat_name in (C.from_index(s) for s in solution)
-                if sat_name and sat_name[0] != "!" and "@" not in sat_name
-            )
+            snames.update(prec.name for prec in r2._solution_precs(solution))
             # Existing behavior: keep all specs and their dependencies
             for spec in new_specs:
                 get_(MatchSpec(spec).name, snames)
@@ -1437,6 +1611,10 @@ class Resolve:
         if not specs:
             return ()
 
+        deadline = None
+        if context.solve_time_budget_secs > 0:
+            deadline = monotonic() + context.solve_time_budget_secs
+
         # Find the compliant packages
         log.debug("Solve: Getting reduced index of compliant packages")
         len0 = len(specs)
@@ -1478,11 +1656,7 @@ class Resolve:
 
         # Return a solution of packages
         def clean(sol):
-            return [
-                q
-                for q in (C.from_index(s) for s in sol)
-                if q and q[0] != "!" and "@" not in q
-            ]
+            return r2._solution_precs(sol)
 
         def is_converged(solution):
             """Determine if the SAT problem has converged to a single solution.
@@ -1493,13 +1667,14 @@ class Resolve:
             has not converged as multiple solutions still exist.
             """
             psolution = clean(solution)
-            nclause = tuple(C.Not(C.from_name(q)) for q in psolution)
+            nclause = tuple(-r2._sat_ids[prec] for prec in psolution)
             if C.sat((nclause,), includeIf=False) is None:
                 return True
             return False
 
         r2 = Resolve(reduced_index, True, channels=self.channels)
         C = r2.gen_clauses()
+        C.deadline = deadline
         solution = mysat(specs, True)
         if not solution:
             if should_retry_solve:
@@ -1620,8 +1795,15 @@ class Resolve:
         psolutions = []
         psolution = clean(solution)
         psolutions.append(psolution)
-        while True:
-            nclause = tuple(C.Not(C.from_name(q)) for q in psolution)
+        if C.timed_out:
+            # alternate solutions would only differ in what was not optimized
+            log.warning(
+                "The solve time budget of %s seconds (solve_time_budget_secs) "
+                "ran out; the solution may not be optimal.",
+                context.solve_time_budget_secs,
+            )
+        while not C.timed_out:
+            nclause = tuple(-r2._sat_ids[prec] for prec in psolution)
             solution = C.sat((nclause,), True)
             if solution is None:
                 break
@@ -1633,7 +1815,7 @@ class Resolve:
             psolutions.append(psolution)
 
         if nsol > 1:
-            psols2 = list(map(set, psolutions))
+            psols2 = [{prec.dist_str() for prec in psol} for psol in psolutions]
             common = set.intersection(*psols2)
             diffs = [sorted(set(sol) - common) for sol in psols2]
             if not context.json:
@@ -1650,8 +1832,6 @@ class Resolve:
         # def stripfeat(sol):
         #     return sol.split('[')[0]
 
-        new_index = {self.to_sat_name(prec): prec for prec in self.index.values()}
-
         if returnall:
             if len(psolutions) > 1:
                 raise RuntimeError()
@@ -1661,6 +1841,4 @@ class Resolve:
             #         for psol in psolutions]
 
             # return sorted(Dist(stripfeat(dname)) for dname in psolutions[0])
-        return sorted(
-            (new_index[sat_name] for sat_name in psolutions[0]), key=lambda x: x.name
-        )
+        return sorted(psolutions[0], key=lambda x: x.name)
@@ -116,7 +116,7 @@ class SimpleEnvironment:
         """Turn record into data, to be written in the JSON environment/repo files."""
         data = {
             key: value
-            for key, value in vars(record).items()
+            for key, value in record.dump().items()
             if key in self.REPO_DATA_KEYS
         }
         if "subdir" not in data:
@@ -0,0 +1,48 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from pytest import MonkeyPatch
+
+from conda.core.subdir_data import SubdirData
+from conda.models.channel import Channel
+from conda.testing import CondaCLIFixture
+from conda.testing.helpers import CHANNEL_DIR
+
+
+def test_index_cache_warm(
+    conda_cli: CondaCLIFixture, monkeypatch: MonkeyPatch, tmp_path: Path
+):
+    monkeypatch.setenv("CONDA_PKGS_DIRS", str(tmp_path))
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+    argv = (
+        "index-cache",
+        "warm",
+        "--override-channels",
+        f"--channel={CHANNEL_DIR}",
+        "--subdir=linux-64",
+        "--repodata-fn=repodata.json",
+        "--json",
+    )
+    out, err, code = conda_cli(*argv)
+    results = json.loads(out)
+    assert code == 0
+    assert sorted(result["url"].rsplit("/", 2)[1] for result in results) == [
+        "linux-64",
+        "noarch",
+    ]
+    assert all(result["updated"] for result in results)
+
+    # indexed, so that records load without parsing repodata.json
+    sd = SubdirData(Channel(f"{CHANNEL_DIR}/linux-64"))
+    assert sd.cache_path_index.exists()
+    assert str(tmp_path) in str(sd.cache_path_index)
+
+    out, err, code = conda_cli(*argv)
+    assert code == 0
+    assert not any("error" in result for result in json.loads(out))
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
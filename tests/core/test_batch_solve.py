@@ -0,0 +1,43 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+from multiprocessing import get_all_start_methods
+from threading import Thread
+from unittest.mock import Mock
+
+import pytest
+
+from conda.api import BatchSolver
+from conda.core.subdir_data import SubdirData
+from conda.exceptions import ResolvePackageNotFound
+from conda.models.channel import Channel
+from conda.testing.helpers import CHANNEL_DIR
+
+SPECS_LIST = [("zlib",), ("zlib", "libgcc-ng"), ("not-a-package",), ()]
+
+
+@pytest.mark.parametrize(
+    "max_workers",
+    [
+        1,
+        pytest.param(
+            2,
+            marks=pytest.mark.skipif(
+                "fork" not in get_all_start_methods(), reason="cannot fork"
+            ),
+        ),
+    ],
+)
+def test_batch_solve(max_workers):
+    solver = BatchSolver((Channel(CHANNEL_DIR),), ("linux-64", "noarch"))
+    solver._internal.resolve
+    # a background refresh of the repodata is waited for before forking
+    subdir_data = next(iter(SubdirData._cache_.values()))
+    subdir_data._revalidation = refresh = Mock(spec=Thread)
+    zlib, zlib_libgcc, missing, empty = solver.solve(
+        SPECS_LIST, max_workers=max_workers
+    )
+    assert [prec.name for prec in zlib] == ["libgcc-ng", "zlib"]
+    assert zlib_libgcc == zlib
+    assert isinstance(missing, ResolvePackageNotFound)
+    assert empty == ()
+    assert refresh.join.called == (max_workers > 1)
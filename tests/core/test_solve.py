@@ -4,7 +4,7 @@ import copy
 import platform
 import sys
 from pprint import pprint
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -17,12 +17,13 @@ from conda.core.solve import DepsModifier, UpdateModifier
 from conda.exceptions import SpecsConfigurationConflictError, UnsatisfiableError
 from conda.models.channel import Channel
 from conda.models.enums import PackageType
-from conda.models.records import PrefixRecord
+from conda.models.records import PackageRecord, PrefixRecord
 from conda.resolve import MatchSpec
 from conda.testing.helpers import (
     CHANNEL_DIR,
     add_subdir_to_iter,
     convert_to_dist_str,
+    get_index_r_1,
     get_solver,
     get_solver_2,
     get_solver_4,
@@ -77,6 +78,22 @@ def test_solve_1(tmpdir):
         assert convert_to_dist_str(final_state) == order
 
 
+def test_solve_time_budget(tmpdir, caplog):
+    specs = (MatchSpec("numpy"),)
+
+    with env_var(
+        "CONDA_SOLVE_TIME_BUDGET_SECS",
+        "1e-9",
+        stack_callback=conda_tests_ctxt_mgmt_def_pol,
+    ):
+        with get_solver(tmpdir, specs) as solver:
+            final_state = solver.solve_final_state()
+    # not optimized, but still a consistent environment
+    names = {prec.name for prec in final_state}
+    assert {"numpy", "python"} <= names
+    assert "solution may not be optimal" in caplog.text
+
+
 def test_solve_2(tmpdir):
     specs = (MatchSpec("numpy"),)
 
@@ -3207,3 +3224,167 @@ def test_indirect_dep_optimized_by_version_over_package_count(tmpdir):
                 assert prec.build_number == 1
             elif prec.name == "_dummy_anaconda_impl":
                 assert prec.version == "2.0"
+
+
+def test_gen_clauses_cache():
+    from conda import resolve
+    from conda.resolve import Resolve, reuse_clauses
+
+    index, r = get_index_r_1()
+    specs = (MatchSpec("numpy"),)
+    reduced_index = r.get_reduced_index(specs)
+
+    # clauses are only kept inside reuse_clauses()
+    Resolve(reduced_index, True, channels=r.channels).gen_clauses()
+    assert resolve._gen_clauses_cache is None
+
+    with reuse_clauses():
+        cache = resolve._gen_clauses_cache
+        r1 = Resolve(reduced_index, True, channels=r.channels)
+        C1 = r1.gen_clauses()
+        assert len(cache) == 1
+
+        # equal records from another index reuse the clauses, and are the
+        # records that solutions are made of
+        other_index = {
+            new_prec: new_prec
+            for new_prec in map(PackageRecord.from_objects, reduced_index)
+        }
+        with reuse_clauses():
+            r2 = Resolve(other_index, True, channels=r.channels)
+            C2 = r2.gen_clauses()
+        assert resolve._gen_clauses_cache is cache
+        assert len(cache) == 1
+        assert C2 is not C1
+        assert list(C2.as_list()) == list(C1.as_list())
+        assert {id(prec) for prec in r2._sat_precs if prec} <= set(
+            map(id, other_index)
+        )
+        solution = C2.sat(r2.generate_spec_constraints(C2, specs))
+        assert "numpy" in {prec.name for prec in r2._solution_precs(solution)}
+
+        # the cached clauses are not changed by using the copies
+        assert C1.get_clause_count() == r2.gen_clauses().get_clause_count()
+
+        # records that depend on something else make new clauses
+        numpy = next(prec for prec in other_index if prec.name == "numpy")
+        numpy.depends = ()
+        Resolve(other_index, True, channels=r.channels).gen_clauses()
+        assert len(cache) == 2
+
+        # as do records that track other features
+        numpy.track_features = ("nomkl",)
+        Resolve(other_index, True, channels=r.channels).gen_clauses()
+        assert len(cache) == 3
+    assert resolve._gen_clauses_cache is None
+
+    # as a decorator, e.g. of the install command
+    @reuse_clauses()
+    def install():
+        return resolve._gen_clauses_cache
+
+    assert install() == {}
+    assert resolve._gen_clauses_cache is None
+
+
+def test_solve_retry_after_refresh(tmpdir):
+    from conda.core.subdir_data import SubdirData
+
+    # after the expired repodata of a failed solve was updated, the index is
+    # loaded again and the solve retried
+    with get_solver(tmpdir, (MatchSpec("numpy"),)) as solver:
+        solver.solve_final_state()
+        solve_final_state = solver.solve_final_state
+        prepared = []
+
+        def fail_once(*args):
+            prepared.append(solver._prepared)
+            if len(prepared) == 1:
+                raise UnsatisfiableError({})
+            return solve_final_state(*args)
+
+        with patch.object(solver, "solve_final_state", fail_once), patch.object(
+            SubdirData, "refresh_stale", return_value=True
+        ):
+            _, link_precs = solver.solve_for_diff()
+    assert prepared == [True, False]
+    assert solver._prepared
+    assert "numpy" in {prec.name for prec in link_precs}
+
+
+def test_sat_ids():
+    from conda.resolve import Resolve
+
+    index, r = get_index_r_1()
+    virtual = PackageRecord(
+        name="__virtual", version="1", build="0", build_number=0, channel="@"
+    )
+    index = {**r.get_reduced_index((MatchSpec("numpy"),)), virtual: virtual}
+    r = Resolve(index, True, channels=r.channels)
+    C = r.gen_clauses()
+
+    # every record has its own variable, which maps back to it
+    assert sorted(r._sat_ids.values()) == sorted(set(r._sat_ids.values()))
+    for prec, lit in r._sat_ids.items():
+        assert r._sat_precs[lit] is (None if prec is virtual else prec)
+    # the other variables, e.g. of groups and specs, map to no record
+    assert sum(prec is not None for prec in r._sat_precs) == len(index) - 1
+
+    # solutions are made of the records of the index, without virtual ones
+    specs = (MatchSpec("numpy"), MatchSpec("__virtual"))
+    solution = C.sat(r.generate_spec_constraints(C, specs))
+    assert r._sat_ids[virtual] in solution
+    precs = r._solution_precs(solution)
+    assert "numpy" in {prec.name for prec in precs}
+    assert virtual not in precs
+    assert {r._sat_ids[prec] for prec in precs} == {
+        r._sat_ids[prec] for prec in index if prec is not virtual
+    }.intersection(solution)
+    assert len(precs) == len(set(precs))
+
+    # the update count penalizes dropping the record a spec targets, as the
+    # "!<dist>" variables did; specs without a known target are not counted
+    numpy = next(prec for prec in index if prec.name == "numpy")
+    target = MatchSpec("numpy", target=numpy.dist_str())
+    missing = MatchSpec("numpy", target="channel-1::numpy-0.1-py27_0")
+    assert r.generate_update_count(C, (target, missing, MatchSpec("python"))) == {
+        -r._sat_ids[numpy]: 1
+    }
+    assert r.generate_update_count(C, (missing,)) == {}
+
+
+def test_rank_versions():
+    from conda.resolve import Resolve
+
+    precs = [
+        PackageRecord(name="a", version=version, build="0", build_number=0)
+        for version in ("1.10", "2.0a1", "1.0", "1.2", "1.0.0", "1.2")
+    ]
+    assert Resolve._rank_versions(precs) == {
+        "1.0": 0,
+        "1.0.0": 0,
+        "1.2": 1,
+        "1.10": 2,
+        "2.0a1": 3,
+    }
+
+    # records outside the index rank among its versions
+    version_orders = Resolve._ranked_version_orders(Resolve._rank_versions(precs))
+    assert Resolve._rank_new_version(version_orders, "1.2.0") == 1
+    assert Resolve._rank_new_version(version_orders, "1.5") == 1.5
+    assert Resolve._rank_new_version(version_orders, "0.1") == -0.5
+    assert Resolve._rank_new_version(version_orders, "3") == 3.5
+
+    index, r = get_index_r_1()
+    numpy = [prec for prec in index if prec.name == "numpy"]
+    newer = PackageRecord.from_objects(max(numpy, key=r.version_key), version="99")
+    older = PackageRecord.from_objects(newer, version="0.0.1")
+    other = PackageRecord(name="not-in-index", version="1", build="0", build_number=0)
+    assert sorted([newer, *numpy, older], key=r.version_key) == [
+        older,
+        *sorted(numpy, key=r.version_key),
+        newer,
+    ]
+    assert r.version_key(other) < r.version_key(
+        PackageRecord.from_objects(other, version="2")
+    )
@@ -0,0 +1,87 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import pytest
+
+from conda.base.context import conda_tests_ctxt_mgmt_def_pol
+from conda.common.io import env_vars
+from conda.core.solve import Solver
+from conda.core.solve_cache import SolveCache, fingerprint
+from conda.core.subdir_data import SubdirData
+from conda.models.channel import Channel
+from conda.models.match_spec import MatchSpec
+from conda.testing import helpers
+from conda.testing.solver_helpers import SimpleEnvironment
+
+
+def test_fingerprint():
+    assert fingerprint({"a": [1, "b"], "c": MatchSpec("d")}) == fingerprint(
+        {"c": "d", "a": [1, "b"]}
+    )
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+
+
+def test_solve_cache_entry(tmp_path):
+    cache = SolveCache(tmp_path)
+    prec = helpers.record(name="a")
+    assert cache.get("key", lambda ref: prec) is None
+
+    cache.put("key", [prec], [MatchSpec("b")])
+    assert cache.get("key", lambda ref: prec) == ([prec], (MatchSpec("b"),))
+    # a record that no longer exists invalidates the entry
+    assert cache.get("key", lambda ref: None) is None
+
+    (tmp_path / "key.json").write_text("{")
+    assert cache.get("key", lambda ref: prec) is None
+
+
+@pytest.fixture
+def solve_cache_env(tmp_path):
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+    with env_vars(
+        {"CONDA_PKGS_DIRS": str(tmp_path / "pkgs"), "CONDA_SOLVE_CACHE": "true"},
+        stack_callback=conda_tests_ctxt_mgmt_def_pol,
+    ):
+        yield SimpleEnvironment(tmp_path, Solver)
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+
+def test_solve_cache(solve_cache_env, monkeypatch):
+    env = solve_cache_env
+    env.repo_packages = [
+        helpers.record(name="a", depends=["b"]),
+        helpers.record(name="b", version="1.0"),
+    ]
+    solves = []
+    run_sat = Solver._run_sat
+
+    def counting_run_sat(self, ssc):
+        solves.append(self.specs_to_add)
+        return run_sat(self, ssc)
+
+    monkeypatch.setattr(Solver, "_run_sat", counting_run_sat)
+
+    def solve(*specs):
+        # unlike env.install(), leaves the repodata on disk alone
+        return Solver(
+            prefix=env._prefix_path,
+            channels=[Channel(str(env._channels_path / "test"))],
+            subdirs=env.subdirs,
+            specs_to_add=specs,
+        ).solve_final_state()
+
+    first = env.install("a", as_specs=True)
+    assert len(solves) == 1
+    assert solve("a") == first
+    assert len(solves) == 1
+    assert list(SolveCache().path.glob("*.json"))
+
+    # other specs
+    solve("b")
+    assert len(solves) == 2
+
+    # new repodata
+    env.repo_packages.append(helpers.record(name="b", version="2.0"))
+    assert "test::b-2.0-0" in env.install("a")
+    assert len(solves) == 3
@@ -1,11 +1,16 @@
 # Copyright (C) 2012 Anaconda, Inc
 # SPDX-License-Identifier: BSD-3-Clause
+import json
+import os
+import subprocess
+import sys
+import threading
 from logging import getLogger
 from os.path import join
 from pathlib import Path
 from time import sleep
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -15,7 +20,9 @@ from conda.common.disk import temporary_content_in_file
 from conda.common.io import env_var, env_vars
 from conda.core.index import get_index
 from conda.core.subdir_data import (
+    IndexedPackageRecordList,
     SubdirData,
+    _signature_status,
     cache_fn_url,
     fetch_repodata_remote_request,
     read_mod_and_etag,
@@ -23,6 +30,7 @@ from conda.core.subdir_data import (
 from conda.exceptions import CondaSSLError, CondaUpgradeError, UnavailableInvalidChannel
 from conda.exports import url_path
 from conda.gateways.connection import SSLError
+from conda.gateways import repodata
 from conda.gateways.connection.session import CondaSession
 from conda.gateways.repodata import (
     CondaRepoInterface,
@@ -419,17 +427,326 @@ def test_state_is_not_json(tmp_path, platform=OVERRIDE_PLATFORM):
             )
 
     SubdirData.clear_cached_local_channel_data(exclude_file=False)
-    sd = BadCacheSubdirData(channel=local_channel)
 
-    with pytest.raises(CondaError):
-        state = sd._load_state()
-        # tortured way to get to old ValueError handler
-        bad_cache.write_text("NOT JSON")
-        sd._read_local_repodata(state)
+    # no index cache to short-circuit _read_local_repodata()
+    with env_var(
+        "CONDA_PKGS_DIRS", str(tmp_path), stack_callback=conda_tests_ctxt_mgmt_def_pol
+    ):
+        sd = BadCacheSubdirData(channel=local_channel)
+
+        with pytest.raises(CondaError):
+            state = sd._load_state()
+            # tortured way to get to old ValueError handler
+            bad_cache.write_text("NOT JSON")
+            sd._read_local_repodata(state)
 
 
 def test_subdir_data_dict_state(platform=OVERRIDE_PLATFORM):
     """SubdirData can accept a dict instead of a RepodataState, for compatibility."""
     local_channel = Channel(join(CHANNEL_DIR, platform))
     sd = SubdirData(channel=local_channel)
-    sd._read_pickled({})  # type: ignore
+    sd._read_index_cache({})  # type: ignore
+
+
+def test_subdir_data_index_cache(tmp_path, platform=OVERRIDE_PLATFORM):
+    """Parsed repodata is saved to, and loaded from, a memory-mapped index."""
+    local_channel = Channel(join(CHANNEL_DIR, platform))
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+    with env_var(
+        "CONDA_PKGS_DIRS", str(tmp_path), stack_callback=conda_tests_ctxt_mgmt_def_pol
+    ):
+        _test_subdir_data_index_cache(local_channel)
+
+
+def _test_subdir_data_index_cache(local_channel):
+    sd = SubdirData(channel=local_channel)
+    precs = tuple(sd.query("zlib"))
+    assert sd.cache_path_index.exists()
+    assert isinstance(sd._package_records, IndexedPackageRecordList)
+
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+    sd_b = SubdirData(channel=local_channel)
+    assert sd_b is not sd
+    _internal_state = sd_b._read_index_cache(sd_b.repo_cache.load_state())
+    assert _internal_state is not None
+    assert tuple(sd_b._iter_records_by_name("zlib")) == precs
+    assert tuple(sd_b._iter_records_by_name("not-a-package")) == ()
+    assert len(tuple(sd_b.iter_records())) == len(tuple(sd.iter_records()))
+
+    # index doesn't match a changed json
+    with sd_b.cache_path_json.open("a") as repodata:
+        repodata.write(" ")
+    assert sd_b._read_index_cache(sd_b.repo_cache.load_state()) is None
+
+    # a corrupt index is ignored and removed
+    sd_b.cache_path_index.write_bytes(b"corrupt")
+    assert sd_b._read_index_cache(sd_b.repo_cache.load_state()) is None
+    assert not sd_b.cache_path_index.exists()
+
+
+def test_subdir_data_index_cache_skips_json(tmp_path, platform=OVERRIDE_PLATFORM):
+    """An up-to-date index is used without reading the cached json."""
+    local_channel = Channel(join(CHANNEL_DIR, platform))
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+    with env_var(
+        "CONDA_PKGS_DIRS", str(tmp_path), stack_callback=conda_tests_ctxt_mgmt_def_pol
+    ):
+        precs = tuple(SubdirData(channel=local_channel).query("zlib"))
+
+        SubdirData.clear_cached_local_channel_data(exclude_file=False)
+        with env_var(
+            "CONDA_USE_INDEX_CACHE", True, stack_callback=conda_tests_ctxt_mgmt_def_pol
+        ), patch.object(RepodataFetch, "read_cache", side_effect=AssertionError):
+            sd = SubdirData(channel=local_channel)
+            assert tuple(sd.query("zlib")) == precs
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+
+def test_subdir_data_fetch_all(tmp_path):
+    """Repodata fetched up front by fetch_all() is used by load()."""
+    channels = [
+        Channel(join(CHANNEL_DIR, platform)) for platform in ("linux-64", "win-64")
+    ]
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+    with env_var(
+        "CONDA_PKGS_DIRS", str(tmp_path), stack_callback=conda_tests_ctxt_mgmt_def_pol
+    ):
+        subdir_datas = [SubdirData(channel) for channel in channels]
+        SubdirData.fetch_all(subdir_datas)
+        assert all(sd._fetched for sd in subdir_datas)
+
+        with patch.object(
+            RepodataFetch, "fetch_latest_path", side_effect=AssertionError
+        ):
+            for sd in subdir_datas:
+                assert tuple(sd.iter_records())
+                assert sd._fetched is None
+
+        # loaded subdirs are not fetched again
+        SubdirData.fetch_all(subdir_datas)
+        assert not any(sd._fetched for sd in subdir_datas)
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+
+def test_subdir_data_background_refresh(
+    package_server, package_repository_base, tmp_path
+):
+    """
+    Expired repodata is used right away and refreshed on a thread;
+    refresh_stale() then reloads it.
+    """
+    host, port = package_server.getsockname()
+    channel = Channel(f"http://{host}:{port}/test/linux-64")
+    repodata_path = package_repository_base / "linux-64" / "repodata.json"
+    original = repodata_path.read_text()
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+    try:
+        with env_vars(
+            {"CONDA_PKGS_DIRS": str(tmp_path), "CONDA_LOCAL_REPODATA_TTL": "600"},
+            stack_callback=conda_tests_ctxt_mgmt_def_pol,
+        ):
+            precs = tuple(SubdirData(channel).iter_records())
+            assert precs
+
+            # the server has new repodata; the cache expired long ago
+            repodata = json.loads(original)
+            repodata["packages"] = repodata["packages.conda"] = {}
+            repodata_path.write_text(json.dumps(repodata))
+            cache = SubdirData(channel).repo_cache
+            cache.load_state()
+            cache.refresh(refresh_ns=1)
+
+            SubdirData.clear_cached_local_channel_data(exclude_file=False)
+            with env_var(
+                "CONDA_BACKGROUND_REPODATA_REFRESH",
+                True,
+                stack_callback=conda_tests_ctxt_mgmt_def_pol,
+            ):
+                sd = SubdirData(channel)
+                assert tuple(sd.iter_records()) == precs
+                assert sd._revalidation is not None
+                sd._revalidation.join()
+                assert tuple(sd.iter_records()) == precs
+
+                assert SubdirData.refresh_stale()
+                assert tuple(sd.iter_records()) == ()
+                assert not SubdirData.refresh_stale()
+    finally:
+        repodata_path.write_text(original)
+        SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+
+BACKGROUND_REFRESH_SCRIPT = """
+import threading
+import time
+from conda.core.subdir_data import SubdirData
+from conda.gateways.logging import initialize_logging
+from conda.gateways.repodata import RepodataCache
+from conda.models.channel import Channel
+
+initialize_logging()
+RepodataCache.stale = lambda self: True
+writing = threading.Event()
+write_state = RepodataCache._write_state
+
+
+def slow_write_state(self, state_file):
+    writing.set()
+    time.sleep(1)
+    write_state(self, state_file)
+
+
+def revalidate(self):
+    self.repo_cache.refresh(refresh_ns=12345)
+    time.sleep(600)
+
+
+RepodataCache._write_state = slow_write_state
+SubdirData._revalidate = revalidate
+
+sd = SubdirData(Channel("https://conda.example.com/test/linux-64"))
+path = sd.cache_path_json
+path.parent.mkdir(parents=True, exist_ok=True)
+path.write_text("{}")
+sd._refresh_in_background()
+assert writing.wait(60)
+print(sd.repo_cache.cache_path_state)
+"""
+
+
+def test_subdir_data_background_refresh_exit(tmp_path):
+    """
+    Exiting does not wait for a background refresh to finish, but for a cache
+    write in progress.
+    """
+    env = {
+        **os.environ,
+        "CONDA_PKGS_DIRS": str(tmp_path),
+        "CONDA_BACKGROUND_REPODATA_REFRESH": "true",
+    }
+    # the refresh would take ten minutes
+    result = subprocess.run(
+        [sys.executable, "-c", BACKGROUND_REFRESH_SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    state_path = Path(result.stdout.strip())
+    assert json.loads(state_path.read_text())["refresh_ns"] == 12345
+    assert not list(state_path.parent.glob("*.tmp"))
+
+
+def test_cache_writes_cancelled(tmp_path, monkeypatch):
+    monkeypatch.setattr(repodata, "_cache_writes_cancelled", threading.Event())
+    cache = RepodataCache(tmp_path / "cache", "repodata.json")
+    cache.refresh(refresh_ns=1)
+    repodata.cancel_cache_writes()
+    with pytest.raises(CondaError):
+        cache.refresh(refresh_ns=2)
+    assert json.loads(cache.cache_path_state.read_text())["refresh_ns"] == 1
+    assert [path.name for path in tmp_path.iterdir()] == ["cache.info.json"]
+
+
+def test_subdir_data_index_all(tmp_path):
+    """index_all() indexes several subdirs in worker processes."""
+    channels = [
+        Channel(join(CHANNEL_DIR, platform)) for platform in ("linux-64", "win-64")
+    ]
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+    with env_vars(
+        {"CONDA_PKGS_DIRS": str(tmp_path), "CONDA_REPODATA_PROCESSES": "2"},
+        stack_callback=conda_tests_ctxt_mgmt_def_pol,
+    ):
+        subdir_datas = [SubdirData(channel) for channel in channels]
+        SubdirData.fetch_all(subdir_datas)
+        SubdirData.index_all(subdir_datas)
+        assert all(sd.cache_path_index.exists() for sd in subdir_datas)
+
+        with patch.object(
+            SubdirData, "_write_index_cache", side_effect=AssertionError
+        ):
+            for sd in subdir_datas:
+                assert tuple(sd.iter_records())
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+
+def test_signature_verification_deferred(tmp_path, platform=OVERRIDE_PLATFORM):
+    """Signed records are verified when converted, once per repodata etag."""
+    repodata_path = Path(CHANNEL_DIR, platform, "repodata.json")
+    repodata = json.loads(repodata_path.read_text())
+    fns = [*repodata["packages"], *repodata["packages.conda"]]
+
+    verified = []
+
+    def verify(info, fn, signatures):
+        assert "url" not in info  # as published
+        assert signatures[fn] == "signature"
+        verified.append(fn)
+        info["metadata_signature_status"] = f"verified {fn}"
+
+    verification = Mock(side_effect=verify, enabled=True)
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+    with env_var(
+        "CONDA_PKGS_DIRS", str(tmp_path), stack_callback=conda_tests_ctxt_mgmt_def_pol
+    ), patch(
+        "conda.core.subdir_data.signature_verification", verification
+    ), patch.dict(
+        "conda.core.subdir_data._signature_status", clear=True
+    ):
+        sd = SubdirData(Channel(join(CHANNEL_DIR, platform)))
+
+        def load(etag):
+            repodata = json.loads(repodata_path.read_text())
+            repodata["signatures"] = {fn: "signature" for fn in fns}
+            sd._process_raw_repodata(repodata, {"_etag": etag})
+            assert not verified
+            records = tuple(sd._package_records)
+            assert records
+            assert all(
+                record.metadata_signature_status == f"verified {record.fn}"
+                for record in records
+            )
+            return records
+
+        records = load('"abc"')
+        assert sorted(verified) == sorted(record.fn for record in records)
+        verified.clear()
+
+        # same repodata version, verified already
+        load('"abc"')
+        assert not verified
+
+        load('"def"')
+        assert len(verified) == len(records)
+
+        # only the statuses of the latest version are kept
+        ((version, statuses),) = _signature_status.values()
+        assert version[1] == '"def"'
+        assert sorted(statuses) == sorted(record.fn for record in records)
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+
+
+def test_signature_verification_disabled(tmp_path):
+    """Records from an index are not verified, nor cached, without content trust."""
+    verification = Mock(enabled=False)
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
+    with env_var(
+        "CONDA_PKGS_DIRS", str(tmp_path), stack_callback=conda_tests_ctxt_mgmt_def_pol
+    ), patch(
+        "conda.core.subdir_data.signature_verification", verification
+    ), patch.dict(
+        "conda.core.subdir_data._signature_status", clear=True
+    ):
+        sd = SubdirData(Channel(join(CHANNEL_DIR, context.subdir))).load()
+        assert isinstance(sd._package_records, IndexedPackageRecordList)
+        assert tuple(sd.iter_records())
+        assert not verification.called
+        assert not _signature_status
+    SubdirData.clear_cached_local_channel_data(exclude_file=False)
@@ -33,6 +33,11 @@ from conda.gateways.repodata import (
     Response304ContentUnchanged,
     get_repo_interface,
 )
+from conda.gateways.repodata.index_cache import (
+    INDEX_CACHE_SUFFIX,
+    IndexCache,
+    write_index_cache,
+)
 from conda.gateways.repodata.jlap import core, fetch, interface
 from conda.models.channel import Channel
 
@@ -328,7 +333,10 @@ def test_jlap_sought(
         # XXX produces 'Requested range not satisfiable' (check retry whole jlap
         # after failed fetch)
 
-        test_jlap = make_test_jlap(cache.cache_path_json.read_bytes(), 4)
+        # patched repodata.json is not re-serialized as a whole; start from the
+        # nominal (upstream) form of the same data
+        nominal = json.dumps(json.loads(cache.cache_path_json.read_bytes()))
+        test_jlap = make_test_jlap(nominal.encode("utf-8"), 4)
         footer = test_jlap.pop()
         test_jlap.pop()  # patch taking us to "latest"
         test_jlap.add(footer[1])
@@ -664,3 +672,108 @@ def test_hashwriter():
     with writer:
         pass
     assert closed
+
+
+INDEXED_REPODATA = {
+    "info": {"subdir": "linux-64"},
+    "packages": {
+        "a-1.0-0.tar.bz2": {"name": "a", "version": "1.0", "depends": ["b", "c"]},
+        "b-1.0-0.tar.bz2": {"name": "b", "version": "1.0", "depends": []},
+    },
+    "packages.conda": {
+        "a-1.0-0.conda": {"name": "a", "version": "1.0", "depends": ["b"]},
+    },
+    "removed": [],
+    "repodata_version": 1,
+}
+
+INDEXED_PATCH = [
+    {"op": "add", "path": "/info/test", "value": 1},
+    {"op": "remove", "path": "/packages/b-1.0-0.tar.bz2"},
+    {
+        "op": "add",
+        "path": "/packages/c-2.0-0.tar.bz2",
+        "value": {"name": "c", "version": "2.0", "depends": []},
+    },
+    {"op": "replace", "path": "/packages.conda/a-1.0-0.conda/depends/0", "value": "d"},
+    {
+        "op": "move",
+        "from": "/packages/a-1.0-0.tar.bz2/depends/0",
+        "path": "/packages/a-1.0-0.tar.bz2/depends/1",
+    },
+    {"op": "remove", "path": "/packages.conda/a-1.0-0.conda"},
+]
+
+
+def test_apply_patches_to_index(tmp_path: Path):
+    """Patching the index gives the same repodata as patching parsed json."""
+    cache = RepodataCache(tmp_path / "cache", "repodata.json")
+    cache.save(json.dumps(INDEXED_REPODATA, indent=2))
+    cache.state[fetch.NOMINAL_HASH] = "have"
+    cache.refresh()
+    index_path = cache.cache_path_json.with_suffix(INDEX_CACHE_SUFFIX)
+    write_index_cache(
+        index_path,
+        INDEXED_REPODATA,
+        {"mtime_ns": cache.state["mtime_ns"], "size": cache.state["size"]},
+    )
+
+    expected = jsonpatch.apply_patch(INDEXED_REPODATA, INDEXED_PATCH)
+    temp_path = tmp_path / "patched.json"
+    on_disk_hash = fetch.apply_patches_to_index(
+        cache, "have", [{"patch": INDEXED_PATCH}], temp_path
+    )
+    h = fetch.hash()
+    h.update(temp_path.read_bytes())
+    assert on_disk_hash == h.hexdigest()
+
+    patched = json.loads(temp_path.read_bytes())
+    assert patched == expected
+    assert list(patched) == list(INDEXED_REPODATA)
+
+    with IndexCache(index_path) as index:
+        assert index.meta["size"] == temp_path.stat().st_size
+        assert sorted(index) == ["a", "c"]
+        # the .tar.bz2 is no longer shadowed
+        (position,) = index["a"]
+        assert index.info(index.entry(position))["depends"] == ["c", "b"]
+
+    # the new index describes temp_path, not the cached json it replaces
+    assert fetch.apply_patches_to_index(cache, "have", [], temp_path) is None
+
+
+def test_apply_patches_to_index_unsupported(tmp_path: Path):
+    cache = RepodataCache(tmp_path / "cache", "repodata.json")
+    cache.save(json.dumps(INDEXED_REPODATA))
+    index_path = cache.cache_path_json.with_suffix(INDEX_CACHE_SUFFIX)
+    write_index_cache(
+        index_path,
+        INDEXED_REPODATA,
+        {"mtime_ns": cache.state["mtime_ns"], "size": cache.state["size"]},
+    )
+    cache.state[fetch.NOMINAL_HASH] = "have"
+    cache.refresh()
+
+    for patch in (
+        # spans entries
+        [
+            {
+                "op": "copy",
+                "from": "/packages/a-1.0-0.tar.bz2",
+                "path": "/packages/a-1.0-1.tar.bz2",
+            }
+        ],
+        # whole group
+        [{"op": "replace", "path": "/packages", "value": {}}],
+        # missing entry
+        [{"op": "remove", "path": "/packages/z-1.0-0.tar.bz2"}],
+    ):
+        assert (
+            fetch.apply_patches_to_index(
+                cache, "have", [{"patch": patch}], tmp_path / "patched.json"
+            )
+            is None
+        )
+
+    # nothing was written for the rejected patches
+    assert fetch.apply_patches_to_index(cache, "have", [], tmp_path / "patched.json")
@@ -7,6 +7,8 @@ Strongly related to subdir_data / test_subdir_data.
 from __future__ import annotations
 
 import datetime
+import hashlib
+import io
 import json
 import math
 import sys
@@ -30,13 +32,16 @@ from conda.gateways.connection import (
     HTTPError,
     InvalidSchema,
     RequestsProxyError,
+    Response,
     SSLError,
 )
+from conda.gateways.connection.session import CondaSession
 from conda.gateways.repodata import (
     CACHE_CONTROL_KEY,
     CACHE_STATE_SUFFIX,
     ETAG_KEY,
     LAST_MODIFIED_KEY,
+    ON_DISK_HASH,
     CondaRepoInterface,
     RepodataCache,
     RepodataFetch,
@@ -404,3 +409,123 @@ def test_repodata_fetch_formats(
     assert a == json.loads(b.read_text())
 
     assert isinstance(state, RepodataState)
+
+
+def test_fresh_cache_state(tmp_path: Path):
+    """
+    fresh_cache_state() reports usable cache information without reading
+    repodata.json.
+    """
+    channel = Channel("https://conda.anaconda.org/conda-forge/linux-64")
+    fetch = RepodataFetch(
+        tmp_path / "xyzzy", channel, REPODATA_FN, repo_interface_cls=CondaRepoInterface
+    )
+
+    # no cache
+    assert fetch.fresh_cache_state() is None
+
+    cache = fetch.repo_cache
+    cache.state[CACHE_CONTROL_KEY] = "public, max-age=30"
+    cache.save("{}")
+
+    with env_vars(
+        {"CONDA_LOCAL_REPODATA_TTL": "1"},
+        stack_callback=conda_tests_ctxt_mgmt_def_pol,
+    ):
+        state = fetch.fresh_cache_state()
+        assert state is not None
+        assert state.cache_control == "public, max-age=30"
+
+        # expired long ago
+        cache.refresh(refresh_ns=1)
+        assert fetch.fresh_cache_state() is None
+
+    with env_vars(
+        {"CONDA_LOCAL_REPODATA_TTL": "1", "CONDA_BACKGROUND_REPODATA_REFRESH": "1"},
+        stack_callback=conda_tests_ctxt_mgmt_def_pol,
+    ):
+        # expired, but served while it is refreshed in the background
+        assert fetch.fresh_cache_state() is not None
+        revalidate = RepodataFetch(
+            tmp_path / "xyzzy",
+            channel,
+            REPODATA_FN,
+            repo_interface_cls=CondaRepoInterface,
+            revalidate=True,
+        )
+        assert revalidate.fresh_cache_state() is None
+
+
+def test_repodata_zst(
+    package_server: socket, package_repository_base: Path, tmp_path: Path
+):
+    """Prefer repodata.json.zst, streamed and hashed into the cache."""
+    zstandard = pytest.importorskip("zstandard")
+
+    host, port = package_server.getsockname()
+    channel = Channel(f"http://{host}:{port}/test/win-64")
+    subdir = package_repository_base / "win-64"
+
+    # distinguishable from repodata.json
+    repodata = json.loads((subdir / "repodata.json").read_text())
+    repodata["info"]["zst"] = True
+    repodata_zst = json.dumps(repodata).encode("utf-8")
+    zst_path = subdir / "repodata.json.zst"
+    zst_path.write_bytes(zstandard.ZstdCompressor().compress(repodata_zst))
+
+    try:
+        fetch = RepodataFetch(
+            tmp_path / "zst", channel, REPODATA_FN, repo_interface_cls=CondaRepoInterface
+        )
+        path, state = fetch.fetch_latest_path()
+        assert path.read_bytes() == repodata_zst
+        assert state.has_format("zst")[0] is True
+        assert state[ON_DISK_HASH] == hashlib.blake2b(
+            repodata_zst, digest_size=32
+        ).hexdigest()
+        assert json.loads(fetch.repo_cache.cache_path_state.read_text())["has_zst"]
+    finally:
+        zst_path.unlink()
+
+    fetch = RepodataFetch(
+        tmp_path / "json", channel, REPODATA_FN, repo_interface_cls=CondaRepoInterface
+    )
+    path, state = fetch.fetch_latest_path()
+    assert path.read_bytes() == (subdir / "repodata.json").read_bytes()
+    assert state.has_format("zst")[0] is False
+    assert not state.should_check_format("zst")
+
+
+@pytest.mark.parametrize("status", [403, 500])
+def test_repodata_zst_error(
+    package_server: socket,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    status: int,
+):
+    """Fall back to repodata.json on any .zst error, remembering only a 404."""
+    pytest.importorskip("zstandard")
+
+    host, port = package_server.getsockname()
+    channel = Channel(f"http://{host}:{port}/test/win-64")
+
+    get = CondaSession.get
+
+    def zst_error(self, url, **kwargs):
+        if url.endswith(".zst"):
+            response = Response()
+            response.status_code = status
+            response.url = url
+            response.raw = io.BytesIO(b"")
+            return response
+        return get(self, url, **kwargs)
+
+    monkeypatch.setattr(CondaSession, "get", zst_error)
+
+    fetch = RepodataFetch(
+        tmp_path / "json", channel, REPODATA_FN, repo_interface_cls=CondaRepoInterface
+    )
+    path, state = fetch.fetch_latest_path()
+    assert json.loads(path.read_text())["packages"]
+    assert "has_zst" not in state
+    assert state.should_check_format("zst")
@@ -0,0 +1,111 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import pytest
+
+from conda.gateways.repodata.index_cache import (
+    IndexCache,
+    IndexCacheError,
+    write_index_cache,
+)
+
+REPODATA = {
+    "info": {"subdir": "linux-64"},
+    "repodata_version": 1,
+    "packages": {
+        "zlib-1.2.11-0.tar.bz2": {"name": "zlib", "version": "1.2.11", "md5": "a"},
+        "zlib-1.2.11-1.tar.bz2": {"name": "zlib", "version": "1.2.11", "md5": "b"},
+        "python-3.11.0-0.tar.bz2": {"name": "python", "version": "3.11.0"},
+        "future-1.0-0.tar.bz2": {
+            "name": "future",
+            "version": "1.0",
+            "record_version": 2,
+        },
+    },
+    "packages.conda": {
+        "zlib-1.2.11-0.conda": {"name": "zlib", "version": "1.2.11", "md5": "c"},
+        "päckage-1.0-0.conda": {"name": "päckage", "version": "1.0"},
+    },
+}
+
+
+def records_by_name(index: IndexCache):
+    return {
+        name: [index.fn(index.entry(position)) for position in index[name]]
+        for name in index
+    }
+
+
+@pytest.mark.parametrize("use_only_tar_bz2", [False, True])
+def test_index_cache_roundtrip(tmp_path, use_only_tar_bz2):
+    path = tmp_path / "abc123.idx"
+    write_index_cache(
+        path, REPODATA, {"_etag": '"xyzzy"'}, use_only_tar_bz2=use_only_tar_bz2
+    )
+
+    with IndexCache(path) as index:
+        assert index.meta["_etag"] == '"xyzzy"'
+        assert index.repodata_header == {
+            "info": {"subdir": "linux-64"},
+            "repodata_version": 1,
+        }
+        # every entry is kept, as published
+        assert index.entry_count == 6
+        assert sorted(index.fn(i) for i in range(index.entry_count)) == sorted(
+            (*REPODATA["packages"], *REPODATA["packages.conda"])
+        )
+        for entry in range(index.entry_count):
+            fn = index.fn(entry)
+            group = "packages.conda" if fn.endswith(".conda") else "packages"
+            assert index.info(entry) == REPODATA[group][fn]
+            assert index.name(entry) == REPODATA[group][fn]["name"]
+            assert index.supported(entry) is (fn != "future-1.0-0.tar.bz2")
+
+        if use_only_tar_bz2:
+            assert records_by_name(index) == {
+                "python": ["python-3.11.0-0.tar.bz2"],
+                "zlib": ["zlib-1.2.11-0.tar.bz2", "zlib-1.2.11-1.tar.bz2"],
+            }
+        else:
+            # .conda shadows its .tar.bz2 counterpart
+            assert records_by_name(index) == {
+                "päckage": ["päckage-1.0-0.conda"],
+                "python": ["python-3.11.0-0.tar.bz2"],
+                "zlib": ["zlib-1.2.11-0.conda", "zlib-1.2.11-1.tar.bz2"],
+            }
+            (position,) = (p for p in index["zlib"] if index.group(index.entry(p)))
+            counterpart = index.counterpart(index.entry(position))
+            assert index.fn(counterpart) == "zlib-1.2.11-0.tar.bz2"
+
+        assert "future" not in index
+        assert "missing" not in index
+        with pytest.raises(KeyError):
+            index["missing"]
+
+
+def test_index_cache_empty(tmp_path):
+    path = tmp_path / "empty.idx"
+    write_index_cache(path, {}, {})
+    with IndexCache(path) as index:
+        assert len(index) == index.record_count == index.entry_count == 0
+        assert index.get("zlib", ()) == ()
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"", b"CONDAIDX", b"NOTANIDX" + bytes(8), b"CONDAIDX\x63\0\0\0\0\0\0\0"],
+)
+def test_index_cache_invalid(tmp_path, content):
+    path = tmp_path / "bad.idx"
+    path.write_bytes(content)
+    with pytest.raises(IndexCacheError):
+        IndexCache(path)
+
+
+def test_index_cache_truncated(tmp_path):
+    path = tmp_path / "truncated.idx"
+    write_index_cache(path, REPODATA, {})
+    path.write_bytes(path.read_bytes()[:-16])
+    with pytest.raises(IndexCacheError):
+        IndexCache(path)
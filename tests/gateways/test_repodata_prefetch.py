@@ -0,0 +1,42 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import threading
+
+from conda.exceptions import UnavailableInvalidChannel
+from conda.gateways.repodata.prefetch import fetch_all
+
+
+class FakeFetch:
+    def __init__(self, name, barrier=None, error=None):
+        self.name = name
+        self.barrier = barrier
+        self.error = error
+
+    def fetch_latest_path(self):
+        if self.barrier:
+            # deadlocks (and times out) unless every fetch is in flight at once
+            self.barrier.wait(timeout=10)
+        if self.error:
+            raise self.error
+        return self.name, {}
+
+
+def test_fetch_all_concurrent():
+    barrier = threading.Barrier(4)
+    error = UnavailableInvalidChannel("https://example.com/c", 404)
+    fetchers = [
+        FakeFetch("a", barrier),
+        FakeFetch("b", barrier, error=error),
+        FakeFetch("c", barrier),
+        FakeFetch("d", barrier),
+    ]
+    assert fetch_all(fetchers) == [("a", {}), error, ("c", {}), ("d", {})]
+
+
+def test_fetch_all_limited():
+    fetchers = [FakeFetch(name) for name in "abcdef"]
+    assert fetch_all(fetchers, max_workers=2) == [(name, {}) for name in "abcdef"]
+    assert fetch_all([]) == []
+
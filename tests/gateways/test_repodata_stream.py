@@ -0,0 +1,116 @@
+# Copyright (C) 2012 Anaconda, Inc
+# SPDX-License-Identifier: BSD-3-Clause
+from __future__ import annotations
+
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from conda.gateways.repodata.index_cache import IndexCache
+from conda.gateways.repodata.stream import (
+    iter_repodata,
+    iter_repodata_path,
+    write_index_cache_path,
+)
+from conda.testing.helpers import CHANNEL_DIR
+
+REPODATA = {
+    "info": {"subdir": "linux-64"},
+    "packages": {
+        "zlib-1.2.11-0.tar.bz2": {
+            "name": "zlib",
+            "depends": ["libgcc-ng >=7.3.0"],
+            "size": 12345678901,
+        },
+        "python-3.11.0-0.tar.bz2": {"name": "python", "license": "PSF-2.0 ☃"},
+    },
+    "packages.conda": {"zlib-1.2.11-0.conda": {"name": "zlib", "md5": None}},
+    "removed": [],
+    "repodata_version": 1,
+}
+
+
+def collect(events):
+    repodata = {}
+    for group, key, value in events:
+        if group is None:
+            repodata[key] = value
+        else:
+            repodata.setdefault(group, {})[key] = value
+    return repodata
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_repodata(chunk_size, indent):
+    text = json.dumps(REPODATA, indent=indent)
+    events = list(iter_repodata(StringIO(text), chunk_size=chunk_size))
+    assert [(group, key) for group, key, _ in events] == [
+        (None, "info"),
+        ("packages", "zlib-1.2.11-0.tar.bz2"),
+        ("packages", "python-3.11.0-0.tar.bz2"),
+        ("packages.conda", "zlib-1.2.11-0.conda"),
+        (None, "removed"),
+        (None, "repodata_version"),
+    ]
+    assert collect(events) == REPODATA
+
+
+@pytest.mark.parametrize("text", ["{}", " { } ", '{"packages": {}}'])
+def test_iter_repodata_empty(text):
+    assert list(iter_repodata(StringIO(text), chunk_size=1)) == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "[]",
+        '{"packages": {"a": {}',
+        '{"packages": {"a": {}}',
+        '{"packages": {"a" {}}}',
+        '{"info": {} "packages": {}}',
+        '{"info": {}} {}',
+        "{1: 2}",
+    ],
+)
+def test_iter_repodata_invalid(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_repodata(StringIO(text), chunk_size=3))
+
+
+def test_iter_repodata_path():
+    path = Path(CHANNEL_DIR, "linux-64", "repodata.json")
+    assert collect(iter_repodata_path(path, chunk_size=100)) == json.loads(
+        path.read_text()
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_iter_repodata_text(chunk_size):
+    text = json.dumps(REPODATA, indent=2)
+    for group, key, value, raw in iter_repodata(
+        StringIO(text), chunk_size=chunk_size, text=True
+    ):
+        assert json.loads(raw) == value
+
+
+def test_write_index_cache_path(tmp_path):
+    json_path = tmp_path / "repodata.json"
+    json_path.write_text(json.dumps(REPODATA, indent=2))
+    write_index_cache_path(tmp_path / "repodata.idx", json_path, {"size": 1})
+
+    index = IndexCache(tmp_path / "repodata.idx")
+    try:
+        assert index.meta["size"] == 1
+        assert index.repodata_header == {
+            key: value
+            for key, value in REPODATA.items()
+            if key not in ("packages", "packages.conda")
+        }
+        assert {index.info(entry)["name"] for entry in index["zlib"]} == {"zlib"}
+        assert "python" in index
+    finally:
+        index.close()
@@ -1,12 +1,16 @@
 # Copyright (C) 2012 Anaconda, Inc
 # SPDX-License-Identifier: BSD-3-Clause
+import pickle
 from logging import getLogger
 from unittest import TestCase
 
+import pytest
+
+from conda.auxlib.exceptions import ValidationError
 from conda.base.context import conda_tests_ctxt_mgmt_def_pol, context
 from conda.common.io import env_unmodified
 from conda.models.channel import Channel
-from conda.models.records import PackageRecord, PrefixRecord
+from conda.models.records import PackageRecord, PrefixRecord, RepodataRecord
 
 log = getLogger(__name__)
 
@@ -79,3 +83,71 @@ class PrefixRecordTests(TestCase):
         )
         assert rec.timestamp == ts_secs
         assert rec.dump()["timestamp"] == ts_millis
+
+
+@pytest.mark.parametrize(
+    "info",
+    [
+        {
+            "name": "austin",
+            "version": "1.2.3",
+            "build": "py34_2",
+            "build_number": 2,
+            "url": "https://repo.anaconda.com/pkgs/main/win-32/austin-1.2.3-py34_2.tar.bz2",
+            "depends": ["python >=3.4,<3.5.0a0"],
+            "md5": "0123456789",
+            "timestamp": 1507565728999,
+        },
+        {
+            "name": "austin",
+            "version": "1.2.3",
+            "build_string": "0",
+            "build_number": 0,
+            "schannel": "conda-forge",
+            "subdir": "noarch",
+            "filename": "austin-1.2.3-0.conda",
+            "noarch": "python",
+            "track_features": "mkl debug",
+            "license": None,
+            "size": 1234,
+        },
+        {
+            "name": "austin",
+            "version": "1.2.3",
+            "build": "0",
+            "build_number": 0,
+            "platform": "linux",
+            "arch": "x86_64",
+        },
+    ],
+)
+def test_repodata_record(info):
+    prec = PackageRecord(**info)
+    rrec = RepodataRecord(**info)
+    for name in PackageRecord.__fields__:
+        assert getattr(rrec, name, None) == getattr(prec, name, None), name
+    assert rrec.dump() == prec.dump()
+    assert rrec == prec
+    assert hash(rrec) == hash(prec)
+    assert rrec.dist_str() == prec.dist_str()
+    assert {prec: prec}[rrec] is prec
+
+    copied = pickle.loads(pickle.dumps(rrec))
+    assert type(copied) is RepodataRecord
+    assert copied.dump() == rrec.dump()
+
+    prefix_rec = PrefixRecord.from_objects(rrec, files=())
+    assert prefix_rec.dump() == PrefixRecord.from_objects(prec, files=()).dump()
+
+
+def test_repodata_record_read_only():
+    rrec = RepodataRecord(name="austin", version="1.2.3", build="0", build_number=0)
+    assert not hasattr(rrec, "__dict__") or not rrec.__dict__
+    with pytest.raises(AttributeError):
+        rrec.depends = ("python",)
+    with pytest.raises(AttributeError):
+        del rrec.md5
+    assert rrec.depends == ()
+
+    with pytest.raises(ValidationError):
+        RepodataRecord(name="austin", version="1.2.3", build_number=0)
@@ -12,7 +12,12 @@ from conda.common.io import env_unmodified
 from conda.exceptions import CondaValueError, InvalidMatchSpec, InvalidSpec
 from conda.models.channel import Channel
 from conda.models.dist import Dist
-from conda.models.match_spec import ChannelMatch, MatchSpec, _parse_spec_str
+from conda.models.match_spec import (
+    ChannelMatch,
+    MatchSpec,
+    RecordColumns,
+    _parse_spec_str,
+)
 from conda.models.records import PackageRecord
 from conda.models.version import VersionSpec
 
@@ -111,6 +116,40 @@ class MatchSpecTests(TestCase):
 
         self.assertRaises(ValueError, MatchSpec, (1, 2, 3))
 
+    def test_filter(self):
+        records = [
+            DPkg(fn)
+            for fn in (
+                "numpy-1.7.1-py27_0.tar.bz2",
+                "numpy-1.7.1-py33_0.tar.bz2",
+                "numpy-1.7.1.0-py27_1.tar.bz2",
+                "numpy-1.6.2-py27_0.tar.bz2",
+                "numpy-1.8.0rc1-py27_0.tar.bz2",
+                "numpy-2.0-py27_2.tar.bz2",
+                "python-2.7.5-0.tar.bz2",
+            )
+        ]
+        columns = RecordColumns(records)
+        for spec in (
+            "numpy",
+            "numpy 1.7*",
+            "numpy >=1.5,<2",
+            "numpy >1.6,<2,!=1.7.1",
+            "numpy >1.8,<2|==1.7",
+            "numpy >=1.8|1.7*",
+            "numpy 1.7.1 py27_*",
+            "numpy[build_number=0]",
+            "numpy[build_number='>0']",
+            "*[version='>=2']",
+            "numpy[md5=012345789]",
+            "python",
+        ):
+            ms = MatchSpec(spec)
+            expected = [rec for rec in records if ms.match(rec)]
+            assert ms.filter(records) == expected, spec
+            assert ms.filter(columns) == expected, spec
+        assert MatchSpec("numpy").filter([]) == []
+
     def test_no_name_match_spec(self):
         ms = MatchSpec(track_features="mkl")
         assert str(ms) == "*[track_features=mkl]"
@@ -135,7 +174,8 @@ class MatchSpecTests(TestCase):
         d = MatchSpec(c, optional=True)
         assert d.optional
         assert not c.optional
-        assert a is not b
+        # specs made from the same string are shared
+        assert a is b
         assert a is not c
         assert a is not d
         assert a == b
@@ -1216,6 +1256,16 @@ class MatchSpecMergeTests(TestCase):
         with pytest.raises(ValueError):
             MatchSpec.merge(specs)
 
+    def test_spec_str_cache(self):
+        from conda.models.match_spec import _match_spec_from_str
+
+        _match_spec_from_str.cache_clear()
+        spec = MatchSpec("libgcc-ng >=12")
+        assert MatchSpec("libgcc-ng >=12") is spec
+        assert MatchSpec("libgcc-ng >=12", optional=True) is not spec
+        info = _match_spec_from_str.cache_info()
+        assert (info.hits, info.misses) == (1, 1)
+
     def test_hash_merge_with_name(self):
         for hash_type in ("md5", "sha256"):
             specs = (
@@ -1253,3 +1303,13 @@ class MatchSpecMergeTests(TestCase):
         self.assertRaises(InvalidMatchSpec, MatchSpec, ("*/lin(ux-65::f/o>=>1y"))
         # Inspired by above crasher
         self.assertRaises(InvalidMatchSpec, MatchSpec, ("^(aaaa$"))
+
+
+def test_parse_spec_str_cache_size(monkeypatch):
+    from conda.models import match_spec
+
+    monkeypatch.setattr(match_spec, "MATCH_SPEC_CACHE_SIZE", 2)
+    monkeypatch.setattr(match_spec, "_PARSE_CACHE", {})
+    for spec_str in ("numpy", "scipy", "pandas", "scipy"):
+        _parse_spec_str(spec_str)
+    assert list(match_spec._PARSE_CACHE) == ["scipy", "pandas"]
@@ -7,7 +7,14 @@ from random import shuffle
 import pytest
 
 from conda.exceptions import InvalidVersionSpec
-from conda.models.version import VersionOrder, VersionSpec, normalized_version, ver_eval
+from conda.models.version import (
+    StrArgCache,
+    VersionIntervals,
+    VersionOrder,
+    VersionSpec,
+    normalized_version,
+    ver_eval,
+)
 
 
 class TestVersionSpec(unittest.TestCase):
@@ -418,3 +425,106 @@ class TestVersionSpec(unittest.TestCase):
         # We're going to leave the not implemented for now.
         with pytest.raises(InvalidVersionSpec):
             VersionSpec("===3.3.2")
+
+
+def test_str_arg_cache():
+    cache = StrArgCache(maxsize=2)
+    assert cache.get("1.0") is None
+    one = cache.add("1.0", VersionOrder("1.0"))
+    assert cache.add("1.0", object()) is one
+    cache.add("2.0", VersionOrder("2.0"))
+    assert cache.get("1.0") is one
+    # 2.0 is the least recently used
+    cache.add("3.0", VersionOrder("3.0"))
+    assert "2.0" not in cache
+    assert "1.0" in cache
+    assert cache.info() == (1, 1, 1, 2, 2)
+
+    cache.maxsize = 1
+    assert list(cache._data) == ["3.0"]
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 1, 0)
+
+
+def test_version_order_cache_bounded(monkeypatch):
+    monkeypatch.setattr(VersionOrder, "_cache_", StrArgCache(maxsize=10))
+    for i in range(100):
+        VersionOrder(f"1.{i}")
+    assert len(VersionOrder._cache_) == 10
+    assert VersionOrder("1.99") is VersionOrder("1.99")
+    assert VersionOrder._cache_.info().evictions == 90
+
+
+@pytest.mark.parametrize(
+    "spec,intervals",
+    [
+        (">=1.2,<2", [("1.2", True, "2", False)]),
+        ("1.2|>3", [("1.2", True, "1.2", True), ("3", False, None, False)]),
+        ("<1|>=1", [(None, False, None, False)]),
+        (">=1,<1", []),
+        ("!=1.5,>=1,<=2", [("1", True, "1.5", False), ("1.5", False, "2", True)]),
+        ("(>=1,<2)|(>1.5,<3)|2.5", [("1", True, "3", False)]),
+        ("1.2.*", None),
+        (">=1,1.2.*", None),
+    ],
+)
+def test_version_spec_intervals(spec, intervals):
+    def bound(vo):
+        return None if vo is None else str(vo)
+
+    compiled = VersionSpec(spec).intervals
+    if intervals is None:
+        assert compiled is None
+    else:
+        assert [
+            (bound(lo), lo_closed, bound(hi), hi_closed)
+            for lo, lo_closed, hi, hi_closed in compiled.intervals
+        ] == intervals
+
+
+def test_version_spec_intervals_match():
+    versions = [
+        "0.9", "1", "1.0.0", "1.0a1", "1.0.post1", "1.0dev1", "1!0.5", "1.0+local",
+        "1.2", "1.2.3", "1.5", "2.0rc1", "2.0", "2.5", "3.1", "10.0",
+    ]  # fmt: skip
+    leaves = [
+        "1.0", ">=1.0", "<2", "<=1.2", ">1.0", "!=1.2", "1.2.*", "*", "~=1.2",
+        "!=1.0.*", "^1\\..*$", ">=1!0.1",
+    ]  # fmt: skip
+    sorted_versions = sorted(map(VersionOrder, versions))
+    for a, b, c in zip(leaves, leaves[3:] + leaves[:3], leaves[7:] + leaves[:7]):
+        for spec_str, expected in (
+            (f"{a},{b}|{c}", lambda m: m[a] and m[b] or m[c]),
+            (f"({a}|{b}),{c}", lambda m: (m[a] or m[b]) and m[c]),
+            (f"{a}|{b}|{c}", lambda m: m[a] or m[b] or m[c]),
+        ):
+            spec = VersionSpec(spec_str)
+            matches = set()
+            for version in versions:
+                leaf_matches = {
+                    leaf: VersionSpec(leaf).match(version) for leaf in (a, b, c)
+                }
+                assert spec.match(version) == expected(leaf_matches), spec_str
+                if spec.match(version):
+                    matches.add(str(VersionOrder(version)))
+
+            if spec.intervals is not None:
+                assert {
+                    str(sorted_versions[i])
+                    for start, stop in spec.intervals.index_ranges(sorted_versions)
+                    for i in range(start, stop)
+                } == matches, spec_str
+
+
+def test_version_intervals_operations():
+    one, two, three = map(VersionOrder, ("1", "2", "3"))
+    below_two = VersionIntervals.from_operator("<", two)
+    from_one = VersionIntervals.from_operator(">=", one)
+    assert from_one.intersection(below_two).intervals == ((one, True, two, False),)
+    assert below_two.union(from_one).is_everything()
+    assert below_two.intersection(VersionIntervals.from_operator(">=", two)).is_empty()
+    not_two = VersionIntervals.from_operator("!=", two)
+    assert two not in not_two
+    assert one in not_two and three in not_two
+    assert not_two.union(VersionIntervals.from_operator("==", two)).is_everything()
+    assert VersionIntervals.from_operator("~=", two) is None
@@ -8,6 +8,7 @@ except ImportError:
 import pytest
 
 from conda.api import (
+    BatchSolver,
     DepsModifier,
     PackageCacheData,
     PrefixData,
@@ -119,6 +120,23 @@ def test_Solver_return_value_contract():
     assert isinstance(solve_for_transaction_rv, UnlinkLinkTransaction)
 
 
+def test_BatchSolver_contract():
+    init_args = {
+        "self": PositionalArgument,
+        "channels": (),
+        "subdirs": (),
+        "repodata_fn": NULL,
+    }
+    inspect_arguments(BatchSolver.__init__, init_args)
+
+    solve_args = {
+        "self": PositionalArgument,
+        "specs_list": PositionalArgument,
+        "max_workers": 1,
+    }
+    inspect_arguments(BatchSolver.solve, solve_args)
+
+
 def test_SubdirData_contract():
     init_args = {
         "self": PositionalArgument,
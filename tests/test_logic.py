@@ -1,10 +1,29 @@
 # Copyright (C) 2012 Anaconda, Inc
 # SPDX-License-Identifier: BSD-3-Clause
+import sys
 from itertools import chain, combinations, permutations, product
+from multiprocessing import Pipe
+from types import SimpleNamespace
+from unittest.mock import Mock
 
 import pytest
 
-from conda.common.logic import FALSE, TRUE, Clauses, minimal_unsatisfiable_subset
+from conda.common._logic import (
+    _ClauseArray,
+    _ClauseList,
+    _PortfolioSolver,
+    _PortfolioWorker,
+    _PycoSatSolver,
+    _PyCryptoSatSolver,
+)
+from conda.common.logic import (
+    FALSE,
+    TRUE,
+    Clauses,
+    PortfolioSolver,
+    PySatIncrementalSolver,
+    minimal_unsatisfiable_subset,
+)
 from conda.testing.helpers import raises
 
 # These routines implement logical tests with short-circuiting
@@ -380,6 +399,273 @@ def test_minimize():
     assert sval == 11
 
 
+@pytest.mark.parametrize("clauses_cls", [_ClauseList, _ClauseArray])
+def test_clauses_as_list_since(clauses_cls):
+    clauses = clauses_cls()
+    clauses.extend([(1, -2), (3,)])
+    state = clauses.save_state()
+    clauses.extend([(-1,), (2, 3, -4)])
+    assert list(clauses.as_list_since(state)) == [(-1,), (2, 3, -4)]
+    clauses.restore_state(state)
+    assert list(clauses.as_list_since(state)) == []
+
+
+@pytest.mark.parametrize("clauses_cls", [_ClauseList, _ClauseArray])
+def test_clauses_restore_state(clauses_cls):
+    clauses = clauses_cls()
+    clauses.extend([(1, -2), (3,)])
+    state = clauses.save_state()
+    clauses.append((-1,))
+    inner_state = clauses.save_state()
+    clauses.extend([(2, 3, -4), (5,)])
+    assert clauses.get_clause_count() == 5
+    assert list(clauses.as_list_since(inner_state)) == [(2, 3, -4), (5,)]
+
+    clauses.restore_state(inner_state)
+    assert list(clauses.as_list()) == [(1, -2), (3,), (-1,)]
+    clauses.restore_state(state)
+    assert list(clauses.as_list()) == [(1, -2), (3,)]
+    assert clauses.get_clause_count() == 2
+    assert list(clauses.as_array()) == [1, -2, 0, 3, 0]
+
+    # clauses added after restoring replace the removed ones
+    clauses.append((4, 5))
+    assert list(clauses.as_list_since(state)) == [(4, 5)]
+    assert list(clauses.copy().as_list()) == [(1, -2), (3,), (4, 5)]
+
+
+def test_clause_array_chunks(monkeypatch):
+    # clauses span the chunks the array is split in, and some are longer
+    monkeypatch.setattr(_ClauseArray, "_chunk_size", 4)
+    expected = [(1, -2), tuple(range(3, 13)), (-5,), (6, 7, 8), (9,)]
+    clauses = _ClauseArray()
+    clauses.extend(expected[:2])
+    state = clauses.save_state()
+    clauses.extend(expected[2:])
+    assert list(clauses.as_list()) == expected
+    assert clauses.as_list_since(state) == expected[2:]
+    assert clauses.as_list_since(clauses.save_state()) == []
+
+
+def test_sat_solver_clauses(monkeypatch):
+    # pycosat reads the stored tuples as they are
+    sat_solver = _PycoSatSolver()
+    assert isinstance(sat_solver._clauses, _ClauseList)
+    sat_solver.add_clauses([(1, -2), (2,)])
+    assert sat_solver._clauses.as_list() is sat_solver._clauses.as_list()
+    assert sat_solver.run(2) == [1, 2]
+
+    # pycryptosat is handed the stored array, which the portfolio also keeps
+    assert isinstance(_PortfolioSolver()._clauses, _ClauseArray)
+    added = []
+    solver = SimpleNamespace(add_clauses=added.append)
+    monkeypatch.setitem(
+        sys.modules, "pycryptosat", SimpleNamespace(Solver=lambda threads: solver)
+    )
+    sat_solver = _PyCryptoSatSolver()
+    assert isinstance(sat_solver._clauses, _ClauseArray)
+    sat_solver.add_clauses([(1, -2), (2,)])
+    assert sat_solver.setup(2) is solver
+    assert added[0] is sat_solver._clauses.as_array()
+    assert list(added[0]) == [1, -2, 0, 2, 0]
+
+
+def test_sat_incremental():
+    pytest.importorskip("pysat")
+
+    # compare against the default, non-incremental solver
+    results = []
+    for kwargs in ({}, {"sat_solver": PySatIncrementalSolver}):
+        C = Clauses(15, **kwargs)
+        C.Require(C.ExactlyOne, range(1, 6))
+        C.Require(C.ExactlyOne, range(6, 11))
+        steps = [
+            C.sat([(1,), (6,)]),
+            C.sat([(1,), (-1,)]),
+            C.sat([(2,)], includeIf=False),
+            C.sat([(3,)], includeIf=True),
+            C.sat([(2,)]),
+            C.minimize([(k, k) for k in range(6, 11)])[1],
+            C.sat([(-3, 7)], includeIf=True),
+            C.sat([(-7,)]),
+            C.sat([(7,), (-8, 9)]),
+        ]
+        results.append([True if isinstance(step, list) else step for step in steps])
+        assert 3 in C.sat()
+    assert results[0] == results[1]
+    assert results[0] == [True, None, True, True, None, 6, None, True, None]
+
+
+def test_sat_portfolio(monkeypatch):
+    # solve everything in the workers; a backend that is not installed fails
+    # in its worker and is ignored
+    monkeypatch.setattr(_PortfolioSolver, "min_clauses", 0)
+    monkeypatch.setattr(
+        _PortfolioSolver, "backends", staticmethod(lambda: ["pycosat", "pysat"])
+    )
+    results = []
+    try:
+        for kwargs in ({}, {"sat_solver": PortfolioSolver}):
+            C = Clauses(15, **kwargs)
+            C.Require(C.ExactlyOne, range(1, 6))
+            C.Require(C.ExactlyOne, range(6, 11))
+            results.append(
+                [
+                    C.sat([(1,), (6,)]),
+                    C.sat([(1,), (-1,)]),
+                    C.sat([(3,)], includeIf=True),
+                    C.minimize([(k, k) for k in range(6, 11)])[1],
+                    C.sat([(-3, 7)]),
+                ]
+            )
+    finally:
+        for worker in _PortfolioSolver._workers.values():
+            worker.stop()
+    assert results[0] == results[1]
+    assert [step if isinstance(step, int) else bool(step) for step in results[1]] == [
+        True,
+        False,
+        True,
+        6,
+        False,
+    ]
+
+
+def test_sat_portfolio_deltas(monkeypatch):
+    # the workers keep the clauses they were sent, and only get the new ones
+    monkeypatch.setattr(_PortfolioSolver, "min_clauses", 0)
+    monkeypatch.setattr(
+        _PortfolioSolver, "backends", staticmethod(lambda: ["pycosat", "pysat"])
+    )
+    sent = []
+    start = _PortfolioWorker.start
+
+    def recording_start(worker):
+        start(worker)
+        send = worker.conn.send
+
+        def recording_send(job):
+            if worker.sat_solver_str == "pycosat":
+                keep, clause_bytes, m, limit = job
+                sent.append((keep, len(clause_bytes) // 4))
+            send(job)
+
+        worker.conn.send = recording_send
+
+    monkeypatch.setattr(_PortfolioWorker, "start", recording_start)
+    try:
+        C = Clauses(15, sat_solver=PortfolioSolver)
+        C.Require(C.ExactlyOne, range(1, 6))
+        size = C._clauses._sat_solver.save_state()
+        assert C.sat()
+        assert C.sat([(1,), (2,)]) is None
+        assert C.sat([(1,)])
+        C.Require(C.ExactlyOne, range(6, 11))
+        assert C.sat()
+        new_size = C._clauses._sat_solver.save_state()
+
+        other = Clauses(15, sat_solver=PortfolioSolver)
+        other.Require(other.ExactlyOne, range(1, 6))
+        assert other.sat()
+    finally:
+        for worker in _PortfolioSolver._workers.values():
+            worker.stop()
+    assert sent == [
+        (0, size),
+        (size, 4),
+        (size, 2),
+        (size, new_size - size),
+        (0, size),
+    ]
+
+
+@pytest.mark.parametrize("solution", [[1, -2], None], ids=["sat", "unsat"])
+def test_sat_portfolio_cancel(solution, monkeypatch):
+    assert _PortfolioSolver.backends() is _PortfolioSolver.backends()
+
+    class FakeWorker:
+        def __init__(self, sat_solver_str, reply):
+            self.sat_solver_str = sat_solver_str
+            self.conn, self.other_conn = Pipe()
+            self.reply = reply
+            self.cancelled = False
+
+        def submit(self, owner, keep, clause_array, m, limit):
+            if self.reply is not None:
+                self.other_conn.send(self.reply)
+
+        def cancel(self):
+            self.cancelled = True
+
+    # the first answer, also UNSAT, is taken, and backends that are still
+    # running are cancelled right away
+    workers = {
+        worker.sat_solver_str: worker
+        for worker in (
+            FakeWorker("slow", None),
+            FakeWorker("failed", (False, RuntimeError())),
+            FakeWorker("fast", (True, solution)),
+        )
+    }
+    monkeypatch.setattr(_PortfolioSolver, "_workers", workers)
+    monkeypatch.setattr(_PortfolioSolver, "min_clauses", 0)
+    monkeypatch.setattr(
+        _PortfolioSolver, "backends", staticmethod(lambda: list(workers))
+    )
+    run_in_process = Mock()
+    monkeypatch.setattr(_PortfolioSolver, "_run_in_process", run_in_process)
+    sat_solver = _PortfolioSolver()
+    sat_solver.add_clauses([(1,), (-2,)])
+    assert sat_solver.run(2) == solution
+    assert [worker.cancelled for worker in workers.values()] == [True, False, False]
+    assert not run_in_process.called
+
+
+def test_minimize_deadline():
+    objective = [(k, k) for k in range(1, 11)]
+    C = Clauses(10)
+    C.Require(C.AtMostOne, range(1, 11))
+    C.Require(C.Or, 9, 10)
+    assert C.minimize(objective)[1] == 9
+    assert not C.timed_out
+
+    C = Clauses(10)
+    C.Require(C.AtMostOne, range(1, 11))
+    C.Require(C.Or, 9, 10)
+    C.deadline = 0
+    solution, value = C.minimize(objective, C.sat([(10,)]))
+    assert C.timed_out
+    assert value == 10
+    assert 10 in solution
+
+
+def test_minimal_unsatisfiable_subset_sat_calls():
+    conflicts = [{10, 50}, {60, 61}, {-1, 127}]
+    calls = []
+
+    def sat(specs, add_if=False):
+        calls.append(specs)
+        return None if any(c <= set(specs) for c in conflicts) else True
+
+    specs = range(128)
+    assert minimal_unsatisfiable_subset(specs, sat, explicit_specs=[-1]) == {
+        50,
+        61,
+        127,
+    }
+    # adding the specs one at a time takes one call per spec: 129
+    assert len(calls) == 34
+
+    calls.clear()
+    assert minimal_unsatisfiable_subset(specs, sat, explicit_specs=[-1, 127]) == {
+        -1,
+        127,
+        50,
+        61,
+    }
+    assert len(calls) == 24
+
+
 @pytest.mark.xfail(
     reason="Broke this with reworking minimal_unsatisfiable_set.  Not sure how to fix.  minimal_unsatisfiable_subset function is otherwise working well."
 )
@@ -2,11 +2,66 @@
 # SPDX-License-Identifier: BSD-3-Clause
 from __future__ import annotations
 
+import pytest
+
+from conda import resolve
+from conda.common.logic import minimal_unsatisfiable_subset
+from conda.core import solve
 from conda.core.solve import Solver
-from conda.testing.solver_helpers import SolverTests
+from conda.testing.solver_helpers import SimpleEnvironment, SolverTests
 
 
 class TestClassicSolver(SolverTests):
     @property
     def solver_class(self) -> type[Solver]:
         return Solver
+
+
+@pytest.mark.parametrize(
+    "case,max_calls,sequential_calls",
+    [
+        ("test_unsat_any_two_not_three", 4, 4),
+        ("test_unsat_chain", 3, 3),
+        ("test_unsat_expand_single", 2, 2),
+        ("test_unsat_from_r1", 6, 6),
+        ("test_unsat_missing_dep", 3, 3),
+        ("test_unsat_shortest_chain_1", 4, 4),
+        ("test_unsat_shortest_chain_2", 4, 4),
+        ("test_unsat_shortest_chain_3", 4, 4),
+        ("test_unsat_shortest_chain_4", 3, 3),
+        ("test_unsat_simple", 3, 3),
+    ],
+)
+def test_conflicts_sat_calls(
+    case, max_calls, sequential_calls, monkeypatch, tmp_path
+):
+    """
+    Count SAT calls spent finding conflicts in the unsatisfiable cases, and the
+    calls of adding the specs one at a time. These few specs are added one at a
+    time; bisecting more is tested in test_minimal_unsatisfiable_subset_sat_calls.
+    """
+    calls = []
+    sequential = []
+
+    def counting_subset(clauses, sat, explicit_specs):
+        def counting_sat(specs, add_if=False):
+            solution = sat(specs, add_if)
+            calls.append(solution is not None)
+            return solution
+
+        start = len(calls)
+        conflicts = minimal_unsatisfiable_subset(clauses, counting_sat, explicit_specs)
+        # specs added one at a time: one call for the explicit specs, one per spec
+        working_set = set(explicit_specs) if calls[start] else set()
+        sequential.append(1 + len(set(clauses) - working_set))
+        return conflicts
+
+    monkeypatch.setattr(resolve, "minimal_unsatisfiable_subset", counting_subset)
+    # the virtual packages of this machine would add specs to search
+    monkeypatch.setattr(solve, "_supplement_index_with_system", lambda index: None)
+    tests = TestClassicSolver()
+    tests.env = SimpleEnvironment(tmp_path, Solver)
+    getattr(tests, case)(tests.env)
+
+    assert sum(sequential) == sequential_calls
+    assert len(calls) <= max_calls <= sequential_calls